@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Measures how long it takes to start a tool, for each way of calling it.
+
+Usage:
+    python benchmarks/startup.py [-n <calls>] [<tool> [<options>]]
+
+Runs a tool (default: pdb_head -10) repeatedly on a small PDB file, and
+reports the wall time per call of:
+
+    python -c pass               Python itself, as a baseline
+    python -m pdbtools.pdb_X     the tool module
+    python -m pdbtools X         the dispatcher
+    pdb_X, pdbtools X            the console scripts, if installed
+    python pdbtools.pyz X        a zipapp, built for the occasion (Python 3)
+
+For small files, startup is most of the time a tool takes to run.
+
+Example:
+    python benchmarks/startup.py -n 50 selchain -A
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)  # benchmark the sources next to this script
+
+from pdbtools.dispatch import build_zipapp  # noqa: E402
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+PDB_FILE = os.path.join(ROOT, 'tests', 'data', 'dummy.pdb')
+
+
+def check_input(args):
+    """Returns the number of calls and the tool to run, with its options.
+    """
+
+    n_calls = 20
+    args = list(args)
+    if args[:1] == ['-n']:
+        try:
+            n_calls = int(args[1])
+        except (IndexError, ValueError):
+            n_calls = 0
+        if n_calls < 1:
+            sys.stderr.write('ERROR!! Number of calls must be positive\n')
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        args = args[2:]
+
+    if not args:
+        args = ['head', '-10']
+    name = args[0]
+    if name.startswith('pdb_'):
+        name = name[4:]
+    return n_calls, name, args[1:]
+
+
+def time_command(cmd, n_calls, env):
+    """Returns the median wall time of running a command, in milliseconds.
+    """
+
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(n_calls):
+            start = time.time()
+            subprocess.check_call(cmd, stdout=devnull, env=env)
+            times.append(time.time() - start)
+
+    times.sort()
+    return 1000 * times[len(times) // 2]
+
+
+def main():
+    n_calls, name, options = check_input(sys.argv[1:])
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    python = sys.executable
+    args = options + [PDB_FILE]
+    commands = [
+        ('python -c pass', [python, '-c', 'pass']),
+        ('python -m pdbtools.pdb_' + name,
+         [python, '-m', 'pdbtools.pdb_' + name] + args),
+        ('python -m pdbtools ' + name,
+         [python, '-m', 'pdbtools', name] + args),
+    ]
+
+    for script in ('pdb_' + name, 'pdbtools'):
+        path = getattr(shutil, 'which', lambda _: None)(script)
+        if path is None:
+            continue
+        cmd = [path] + ([name] if script == 'pdbtools' else []) + args
+        commands.append((' '.join(cmd[:2 if script == 'pdbtools' else 1]),
+                         cmd))
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        zipapp_path = os.path.join(tmpdir, 'pdbtools.pyz')
+        try:
+            build_zipapp(zipapp_path)
+        except ImportError:  # Python 2: no zipapp
+            pass
+        else:
+            commands.append(('python pdbtools.pyz ' + name,
+                             [python, zipapp_path, name] + args))
+
+        sys.stdout.write('{0} calls each, median wall time:\n'.format(n_calls))
+        for label, cmd in commands:
+            elapsed = time_command(cmd, n_calls, env)
+            sys.stdout.write('{0:<36}{1:>8.1f} ms\n'.format(label, elapsed))
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
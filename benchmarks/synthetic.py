@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Writes large, reproducible, synthetic PDB files for benchmarking.
+
+Usage:
+    python benchmarks/synthetic.py [-atoms <n>] [-models <n>] [-seed <n>]
+
+Structures are made of chains of 100 residues (with insertion codes and
+alternate locations), each followed by a TER record, a ligand and waters as
+HETATM records. CONECT records for the ligands follow the last model. Every
+model has the same atoms, with slightly different coordinates, so ensembles
+pass pdb_chkensemble. Chain identifiers are reused after 62 chains and atom
+serial numbers wrap after 99999, as in large PDB files.
+
+The same options, and seed, always give the same file.
+
+Example:
+    python benchmarks/synthetic.py -atoms 1000000 > 1M.pdb
+    python benchmarks/synthetic.py -atoms 1000 -models 100 > ensemble.pdb
+"""
+
+import os
+import random
+import string
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)  # benchmark the sources next to this script
+
+from pdbtools.core.streams import write_lines  # noqa: E402
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+SEED = 1234
+
+RESIDUES_PER_CHAIN = 100
+WATERS_PER_CHAIN = 10
+INSERTION_RATE = 0.02  # residues numbered as the previous one, plus a code
+ALTLOC_RATE = 0.03  # residues with two alternate locations
+
+CHAIN_IDS = string.ascii_uppercase + string.ascii_lowercase + string.digits
+
+AMINO_ACIDS = [
+    ('GLY', ['N', 'CA', 'C', 'O']),
+    ('ALA', ['N', 'CA', 'C', 'O', 'CB']),
+    ('SER', ['N', 'CA', 'C', 'O', 'CB', 'OG']),
+    ('ASP', ['N', 'CA', 'C', 'O', 'CB', 'CG', 'OD1', 'OD2']),
+    ('LEU', ['N', 'CA', 'C', 'O', 'CB', 'CG', 'CD1', 'CD2']),
+    ('LYS', ['N', 'CA', 'C', 'O', 'CB', 'CG', 'CD', 'CE', 'NZ']),
+    ('PHE', ['N', 'CA', 'C', 'O', 'CB', 'CG', 'CD1', 'CD2', 'CE1', 'CE2',
+             'CZ']),
+]
+
+LIGAND = ('LIG', ['C1', 'C2', 'C3', 'C4', 'C5', 'C6', 'O1', 'N1'])
+LIGAND_BONDS = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 0), (0, 6),
+                (3, 7)]
+
+WATER = ('HOH', ['O'])
+
+_atom_fmt = ('{:6s}{:5d} {:4s}{:1s}{:3s} {:1s}{:4d}{:1s}   '
+             '{:8.3f}{:8.3f}{:8.3f}{:6.2f}{:6.2f}      {:<4s}{:>2s}  \n')
+
+
+def check_input(args):
+    """Returns the number of atoms per model, of models, and the seed.
+    """
+
+    options = {
+        '-atoms': 1000,
+        '-models': 1,
+        '-seed': SEED,
+    }
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg not in options or not args:
+            emsg = 'ERROR!! You provided an invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        value = args.pop(0)
+        try:
+            options[arg] = int(value)
+            if options[arg] < (0 if arg == '-seed' else 1):
+                raise ValueError
+        except ValueError:
+            emsg = 'ERROR!! Option must be a positive integer: \'{} {}\'\n'
+            sys.stderr.write(emsg.format(arg, value))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+    return (options['-atoms'], options['-models'], options['-seed'])
+
+
+def _atom_name(name):
+    """Returns an atom name aligned in its 4 columns.
+    """
+    return name if len(name) == 4 else ' ' + name.ljust(3)
+
+
+def _layout(n_atoms, seed):
+    """Yields the residues of a model, as they are laid out in the file.
+
+    Yields (record, chain, resname, resnum, icode, atoms) tuples, where atoms
+    is a list of (name, altloc, occupancy, x, y, z, bfactor), or TER tuples
+    with an empty list of atoms. Uses its own random generator, so all models
+    get the same residues and reference coordinates.
+    """
+
+    rng = random.Random(seed)
+    n_written = 0
+    n_chains = 0
+    while n_written < n_atoms:
+        chain = CHAIN_IDS[n_chains % len(CHAIN_IDS)]
+        n_chains += 1
+
+        # Chains start on a grid, and are random walks from there
+        ox = 60.0 * (n_chains % 10)
+        oy = 60.0 * ((n_chains // 10) % 10)
+        oz = 60.0 * (n_chains // 100 % 10)
+        x, y, z = ox, oy, oz
+
+        residues = []
+        resnum, icode = 0, ' '
+        for _ in range(RESIDUES_PER_CHAIN):
+            if resnum and rng.random() < INSERTION_RATE:
+                icode = chr(ord(icode) + 1) if icode != ' ' else 'A'
+            else:
+                resnum += 1
+                icode = ' '
+            resname, names = rng.choice(AMINO_ACIDS)
+            residues.append(('ATOM', resname, resnum, icode, names,
+                             rng.random() < ALTLOC_RATE))
+
+        last = residues[-1]
+        residues.append(('TER', last[1], last[2], last[3], [], False))
+        residues.append(('HETATM', LIGAND[0], resnum + 1, ' ', LIGAND[1],
+                         False))
+        for i in range(WATERS_PER_CHAIN):
+            residues.append(('HETATM', WATER[0], resnum + 2 + i, ' ',
+                             WATER[1], False))
+
+        previous = None
+        for record, resname, num, code, names, altloc in residues:
+            if n_written >= n_atoms:
+                if previous is not None and previous[0] == 'ATOM':
+                    yield ('TER', chain) + previous[1:] + ([],)
+                break
+            previous = (record, resname, num, code)
+
+            x += rng.uniform(-2.2, 2.2)
+            y += rng.uniform(-2.2, 2.2)
+            z += rng.uniform(-2.2, 2.2)
+            x, y, z = [c if abs(c - o) < 25.0 else 2 * o - c
+                       for c, o in ((x, ox), (y, oy), (z, oz))]
+
+            atoms = []
+            for name in names:
+                ax = x + rng.uniform(-1.5, 1.5)
+                ay = y + rng.uniform(-1.5, 1.5)
+                az = z + rng.uniform(-1.5, 1.5)
+                bfactor = rng.uniform(10.0, 60.0)
+                if altloc:
+                    atoms.append((name, 'A', 0.6, ax, ay, az, bfactor))
+                    atoms.append((name, 'B', 0.4, ax + 0.3, ay, az, bfactor))
+                else:
+                    atoms.append((name, ' ', 1.0, ax, ay, az, bfactor))
+
+            n_written += len(atoms)
+            yield (record, chain, resname, num, code, atoms)
+
+
+def generate(n_atoms=1000, n_models=1, seed=SEED):
+    """Yields the lines of a synthetic PDB file.
+
+    `n_atoms` is the number of atoms per model, rounded up to a whole
+    residue.
+    """
+
+    yield 'HEADER    SYNTHETIC STRUCTURE'.ljust(80) + '\n'
+    remark = 'REMARK   1 ATOMS {} MODELS {} SEED {}'
+    yield remark.format(n_atoms, n_models, seed).ljust(80) + '\n'
+
+    conect = []  # serial numbers of the ligand atoms, from the first model
+    serial = 0
+    for model in range(1, n_models + 1):
+        jitter = random.Random(seed * 100003 + model)
+        if n_models > 1:
+            yield 'MODEL     {:4d}'.format(model).ljust(80) + '\n'
+
+        serial = 0
+        for record, chain, resname, resnum, icode, atoms in _layout(n_atoms,
+                                                                    seed):
+            if record == 'TER':
+                serial = serial % 99999 + 1
+                line = 'TER   {:5d}      {:3s} {:1s}{:4d}{:1s}'
+                yield line.format(serial, resname, chain, resnum,
+                                  icode).ljust(80) + '\n'
+                continue
+
+            segid = 'S' + chain
+            serials = []
+            for name, altloc, occ, x, y, z, bfactor in atoms:
+                serial = serial % 99999 + 1
+                serials.append(serial)
+                if n_models > 1:
+                    x += jitter.uniform(-0.5, 0.5)
+                    y += jitter.uniform(-0.5, 0.5)
+                    z += jitter.uniform(-0.5, 0.5)
+                yield _atom_fmt.format(record, serial, _atom_name(name),
+                                       altloc, resname, chain, resnum, icode,
+                                       x, y, z, occ, bfactor, segid, name[0])
+
+            if model == 1 and resname == LIGAND[0]:
+                conect.append(serials)
+
+        if n_models > 1:
+            yield 'ENDMDL'.ljust(80) + '\n'
+
+    for serials in conect:
+        bonded = [[] for _ in serials]
+        for i, j in LIGAND_BONDS:
+            if i < len(serials) and j < len(serials):
+                bonded[i].append(serials[j])
+                bonded[j].append(serials[i])
+        for serial, partners in zip(serials, bonded):
+            if partners:
+                line = 'CONECT{:5d}'.format(serial)
+                line += ''.join('{:5d}'.format(p) for p in partners)
+                yield line.ljust(80) + '\n'
+
+    yield 'END'.ljust(80) + '\n'
+
+
+def main():
+    n_atoms, n_models, seed = check_input(sys.argv[1:])
+    write_lines(generate(n_atoms, n_models, seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures how fast each tool processes large structures, and how much memory
+it takes.
+
+Usage:
+    python benchmarks/throughput.py [-suite <name>] [-sizes <list>]
+                                    [-repeat <n>] [-datadir <dir>] [-tsv]
+                                    [<tool> ...]
+
+Runs each tool (default: all of them but pdb_fetch) on synthetic structures
+written by synthetic.py, and reports, for each structure size:
+
+    lines/s     lines of the PDB file processed per second (best run)
+    peak MB     peak resident memory, above that of the idle process
+
+Tools that can be pipeline stages are timed by reading their generator to
+the end, without writing the output anywhere; the others run their main()
+function, with their output sent to /dev/null. Each run happens in a process
+of its own, so memory measurements do not add up. Tools that only work on
+ensembles are not run on single-model structures.
+
+Sizes are given as <atoms per model>x<models>. The 'quick' suite (default)
+goes up to 100k atoms and 1k models, the 'full' suite to 5M atoms and 10k
+models. Structures are written to -datadir and reused if they exist there,
+or to a temporary directory otherwise.
+
+Example:
+    python benchmarks/throughput.py selchain sort selaltloc
+    python benchmarks/throughput.py -sizes 1000x1,100x10000 chkensemble
+    python benchmarks/throughput.py -suite full -datadir /tmp/bench -tsv
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)  # benchmark the sources next to this script
+sys.path.insert(0, HERE)
+
+from pdbtools.core.streams import write_lines  # noqa: E402
+from pdbtools.pipeline import STAGES, build_stage  # noqa: E402
+from synthetic import SEED, generate  # noqa: E402
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+SUITES = {
+    'quick': [(1000, 1), (10000, 1), (100000, 1), (1000, 10), (100, 1000)],
+    'full': [(1000, 1), (10000, 1), (100000, 1), (1000000, 1), (5000000, 1),
+             (1000, 10), (1000, 100), (1000, 1000), (100, 10000)],
+}
+
+# Options of the stages that have no default, or whose default does little.
+STAGE_ARGS = {
+    'delchain': ['-A'],
+    'delelem': ['-O'],
+    'delres': ['-1:50'],
+    'delresname': ['-HOH'],
+    'head': ['-1000000000'],
+    'rplchain': ['-A:Z'],
+    'rplresname': ['-HOH:WAT'],
+    'selatom': ['-CA'],
+    'selchain': ['-A'],
+    'selelem': ['-C'],
+    'selmodel': ['-1'],
+    'selresname': ['-ALA'],
+    'selseg': ['-SA'],
+    'shiftres': ['-10'],
+    'tofasta': ['-multi'],
+}
+
+# Options of the other tools. The input file is added to the end, as many
+# times as given by '{}'. pdb_fetch needs the network and is not included.
+MAIN_ARGS = {
+    'chkensemble': ['{}'],
+    'frombin': ['{}'],
+    'gap': ['{}'],
+    'index': ['{}'],
+    'intersect': ['{}', '{}'],
+    'merge': ['{}'],
+    'mkensemble': ['{}'],
+    'pipe': ['delhetatm | tidy', '{}'],
+    'splitchain': ['{}'],
+    'splitmodel': ['{}'],
+    'splitseg': ['{}'],
+    'tobin': ['{}'],
+    'validate': ['{}'],
+    'wc': ['{}'],
+}
+
+# Tools that only run on ensembles
+ENSEMBLE_TOOLS = ('chkensemble', 'selmodel')
+
+# Tools that do not read PDB files: name: input format
+INPUT_FORMATS = {
+    'fromcif': 'cif',
+    'frombin': 'bin',
+}
+
+
+def check_input(args):
+    """Returns the sizes, tools, number of repeats, data directory and
+    whether to write tab-separated values.
+    """
+
+    options = {
+        '-suite': 'quick',
+        '-sizes': None,
+        '-repeat': 1,
+        '-datadir': None,
+        '-tsv': False,
+    }
+
+    def _error(emsg):
+        sys.stderr.write('ERROR!! {}\n'.format(emsg))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    tools = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith('-'):
+            name = arg[4:] if arg.startswith('pdb_') else arg
+            if name not in STAGES and name not in MAIN_ARGS:
+                _error('Unknown tool: \'{}\''.format(arg))
+            tools.append(name)
+        elif arg not in options:
+            _error('You provided an invalid option: \'{}\''.format(arg))
+        elif arg == '-tsv':
+            options[arg] = True
+        elif not args:
+            _error('Option requires a value: \'{}\''.format(arg))
+        else:
+            options[arg] = args.pop(0)
+
+    if options['-sizes'] is not None:
+        try:
+            sizes = []
+            for size in options['-sizes'].split(','):
+                atoms, models = size.lower().split('x')
+                sizes.append((int(atoms), int(models)))
+                if min(sizes[-1]) < 1:
+                    raise ValueError
+        except ValueError:
+            _error('Sizes must be given as <atoms>x<models>: \'{}\''.format(
+                options['-sizes']))
+    elif options['-suite'] in SUITES:
+        sizes = SUITES[options['-suite']]
+    else:
+        _error('Unknown suite: \'{}\''.format(options['-suite']))
+
+    try:
+        repeat = int(options['-repeat'])
+        if repeat < 1:
+            raise ValueError
+    except ValueError:
+        _error('Number of repeats must be a positive integer: \'{}\''.format(
+            options['-repeat']))
+
+    if not tools:
+        tools = sorted(set(STAGES) | set(MAIN_ARGS))
+
+    return (sizes, tools, repeat, options['-datadir'], options['-tsv'])
+
+
+def prepare_input(datadir, atoms, models, fmt='pdb'):
+    """Returns the path of a synthetic structure, writing it if needed.
+    """
+
+    root = os.path.join(datadir, 'synthetic_{}x{}_{}'.format(atoms, models,
+                                                             SEED))
+    path = root + '.pdb'
+    if not os.path.isfile(path):
+        write_lines(generate(atoms, models, SEED), path)  # atomic
+
+    if fmt == 'pdb':
+        return path
+
+    fmt_path = root + '.' + fmt
+    if not os.path.isfile(fmt_path):
+        with open(path) as fhandle:
+            if fmt == 'cif':
+                lines = build_stage('tocif', [], fhandle)
+                write_lines(lines, fmt_path)
+            else:
+                from pdbtools.pdb_tobin import convert_to_binary
+                structure = convert_to_binary(fhandle)
+                with open(fmt_path + '.tmp', 'wb') as output:
+                    structure.dump(output)
+                os.rename(fmt_path + '.tmp', fmt_path)
+    return fmt_path
+
+
+def count_lines(path):
+    """Returns the number of lines in a file.
+    """
+    with open(path, 'rb') as fhandle:
+        return sum(1 for _ in fhandle)
+
+
+def peak_memory():
+    """Returns the peak resident memory of this process, in MB, or None.
+    """
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # bytes, not kilobytes
+        peak //= 1024
+    return peak / 1024.0
+
+
+def run_tool(name, path):
+    """Runs a tool on a file once.
+    """
+
+    if name in STAGES:
+        with open(path) as fhandle:
+            for _ in build_stage(name, STAGE_ARGS.get(name, []), fhandle):
+                pass
+        return
+
+    import importlib
+    module = importlib.import_module('pdbtools.pdb_' + name)
+    sys.argv = ['pdb_' + name] + [path if a == '{}' else a
+                                  for a in MAIN_ARGS[name]]
+    try:
+        module.main()
+    finally:
+        sys.stdout.flush()
+
+
+def _measure(name, path, workdir, conn):
+    """Runs a tool in a child process and sends back (seconds, MB, error).
+    """
+
+    # Tools that split files write to the current directory, and index
+    # files are written next to their input: keep both out of the data
+    link = os.path.join(workdir, os.path.basename(path))
+    try:
+        os.symlink(os.path.abspath(path), link)
+    except (AttributeError, OSError):  # no symlinks on this platform
+        shutil.copy(path, link)
+    os.chdir(workdir)
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    stderr_path = os.path.join(workdir, 'stderr.txt')
+    stderr = os.open(stderr_path, os.O_WRONLY | os.O_CREAT)
+    os.dup2(stderr, 2)
+
+    baseline = peak_memory()
+    start = time.time()
+    error = None
+    try:
+        run_tool(name, link)
+    except SystemExit as e:  # tools exit on invalid data
+        if e.code:
+            sys.stderr.flush()
+            with open(stderr_path) as fhandle:  # first line is the reason
+                reason = fhandle.readline().strip()
+            error = reason or 'exited with status {}'.format(e.code)
+    except Exception as e:
+        error = '{}: {}'.format(e.__class__.__name__, e)
+    seconds = time.time() - start
+
+    peak = peak_memory()
+    memory = None if peak is None else max(0.0, peak - baseline)
+    conn.send((seconds, memory, error))
+    conn.close()
+
+
+def measure(name, path, repeat=1):
+    """Returns the best time, peak memory, and error message (or None) of
+    running a tool `repeat` times on a file, each in a new process.
+    """
+
+    import multiprocessing
+
+    best, memory = None, None
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp()
+        try:
+            parent, child = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_measure,
+                                              args=(name, path, workdir,
+                                                    child))
+            process.start()
+            child.close()
+            try:
+                seconds, peak, error = parent.recv()
+            except EOFError:
+                seconds, peak, error = None, None, 'process died'
+            process.join()
+        finally:
+            shutil.rmtree(workdir)
+
+        if error is not None:
+            return (None, None, error)
+        best = seconds if best is None else min(best, seconds)
+        if peak is not None:
+            memory = peak if memory is None else max(memory, peak)
+    return (best, memory, None)
+
+
+def main():
+    sizes, tools, repeat, datadir, tsv = check_input(sys.argv[1:])
+
+    tmpdir = None
+    if datadir is None:
+        datadir = tmpdir = tempfile.mkdtemp()
+    elif not os.path.isdir(datadir):
+        os.makedirs(datadir)
+
+    if tsv:
+        header = 'tool\tatoms\tmodels\tlines\tseconds\tlines_per_s\tpeak_mb\n'
+        row_fmt = '{}\t{}\t{}\t{}\t{:.4f}\t{:.0f}\t{}\n'
+        err_fmt = '{}\t{}\t{}\t{}\tERROR\t{}\n'
+    else:
+        header = '{:<13}{:>9}{:>8}{:>11}{:>10}{:>13}{:>10}\n'.format(
+            'tool', 'atoms', 'models', 'lines', 'seconds', 'lines/s',
+            'peak MB')
+        row_fmt = '{:<13}{:>9}{:>8}{:>11}{:>10.3f}{:>13,.0f}{:>10}\n'
+        err_fmt = '{:<13}{:>9}{:>8}{:>11}    ERROR  {}\n'
+
+    try:
+        sys.stdout.write(header)
+        for atoms, models in sizes:
+            path = prepare_input(datadir, atoms, models)
+            n_lines = count_lines(path)
+            for name in tools:
+                if models == 1 and name in ENSEMBLE_TOOLS:
+                    continue
+
+                fmt = INPUT_FORMATS.get(name, 'pdb')
+                try:
+                    inpath = prepare_input(datadir, atoms, models, fmt)
+                except Exception as e:  # e.g. pdb_tobin without NumPy
+                    error = '{}: {}'.format(e.__class__.__name__, e)
+                    seconds = None
+                else:
+                    seconds, memory, error = measure(name, inpath, repeat)
+
+                if error is not None:
+                    sys.stdout.write(err_fmt.format(name, atoms, models,
+                                                    n_lines, error))
+                else:
+                    rate = n_lines / max(seconds, 1e-9)
+                    mem = '-' if memory is None else '{:.1f}'.format(memory)
+                    sys.stdout.write(row_fmt.format(name, atoms, models,
+                                                    n_lines, seconds, rate,
+                                                    mem))
+                sys.stdout.flush()
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs a tool, or a pipeline of tools, on many files at once.
+
+Usage:
+    pdbtools <tool> [<options>] -batch <input> ... -outdir <dir> [-jobs <n>]
+    pdbtools pipe '<pipeline>' -batch <input> ... -outdir <dir> [-jobs <n>]
+
+Any tool that can be a stage of a pipeline (see `pdb_pipe`) can run in batch
+mode. Each input can be a file, a directory (searched recursively for PDB
+files), a quoted glob pattern, or a manifest file given as @<file>, listing one
+path per line. Blank lines and lines starting with '#' are ignored.
+
+Each input file is processed on its own and written to the output directory,
+with the same name (without any compression suffix; '.cif' or '.fasta' after
+pdb_tocif or pdb_tofasta). Files are written to a temporary name first, so
+only complete outputs are ever left behind.
+
+With -jobs, files are processed by a pool of processes, largest files first.
+The status of each file is reported as it completes:
+
+    <input file>   OK      <output file>   <seconds>s
+    <input file>   ERROR   <error message>
+
+The exit code is 1 if any file failed.
+
+Example:
+    pdbtools selchain -A -batch 'structures/*.pdb' -outdir chainA -jobs 8
+    pdbtools pipe 'delhetatm | tidy' -batch @manifest.txt -outdir clean
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import glob
+import os
+import sys
+import time
+
+from pdbtools.core.streams import open_input, open_output, write_lines
+from pdbtools.pdb_tofasta import list_files
+from pdbtools.pipeline import STAGES, build_stages, parse_pipeline
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+COMPRESSED = ('.gz', '.bz2', '.xz')
+
+# Extension of the output files of the stages that change the format
+OUTPUT_EXTENSIONS = {
+    'fromcif': '.pdb',
+    'tocif': '.cif',
+    'tofasta': '.fasta',
+}
+
+
+def read_manifest(path):
+    """Returns the paths listed in a manifest file, one per line.
+    """
+
+    paths = []
+    with open(path) as fhandle:
+        for line in fhandle:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(line)
+    return paths
+
+
+def expand_inputs(inputs):
+    """Returns the files given by a list of files, directories, glob patterns
+    and @manifests, in order and without duplicates.
+
+    Raises ValueError if an input does not match any file.
+    """
+
+    paths = []
+    for item in inputs:
+        if item.startswith('@'):
+            manifest = item[1:]
+            if not os.path.isfile(manifest):
+                emsg = 'manifest not found or not readable: \'{}\''
+                raise ValueError(emsg.format(manifest))
+            entries = read_manifest(manifest)
+        elif os.path.exists(item):
+            entries = [item]
+        else:
+            entries = sorted(glob.glob(item))
+            if not entries:
+                emsg = 'file not found or not readable: \'{}\''
+                raise ValueError(emsg.format(item))
+
+        for entry in entries:
+            if not os.path.exists(entry):
+                emsg = 'file not found or not readable: \'{}\''
+                raise ValueError(emsg.format(entry))
+        paths.extend(list_files(entries))
+
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def schedule(paths):
+    """Returns the paths sorted by size, largest first.
+
+    Starting with the largest files keeps a single large file from running
+    alone at the end of the batch, while the other workers sit idle.
+    """
+    return sorted(paths, key=lambda p: -os.path.getsize(p))
+
+
+def output_name(path, stages):
+    """Returns the name of the output file of an input file.
+    """
+
+    root, ext = os.path.splitext(os.path.basename(path))
+    if ext.lower() in COMPRESSED:
+        root, ext = os.path.splitext(root)
+
+    for name, _ in stages:
+        ext = OUTPUT_EXTENSIONS.get(name, ext)
+    return root + ext
+
+
+def plan_outputs(paths, stages, outdir):
+    """Returns the (input, output) paths of a batch.
+
+    Raises ValueError if two inputs have the same output, or if an output
+    would overwrite its input.
+    """
+
+    tasks = []
+    inputs = {}
+    for path in paths:
+        outpath = os.path.join(outdir, output_name(path, stages))
+        key = os.path.realpath(outpath)
+        if key in inputs:
+            emsg = 'files would have the same output: \'{}\' and \'{}\''
+            raise ValueError(emsg.format(inputs[key], path))
+        if key == os.path.realpath(path):
+            emsg = 'output would overwrite input file: \'{}\''
+            raise ValueError(emsg.format(path))
+        inputs[key] = path
+        tasks.append((path, outpath))
+    return tasks
+
+
+def run_file(task):
+    """Processes one file. Returns (input, output, error message, seconds).
+
+    The error message is None if the file was processed successfully.
+    """
+
+    stages, path, outpath = task
+    start = time.time()
+    error = None
+    try:
+        with open_input(path) as fhandle:
+            write_lines(build_stages(stages, fhandle), outpath)
+    except SystemExit as e:  # tools exit on invalid data
+        error = 'tool exited with status {}'.format(e.code)
+    except Exception as e:  # keep the batch going, report it
+        error = '{}: {}'.format(e.__class__.__name__, e)
+    return (path, outpath, error, time.time() - start)
+
+
+def run_batch(stages, tasks, jobs=1):
+    """Yields (input, output, error message, seconds) for each task.
+
+    With more than one job, files are processed by a pool of processes and
+    results are yielded as they complete.
+    """
+
+    tasks = [(stages, path, outpath) for path, outpath in tasks]
+    if jobs == 1:
+        for task in tasks:
+            yield run_file(task)
+        return
+
+    import multiprocessing
+    pool = multiprocessing.Pool(min(jobs, len(tasks)) or 1)
+    try:
+        for result in pool.imap_unordered(run_file, tasks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def check_input(name, args):
+    """Validates the options of a batch run of tool `name`.
+
+    Returns the stages of the pipeline, the inputs, output directory and
+    number of jobs.
+    """
+
+    options = {
+        '-batch': [],
+        '-outdir': None,
+        '-jobs': 1,
+    }
+
+    tool_args = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg not in options:
+            tool_args.append(arg)
+            continue
+
+        if not args or (arg != '-batch' and args[0].startswith('-')):
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        if arg == '-batch':  # all values up to the next option
+            while args and not args[0].startswith('-'):
+                options[arg].append(args.pop(0))
+        else:
+            options[arg] = args.pop(0)
+
+    if not options['-batch']:
+        emsg = 'ERROR!! Option requires a value: \'-batch\'\n'
+        sys.stderr.write(emsg)
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    if options['-outdir'] is None:
+        emsg = 'ERROR!! Batch mode requires an output directory: \'-outdir\'\n'
+        sys.stderr.write(emsg)
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    try:
+        options['-jobs'] = int(options['-jobs'])
+        if options['-jobs'] < 1:
+            raise ValueError
+    except ValueError:
+        emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+        sys.stderr.write(emsg.format(options['-jobs']))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    try:
+        if name == 'pipe':
+            if len(tool_args) != 1:
+                raise ValueError('expected a single pipeline, quoted')
+            stages = parse_pipeline(tool_args[0])
+        elif name in STAGES:
+            stages = [(name, tool_args)]
+        else:
+            emsg = 'tool cannot be used in batch mode: \'{}\''
+            raise ValueError(emsg.format(name))
+
+        # Validate the options once, before starting any worker
+        build_stages(stages, iter(()))
+        inputs = expand_inputs(options['-batch'])
+
+    except ValueError as error:
+        sys.stderr.write('ERROR!! {}\n'.format(error))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    return (stages, inputs, options['-outdir'], options['-jobs'])
+
+
+def main(name, args):
+    # Check Input
+    stages, inputs, outdir, jobs = check_input(name, args)
+
+    try:
+        tasks = plan_outputs(schedule(inputs), stages, outdir)
+    except ValueError as error:
+        sys.stderr.write('ERROR!! {}\n'.format(error))
+        sys.exit(1)
+
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    # Do the job, report as we go
+    start = time.time()
+    n_errors = 0
+    with open_output() as output:
+        for path, outpath, error, seconds in run_batch(stages, tasks, jobs):
+            if error is None:
+                output.write('{}\tOK\t{}\t{:.2f}s\n'.format(path, outpath,
+                                                            seconds))
+            else:
+                n_errors += 1
+                output.write('{}\tERROR\t{}\n'.format(path, error))
+            output.flush()
+
+    emsg = 'Processed {} file(s) in {:.2f}s: {} OK, {} failed\n'
+    sys.stderr.write(emsg.format(len(tasks), time.time() - start,
+                                 len(tasks) - n_errors, n_errors))
+    sys.exit(1 if n_errors else 0)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming reader and writing helpers for the mmCIF/PDBx format.
+
+The reader understands the full CIF 1.1 syntax used by the PDB archive:
+quoted values, semicolon-delimited text fields, values on a different line
+than their tag, looped and non-looped categories, and multiple data blocks.
+
+    with open('1ctf.cif') as fh:
+        for block, category, items, rows in iter_categories(fh, ['atom_site']):
+            for row in rows:
+                ...
+
+Categories are read lazily: `rows` is a generator yielding one list of values
+per row, and is only valid until the next category is requested. The loops of
+categories that were not requested are skipped line by line, without being
+tokenized. Values are returned as strings, with quotes removed; the special
+values '.' and '?' are returned as is.
+"""
+
+import re
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+# Token types
+DATA, LOOP, SAVE, GLOBAL, STOP, TAG, VALUE = range(7)
+
+_token_re = re.compile(r"""
+    (?P<quoted>'[^\n]*?'(?=\s|$)|"[^\n]*?"(?=\s|$))  # closing quote + space
+  | (?P<comment>\#.*)
+  | (?P<bare>\S+)
+""", re.VERBOSE)
+
+_needs_quotes = re.compile(r'\s|^[_#$\'"\[\];]|^(data|loop|save|global|stop)_',
+                           re.IGNORECASE)
+
+
+class CIFError(ValueError):
+    """Raised when a file does not follow the CIF syntax.
+    """
+    pass
+
+
+def _classify(token):
+    """Returns the (type, value) of an unquoted token.
+    """
+
+    if token[0] == '_':
+        return (TAG, token)
+
+    prefix = token[:7].lower()
+    if prefix.startswith('data_'):
+        return (DATA, token[5:])
+    elif prefix.startswith('save_'):
+        return (SAVE, token[5:])
+    elif prefix == 'loop_' and len(token) == 5:
+        return (LOOP, token)
+    elif prefix == 'global_' and len(token) == 7:
+        return (GLOBAL, token)
+    elif prefix == 'stop_' and len(token) == 5:
+        return (STOP, token)
+    return (VALUE, token)
+
+
+def split_line(line):
+    """Splits a line (not part of a text field) into (type, value) tokens.
+    """
+
+    tokens = []
+    for match in _token_re.finditer(line):
+        kind = match.lastgroup
+        if kind == 'bare':
+            tokens.append(_classify(match.group()))
+        elif kind == 'quoted':
+            tokens.append((VALUE, match.group()[1:-1]))
+        else:  # comment: ignore rest of the line
+            break
+    return tokens
+
+
+class _Scanner(object):
+    """Reads tokens from a file, one line at a time.
+    """
+
+    def __init__(self, fhandle):
+        self._lines = iter(fhandle)
+        self._tokens = []
+        self._pos = 0
+        self.lineno = 0
+
+    def _readline(self):
+        line = next(self._lines, None)
+        if line is not None:
+            self.lineno += 1
+        return line
+
+    def _tokenize(self, line):
+        """Tokenizes a line, reading the rest of a text field if it starts one.
+        """
+
+        if line[:1] != ';':
+            return split_line(line)
+
+        start = self.lineno
+        text = [line[1:]]
+        while True:
+            line = self._readline()
+            if line is None:
+                emsg = 'unterminated text field starting on line {}'
+                raise CIFError(emsg.format(start))
+            if line[:1] == ';':
+                break
+            text.append(line)
+
+        # The line break before the closing ';' belongs to the delimiter
+        value = ''.join(text)
+        if value.endswith('\n'):
+            value = value[:-1]
+            if value.endswith('\r'):
+                value = value[:-1]
+
+        return [(VALUE, value)] + split_line(line[1:])
+
+    def _fill(self):
+        """Reads lines until there are tokens available. False on EOF.
+        """
+        while self._pos >= len(self._tokens):
+            line = self._readline()
+            if line is None:
+                return False
+            self._tokens = self._tokenize(line)
+            self._pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next token without consuming it, or None on EOF.
+        """
+        if self._fill():
+            return self._tokens[self._pos]
+        return None
+
+    def next(self):
+        """Returns and consumes the next token, or None on EOF.
+        """
+        if self._fill():
+            token = self._tokens[self._pos]
+            self._pos += 1
+            return token
+        return None
+
+    def values(self):
+        """Returns the values on the next line, if it has nothing else.
+
+        This is the fast path for loop data: lines without quotes, comments,
+        tags or keywords are split on whitespace. Returns None otherwise, or
+        if tokens of the current line are still pending, and the line is then
+        read token by token.
+        """
+
+        if self._pos < len(self._tokens):
+            return None
+
+        line = self._readline()
+        if line is None:
+            return None
+
+        tagged = '_' in line or '#' in line  # tags or comments
+        quoted = "'" in line or '"' in line
+        if line[:1] != ';' and not tagged and not quoted:
+            return line.split()
+
+        self._tokens = self._tokenize(line)
+        self._pos = 0
+        return None
+
+    def skip_values(self):
+        """Skips values up to the next tag or keyword.
+
+        Only lines that can contain a tag or keyword are tokenized.
+        """
+
+        tokens = self._tokens
+        while self._pos < len(tokens) and tokens[self._pos][0] == VALUE:
+            self._pos += 1
+        if self._pos < len(tokens):
+            return
+
+        while True:
+            line = self._readline()
+            if line is None:
+                return
+
+            if line[:1] == ';':  # text field, may be followed by a tag
+                self._tokens = self._tokenize(line)
+                self._pos = 0
+                return self.skip_values()
+
+            if '_' in line:
+                tokens = split_line(line)
+                pos = 0
+                while pos < len(tokens) and tokens[pos][0] == VALUE:
+                    pos += 1
+                if pos < len(tokens):
+                    self._tokens = tokens
+                    self._pos = pos
+                    return
+
+
+def tokenize(fhandle):
+    """Yields the (type, value) tokens of a CIF file.
+
+    Types are DATA, LOOP, SAVE, GLOBAL, STOP, TAG and VALUE. Quotes are
+    removed from values, data block and save frame names are given without
+    their prefix.
+    """
+
+    scanner = _Scanner(fhandle)
+    token = scanner.next()
+    while token is not None:
+        yield token
+        token = scanner.next()
+
+
+def split_tag(tag):
+    """Splits a tag into its category and item names.
+
+    '_atom_site.Cartn_x' -> ('atom_site', 'Cartn_x')
+    """
+    category, _, item = tag[1:].partition('.')
+    return category, item
+
+
+def _loop_rows(scanner, ncols):
+    """Yields the rows of a loop, as lists of values.
+    """
+
+    row = []
+    while True:
+        values = scanner.values()
+        if values is not None:  # fast path
+            if not row and len(values) == ncols:
+                yield values
+                continue
+
+            row.extend(values)
+            while len(row) >= ncols:
+                yield row[:ncols]
+                row = row[ncols:]
+            continue
+
+        token = scanner.peek()
+        if token is None or token[0] != VALUE:
+            break
+
+        scanner.next()
+        row.append(token[1])
+        if len(row) == ncols:
+            yield row
+            row = []
+
+    if row:
+        emsg = 'number of values in loop is not a multiple of {} (line {})'
+        raise CIFError(emsg.format(ncols, scanner.lineno))
+
+
+def iter_categories(fhandle, categories=None):
+    """Yields the categories of a CIF file in file order.
+
+    Yields (block, category, items, rows) tuples, where `block` is the name of
+    the data block, `items` the list of item names of the category, and `rows`
+    an iterable of lists of values, one per row. Non-looped categories have a
+    single row.
+
+    If `categories` is given, only those categories are read and the others
+    are skipped.
+    """
+
+    if categories is not None:
+        categories = set(c.lower() for c in categories)
+
+    scanner = _Scanner(fhandle)
+
+    block = None
+    pairs = None  # (category, items, values) of a non-looped category
+    while True:
+        token = scanner.next()
+        if token is None:
+            break
+
+        kind, value = token
+        if kind == TAG:
+            category, item = split_tag(value)
+            if pairs is not None and pairs[0] != category:
+                yield block, pairs[0], pairs[1], [pairs[2]]
+                pairs = None
+
+            token = scanner.next()
+            if token is None or token[0] != VALUE:
+                emsg = 'missing value for \'{}\' (line {})'
+                raise CIFError(emsg.format(value, scanner.lineno))
+
+            if categories is None or category.lower() in categories:
+                if pairs is None:
+                    pairs = (category, [], [])
+                pairs[1].append(item)
+                pairs[2].append(token[1])
+            continue
+
+        if pairs is not None:
+            yield block, pairs[0], pairs[1], [pairs[2]]
+            pairs = None
+
+        if kind == LOOP:
+            category, items = None, []
+            token = scanner.peek()
+            while token is not None and token[0] == TAG:
+                scanner.next()
+                category, item = split_tag(token[1])
+                items.append(item)
+                token = scanner.peek()
+
+            if category is None:
+                emsg = 'loop without tags (line {})'
+                raise CIFError(emsg.format(scanner.lineno))
+
+            if categories is None or category.lower() in categories:
+                rows = _loop_rows(scanner, len(items))
+                yield block, category, items, rows
+                for _ in rows:  # consume rows the caller did not read
+                    pass
+            else:
+                scanner.skip_values()
+
+        elif kind == DATA:
+            block = value
+
+        elif kind == VALUE:
+            emsg = 'unexpected value \'{}\' (line {})'
+            raise CIFError(emsg.format(value, scanner.lineno))
+
+        # save frames, global_ and stop_ are not used in data files.
+
+    if pairs is not None:
+        yield block, pairs[0], pairs[1], [pairs[2]]
+
+
+def quote(value):
+    """Returns a value quoted as needed to be written to a CIF file.
+    """
+
+    if not value:
+        return '?'
+
+    if "'" in value:
+        if '"' in value:  # needs a text field
+            return '\n;{}\n;\n'.format(value)
+        return '"{}"'.format(value)
+    elif '"' in value or _needs_quotes.search(value):
+        return "'{}'".format(value)
+    return value
+
+
+def format_loop_header(category, items):
+    """Returns the header of a loop: the 'loop_' keyword and its tags.
+    """
+
+    lines = ['loop_\n']
+    for item in items:
+        lines.append('_{}.{}\n'.format(category, item))
+    return ''.join(lines)
@@ -0,0 +1,493 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Binary, columnar container for PDB structures.
+
+Storing a structure column by column lets tools that only touch one field
+(e.g. the b-factor) skip parsing the 80-column text altogether. Files are
+read with `mmap` and the columns are exposed as views of the mapped file, so
+nothing is copied until it is used.
+
+Layout (all integers are little-endian):
+
+    header     24 bytes: magic (8 bytes, MAGIC), version (uint16),
+               flags (uint16, unused), number of atoms (uint32),
+               number of columns (uint32), 4 bytes of padding.
+    directory  40 bytes per column: name (16 bytes, NUL-padded ASCII),
+               typecode (1 byte), 3 bytes of padding, number of items
+               (uint32), offset of the data from the start of the file
+               (uint64) and size of the data in bytes (uint64).
+    data       the columns, each starting at a multiple of 8 bytes.
+
+Typecodes follow the `array` module: 'B', 'H' and 'I' are unsigned integers
+of 1, 2 and 4 bytes, 'i' a signed 4-byte integer, 'f' and 'd' are 4 and 8
+byte floats. Typecode 's' is a string table: its items are latin-1 strings
+joined by NUL bytes.
+
+Columns with one item per atom:
+
+    serial, resseq             'i'
+    x, y, z, occ, b            'f' or 'd' (NaN for blank occupancy/b-factor)
+    width                      'B', length of the original line
+    record, name, altloc,      'H' or 'I', index into the string table of the
+    resname, chain, icode,     same name + '.str', e.g. 'name.str'. Values
+    segid, element, charge     are kept verbatim, with their original width.
+
+Other columns:
+
+    lines.str    's'  all records other than ATOM/HETATM, without newlines.
+    lines.pos    'I'  for each of those lines, the number of atoms before it.
+    models       'I'  optional, index of the first atom of each model.
+"""
+
+import bisect
+import io
+import mmap
+import struct
+import sys
+from array import array
+
+from pdbtools.core.records import AtomRecords, RECORDS, RecordError
+from pdbtools.core.records import format_atom
+from pdbtools.core.records import get_numpy
+from pdbtools.core.streams import open_output
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+MAGIC = b'\x89PDBBIN\n'
+VERSION = 1
+
+_header = struct.Struct('<8sHHII4x')
+_entry = struct.Struct('<16s1s3xIQQ')
+
+TEXT_COLUMNS = ('record', 'name', 'altloc', 'resname', 'chain', 'icode',
+                'segid', 'element', 'charge')
+INT_COLUMNS = ('serial', 'resseq')
+FLOAT_COLUMNS = ('x', 'y', 'z', 'occ', 'b')
+
+_swap = sys.byteorder != 'little'
+_py2 = sys.version_info[0] < 3
+
+
+class BinaryFormatError(Exception):
+    """Raised when reading a file that is not a valid binary structure.
+    """
+    pass
+
+
+def _typecode(column):
+    """Returns the typecode of an array, memoryview or NumPy array.
+    """
+    typecode = getattr(column, 'typecode', None)
+    if typecode is None:
+        typecode = getattr(column, 'format', None)
+    if typecode is None:
+        typecode = column.dtype.char
+    return typecode
+
+
+def _nbytes(column):
+    """Returns the size in bytes of an array, memoryview or NumPy array.
+    """
+    if isinstance(column, bytes):
+        return len(column)
+    return len(column) * column.itemsize
+
+
+def _join_strings(strings):
+    return '\0'.join(strings).encode('latin-1')
+
+
+def _split_strings(data, count):
+    if not count:
+        return []
+    return bytes(data).decode('latin-1').split('\0')
+
+
+class BinaryStructure(object):
+    """A structure in columnar form.
+
+    `columns` maps column names to sequences (array.array, memoryview or
+    NumPy arrays) and `tables` maps text column names to their string table.
+    Instances are not modified in place: the methods that change values
+    return new objects that share the unchanged columns.
+    """
+
+    def __init__(self, n_atoms, columns, tables, lines, line_pos, models=None):
+        self.n_atoms = n_atoms
+        self.columns = columns
+        self.tables = tables
+        self.lines = lines
+        self.line_pos = line_pos
+        self.models = models
+
+    def __len__(self):
+        return self.n_atoms
+
+    def _copy(self, **kwargs):
+        attrs = dict(n_atoms=self.n_atoms, columns=dict(self.columns),
+                     tables=dict(self.tables), lines=self.lines,
+                     line_pos=self.line_pos, models=self.models)
+        attrs.update(kwargs)
+        return BinaryStructure(**attrs)
+
+    def column(self, name):
+        """Returns a numerical column, as a NumPy array if available.
+        """
+        values = self.columns[name]
+        numpy = get_numpy()
+        if numpy is not None and not isinstance(values, numpy.ndarray):
+            return numpy.frombuffer(values, dtype=_typecode(values))
+        return values
+
+    def text(self, name):
+        """Returns the values of a text column, one per atom.
+        """
+        table = self.tables[name]
+        return [table[i] for i in self.columns[name]]
+
+    def where(self, name, values):
+        """Returns the indices of the atoms whose `name` field is in `values`.
+        """
+        table = self.tables[name]
+        wanted = set(i for i, v in enumerate(table) if v in values)
+        return [i for i, v in enumerate(self.columns[name]) if v in wanted]
+
+    def assign(self, name, value):
+        """Returns a copy where all atoms have `value` in column `name`.
+        """
+        if name in self.tables:
+            tables = dict(self.tables)
+            tables[name] = [value]
+            columns = dict(self.columns)
+            columns[name] = array('H', [0]) * self.n_atoms
+            return self._copy(columns=columns, tables=tables)
+
+        columns = dict(self.columns)
+        typecode = _typecode(self.columns[name])
+        columns[name] = array(typecode, [value]) * self.n_atoms
+        return self._copy(columns=columns)
+
+    def pad(self, width, keep=None):
+        """Returns a copy where all atom lines are at least `width` long.
+
+        Lines of at least `keep` characters, if given, are left as they are.
+        """
+        if keep is None:
+            keep = width
+        columns = dict(self.columns)
+        columns['width'] = array('B', [w if w >= keep else width
+                                       for w in self.columns['width']])
+        return self._copy(columns=columns)
+
+    def take(self, indices):
+        """Returns a copy with only the atoms at `indices` (ascending order).
+        """
+        indices = list(indices)
+        columns = {}
+        for name, values in self.columns.items():
+            columns[name] = array(_typecode(values),
+                                  [values[i] for i in indices])
+
+        # Lines and models stay before the same atoms they preceded
+        def remap(positions):
+            return array('I', [bisect.bisect_left(indices, p)
+                               for p in positions])
+
+        models = None
+        if self.models is not None:
+            models = remap(self.models)
+
+        return self._copy(n_atoms=len(indices), columns=columns,
+                          line_pos=remap(self.line_pos), models=models)
+
+    def map_lines(self, func):
+        """Returns a copy where non-coordinate lines are passed through func.
+
+        `func` is a tool's generator function: it is called with a list of one
+        line at a time and can yield any number of lines in its place.
+        """
+        lines, line_pos = [], array('I')
+        for line, pos in zip(self.lines, self.line_pos):
+            for new_line in func([line + '\n']):
+                lines.append(new_line.rstrip('\r\n'))
+                line_pos.append(pos)
+        return self._copy(lines=lines, line_pos=line_pos)
+
+    def model_range(self, model):
+        """Returns the (start, end) atom indices of the nth model (0-based).
+        """
+        if self.models is None:
+            if model:
+                raise IndexError('structure has a single model')
+            return 0, self.n_atoms
+
+        start = self.models[model]
+        if model + 1 < len(self.models):
+            return start, self.models[model + 1]
+        return start, self.n_atoms
+
+    def iter_lines(self):
+        """Yields the structure as PDB lines.
+        """
+
+        cols = self.columns
+        tables = self.tables
+        text = [(tables[n], cols[n]) for n in TEXT_COLUMNS]
+        (record, name, altloc, resname, chain, icode, segid, element,
+         charge) = text
+        serial, resseq = cols['serial'], cols['resseq']
+        x, y, z, occ, b = [cols[n] for n in FLOAT_COLUMNS]
+        width = cols['width']
+
+        _format = format_atom
+        atom = 0
+        positions = list(self.line_pos) + [self.n_atoms + 1]
+        lines = self.lines
+        for lineno, pos in enumerate(positions):
+            end = min(pos, self.n_atoms)
+            while atom < end:
+                yield _format(
+                    record[0][record[1][atom]], serial[atom],
+                    name[0][name[1][atom]], altloc[0][altloc[1][atom]],
+                    resname[0][resname[1][atom]], chain[0][chain[1][atom]],
+                    resseq[atom], icode[0][icode[1][atom]],
+                    x[atom], y[atom], z[atom], occ[atom], b[atom],
+                    segid[0][segid[1][atom]], element[0][element[1][atom]],
+                    charge[0][charge[1][atom]], width[atom],
+                )
+                atom += 1
+
+            if lineno < len(lines):
+                yield lines[lineno] + '\n'
+
+    def dump(self, fhandle):
+        """Writes the structure to a binary file handle.
+        """
+
+        entries = []  # (name, typecode, count, data)
+        for name in TEXT_COLUMNS:
+            table = self.tables[name]
+            entries.append((name + '.str', 's', len(table),
+                            _join_strings(table)))
+
+        for name, values in sorted(self.columns.items()):
+            typecode = _typecode(values)
+            if name in self.tables and len(self.tables[name]) > 0xFFFF:
+                typecode = 'I'
+            elif name in self.tables:
+                typecode = 'H'
+            if getattr(values, 'typecode', None) != typecode:
+                values = array(typecode, values)
+            entries.append((name, typecode, len(values), values))
+
+        entries.append(('lines.str', 's', len(self.lines),
+                        _join_strings(self.lines)))
+        entries.append(('lines.pos', 'I', len(self.line_pos),
+                        array('I', self.line_pos)))
+        if self.models is not None:
+            entries.append(('models', 'I', len(self.models),
+                            array('I', self.models)))
+
+        start = _header.size + _entry.size * len(entries)
+        offset = start
+        directory = []
+        for name, typecode, count, data in entries:
+            offset += -offset % 8
+            directory.append(_entry.pack(name.encode('ascii'),
+                                         typecode.encode('ascii'),
+                                         count, offset, _nbytes(data)))
+            offset += _nbytes(data)
+
+        write = fhandle.write
+        write(_header.pack(MAGIC, VERSION, 0, self.n_atoms, len(entries)))
+        write(b''.join(directory))
+        position = start
+        for name, typecode, count, data in entries:
+            padding = -position % 8
+            write(b'\0' * padding)
+            if _swap and typecode != 's':
+                data = array(typecode, data)
+                data.byteswap()
+            if _py2 and not isinstance(data, bytes):
+                data = data.tostring()  # files take no arrays on Python 2
+            write(data)
+            position += padding + _nbytes(data)
+
+
+def from_pdb(fhandle, float32=False):
+    """Builds a BinaryStructure from the lines of a PDB file.
+
+    Raises RecordError, with the line number, for coordinate records with
+    numerical fields that cannot be parsed.
+    """
+
+    records = AtomRecords()
+    lines, line_pos, models = [], array('I'), array('I')
+    for lineno, line in enumerate(fhandle, 1):
+        if line.startswith(RECORDS):
+            try:
+                records.append(line)
+            except RecordError as error:
+                raise RecordError(error.field, error.line, lineno)
+            continue
+
+        if line.startswith('MODEL '):
+            models.append(len(records))
+        lines.append(line.rstrip('\r\n'))
+        line_pos.append(len(records))
+
+    columns, tables = {}, {}
+    for name in TEXT_COLUMNS:
+        table, index = [], {}
+        column = array('I')
+        for value in getattr(records, name):
+            idx = index.get(value)
+            if idx is None:
+                idx = index[value] = len(table)
+                table.append(value)
+            column.append(idx)
+        columns[name] = column
+        tables[name] = table
+
+    for name in INT_COLUMNS:
+        columns[name] = array('i', getattr(records, name))
+
+    typecode = 'f' if float32 else 'd'
+    for name in FLOAT_COLUMNS:
+        columns[name] = array(typecode, getattr(records, name))
+
+    columns['width'] = array('B', records.width)
+
+    return BinaryStructure(len(records), columns, tables, lines, line_pos,
+                           models or None)
+
+
+def _view(data, typecode, offset, count):
+    """Returns a view of `count` items of `data`, without copying if possible.
+    """
+    size = array(typecode).itemsize
+    chunk = data[offset:offset + size * count]
+    if _swap:
+        values = array(typecode, bytes(chunk))
+        values.byteswap()
+        return values
+    numpy = get_numpy()
+    if numpy is not None:
+        return numpy.frombuffer(chunk, dtype=typecode)
+    try:
+        return chunk.cast(typecode)
+    except AttributeError:  # Python 2
+        return array(typecode, bytes(chunk))
+
+
+def load(fhandle):
+    """Reads a binary structure from a file handle or a path.
+
+    Regular files are memory-mapped. Other streams (e.g. pipes) are read in
+    full.
+    """
+
+    if isinstance(fhandle, str):
+        with open(fhandle, 'rb') as binfile:
+            return load(binfile)
+
+    try:
+        data = mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, ValueError, EnvironmentError,
+            io.UnsupportedOperation):
+        data = getattr(fhandle, 'buffer', fhandle).read()
+    if not _py2:  # slices of mmap objects are copies on Python 2
+        data = memoryview(data)
+
+    if len(data) < _header.size:
+        raise BinaryFormatError('file is too short')
+
+    magic, version, _, n_atoms, n_columns = _header.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise BinaryFormatError('not a binary structure file')
+    if version != VERSION:
+        emsg = 'unsupported format version: {}'
+        raise BinaryFormatError(emsg.format(version))
+
+    columns, tables = {}, {}
+    lines, line_pos, models = [], array('I'), None
+    for i in range(n_columns):
+        name, typecode, count, offset, nbytes = _entry.unpack_from(
+            data, _header.size + i * _entry.size
+        )
+        name = name.rstrip(b'\0').decode('ascii')
+        typecode = typecode.decode('ascii')
+
+        if offset + nbytes > len(data):
+            emsg = 'column \'{}\' extends past the end of the file'
+            raise BinaryFormatError(emsg.format(name))
+
+        if typecode == 's':
+            strings = _split_strings(data[offset:offset + nbytes], count)
+            if name == 'lines.str':
+                lines = strings
+            else:
+                tables[name[:-4]] = strings
+        elif name == 'lines.pos':
+            line_pos = _view(data, typecode, offset, count)
+        elif name == 'models':
+            models = _view(data, typecode, offset, count)
+        else:
+            columns[name] = _view(data, typecode, offset, count)
+
+    return BinaryStructure(n_atoms, columns, tables, lines, line_pos, models)
+
+
+def sniff(fhandle):
+    """Returns a BinaryStructure if `fhandle` holds one, else `fhandle`.
+
+    Looks at the first bytes of the stream without consuming them, so text
+    files are read as usual afterwards.
+    """
+
+    peek = getattr(getattr(fhandle, 'buffer', fhandle), 'peek', None)
+    try:
+        if peek is not None:
+            head = peek(len(MAGIC))[:len(MAGIC)]
+        else:  # Python 2 files
+            position = fhandle.tell()
+            head = fhandle.read(len(MAGIC))
+            fhandle.seek(position)
+    except (AttributeError, IOError, ValueError):
+        return fhandle
+
+    if head != MAGIC:
+        return fhandle
+    return load(fhandle)
+
+
+def write_output(structure, fhandle=None):
+    """Writes a structure to a (text) output stream, or to stdout.
+    """
+    if fhandle is None:
+        with open_output() as output:
+            structure.dump(output)
+        return
+
+    fhandle.flush()
+    fhandle = getattr(fhandle, 'buffer', fhandle)
+    structure.dump(fhandle)
+    fhandle.flush()
@@ -0,0 +1,589 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Download backends and local cache for structure files.
+
+A backend knows how to open a file by name (e.g. '1brs.pdb.gz'). Two are
+available: HTTPBackend, which downloads from a web server (the RCSB PDB by
+default), and MirrorBackend, which reads from a local directory. The backend
+used by default can be changed with the PDBTOOLS_FETCH_URL environment
+variable, which accepts either a URL or a path to a directory.
+
+StructureCache keeps downloaded files on disk, under PDBTOOLS_CACHE. Files are
+stored by the SHA-256 of their contents, and an index maps file names to
+contents. When the cache grows above its size limit, the least recently used
+entries are removed. Entries older than a maximum age are revalidated with the
+server (ETag/Last-Modified) before being used, unless working offline.
+
+Environment variables:
+    PDBTOOLS_FETCH_URL      URL or directory to fetch files from.
+    PDBTOOLS_CACHE          Cache directory. No caching if not set.
+    PDBTOOLS_CACHE_SIZE     Maximum size of the cache in MB (default 1024).
+    PDBTOOLS_CACHE_MAXAGE   Seconds before an entry is revalidated (default 86400).
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+# Python 3 vs Python 2
+if sys.version_info[0] < 3:
+    import httplib as http_client
+    from urlparse import urljoin, urlsplit
+else:
+    import http.client as http_client
+    from urllib.parse import urljoin, urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+DEFAULT_URL = 'https://files.rcsb.org/download/'
+CHUNK_SIZE = 1024 * 1024
+
+
+class FetchError(Exception):
+    """Raised when a file cannot be retrieved.
+
+    `code` is the HTTP status code, or None for other errors.
+    """
+
+    def __init__(self, code, msg):
+        super(FetchError, self).__init__(code, msg)
+        self.code = code
+        self.msg = msg
+
+
+class Response(object):
+    """Result of opening a file through a backend.
+
+    `stream` is a binary file-like object, or None if the file was not
+    modified since the version identified by the etag/last-modified values
+    sent with the request.
+    """
+
+    def __init__(self, stream, etag=None, last_modified=None):
+        self.stream = stream
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def not_modified(self):
+        return self.stream is None
+
+
+class HTTPBackend(object):
+    """Downloads files from a web server.
+
+    Connections are kept open and reused by later requests from the same
+    thread (HTTP keep-alive), so each thread pays for the connection and TLS
+    handshake only once. A response must be read to the end (or closed)
+    before the next request is made from the same thread.
+    """
+
+    def __init__(self, base_url=DEFAULT_URL, timeout=60):
+        if not base_url.endswith('/'):
+            base_url += '/'
+        self.base_url = base_url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, scheme, netloc):
+        pool = self._local.__dict__.setdefault('pool', {})
+        conn = pool.get((scheme, netloc))
+        if conn is None:
+            if scheme == 'https':
+                conn = http_client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                conn = http_client.HTTPConnection(netloc, timeout=self.timeout)
+            pool[(scheme, netloc)] = conn
+        return conn
+
+    def _drop(self, scheme, netloc):
+        pool = self._local.__dict__.setdefault('pool', {})
+        conn = pool.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _request(self, url, headers):
+        """Sends a GET request, reconnecting once if the connection dropped."""
+
+        parts = urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        for attempt in (1, 2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path, headers=headers)
+                return conn.getresponse()
+            except (http_client.HTTPException, socket.error) as e:
+                # Server closed an idle connection, or a previous response
+                # was not read to the end: start over on a new one.
+                self._drop(parts.scheme, parts.netloc)
+                if attempt == 2:
+                    raise FetchError(None, str(e) or e.__class__.__name__)
+
+    def open(self, name, etag=None, last_modified=None):
+        headers = {'Accept-Encoding': 'identity'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        url = self.base_url + name
+        for _ in range(5):  # follow a few redirects
+            response = self._request(url, headers)
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                response.read()
+                url = urljoin(url, location)
+                continue
+            break
+
+        if response.status == 304:
+            response.read()
+            return Response(None, etag, last_modified)
+        elif response.status != 200:
+            response.read()
+            raise FetchError(response.status, response.reason)
+
+        return Response(response, response.getheader('ETag'),
+                        response.getheader('Last-Modified'))
+
+
+class MirrorBackend(object):
+    """Reads files from a local directory, e.g. a mirror of the archive.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def open(self, name, etag=None, last_modified=None):
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            raise FetchError(404, 'Not Found')
+
+        # Mimic an ETag from the file metadata
+        tag = '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+        if etag == tag:
+            return Response(None, tag)
+        return Response(open(path, 'rb'), tag)
+
+
+def get_backend(location=None):
+    """Returns a backend for a URL or directory.
+
+    Defaults to PDBTOOLS_FETCH_URL or, if not set, to the RCSB PDB.
+    """
+
+    if location is None:
+        location = os.environ.get('PDBTOOLS_FETCH_URL', DEFAULT_URL)
+
+    if location.startswith(('http://', 'https://')):
+        return HTTPBackend(location)
+    return MirrorBackend(location)
+
+
+class StructureCache(object):
+    """Content-addressed on-disk cache with LRU eviction.
+
+    The index maps each file name to the digest of its contents, plus the
+    metadata needed for revalidation. It is written atomically, so concurrent
+    readers never see a partial index, and changes are made under a lock file
+    after reading it again, so that processes sharing the cache do not undo
+    each other's changes. The modification time of each object records when
+    it was last used: cache hits do not rewrite the index.
+    """
+
+    def __init__(self, directory, max_size=1024 * 1024 * 1024, max_age=86400):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+        self._objects = os.path.join(directory, 'objects')
+        self._index_path = os.path.join(directory, 'index.json')
+        self._lock_path = os.path.join(directory, 'index.lock')
+        self._lock = threading.Lock()
+        self._index = {}
+        self._index_stat = None
+
+        if not os.path.isdir(self._objects):
+            os.makedirs(self._objects)
+        self._reload()
+
+    def _object_path(self, digest):
+        return os.path.join(self._objects, digest)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Holds the lock of the cache, for other threads and processes."""
+        with self._lock:
+            if fcntl is None:  # Windows, lock threads only
+                yield
+                return
+            with open(self._lock_path, 'a') as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _reload(self):
+        """Reads the index again if it changed on disk."""
+        try:
+            stat = os.stat(self._index_path)
+            stat = (stat.st_ino, stat.st_size, stat.st_mtime)
+        except OSError:
+            stat = None
+        if stat is None or stat == self._index_stat:
+            return
+
+        try:
+            with open(self._index_path) as handle:
+                self._index = json.load(handle)
+        except (IOError, OSError, ValueError):
+            self._index = {}
+        self._index_stat = stat
+
+    def _save(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(self._index, handle)
+        if hasattr(os, 'replace'):
+            os.replace(tmp_path, self._index_path)
+        else:  # Python 2
+            os.rename(tmp_path, self._index_path)
+
+        stat = os.stat(self._index_path)
+        self._index_stat = (stat.st_ino, stat.st_size, stat.st_mtime)
+
+    def _lookup(self, name):
+        """Returns the index entry for name if its object exists."""
+        entry = self._index.get(name)
+        if entry and os.path.isfile(self._object_path(entry['digest'])):
+            return entry
+        return None
+
+    def _touch(self, name, checked=False):
+        """Marks an entry as used (and revalidated) and returns its path."""
+        if checked:
+            with self._locked():
+                self._reload()
+                entry = self._index.get(name)
+                if entry is not None:
+                    entry['checked'] = time.time()
+                    self._save()
+        else:
+            with self._lock:
+                entry = self._index.get(name)
+
+        if entry is None:  # evicted meanwhile
+            raise FetchError(None, 'Removed from cache')
+        path = self._object_path(entry['digest'])
+        try:
+            os.utime(path, None)
+        except OSError:
+            raise FetchError(None, 'Removed from cache')
+        return path
+
+    def _store(self, name, response):
+        """Saves a response to the cache and returns the path of the object."""
+
+        stream = _CachingStream(self, name, response)
+        try:
+            while stream.read(CHUNK_SIZE):
+                pass
+        finally:
+            stream.close()
+        return stream.path
+
+    def _commit(self, name, tmp_path, digest, size, response):
+        """Adds a downloaded file to the cache and returns its path."""
+
+        path = self._object_path(digest)
+        with self._locked():
+            if os.path.isfile(path):  # same contents already stored
+                os.remove(tmp_path)
+                os.utime(path, None)
+            else:
+                os.rename(tmp_path, path)
+
+            self._reload()
+            self._index[name] = {
+                'digest': digest,
+                'size': size,
+                'etag': response.etag,
+                'last_modified': response.last_modified,
+                'checked': time.time(),
+            }
+            self._evict(keep=digest)
+            self._save()
+
+        return path
+
+    def _evict(self, keep=None):
+        """Removes unreferenced objects, then the least recently used entries
+        until under the size limit.
+        """
+
+        objects = {}  # digest: (last used, size)
+        for digest in os.listdir(self._objects):
+            if len(digest) != 64:  # downloads in progress
+                continue
+            try:
+                stat = os.stat(self._object_path(digest))
+            except OSError:
+                continue
+            objects[digest] = (stat.st_mtime, stat.st_size)
+
+        names = {}  # digest: [names]
+        for name, entry in list(self._index.items()):
+            if entry['digest'] in objects:
+                names.setdefault(entry['digest'], []).append(name)
+            else:
+                del self._index[name]
+
+        total = 0
+        for digest, (_, size) in objects.items():
+            if digest in names:
+                total += size
+            else:
+                self._remove(digest)
+
+        lru = sorted(names, key=lambda digest: (objects[digest], digest))
+        for digest in lru:
+            if total <= self.max_size:
+                break
+            if digest == keep:
+                continue
+
+            for name in names[digest]:
+                del self._index[name]
+            self._remove(digest)
+            total -= objects[digest][1]
+
+    def _remove(self, digest):
+        """Deletes an object file."""
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+
+    def _resolve(self, name, backend, offline):
+        """Returns (path, None) if the cached copy can be used, or
+        (None, response) if a new version must be downloaded.
+        """
+
+        with self._lock:
+            self._reload()
+            entry = self._lookup(name)
+
+        if entry is None:
+            if offline:
+                raise FetchError(None, 'Not in cache (offline mode)')
+            return (None, backend.open(name))
+
+        fresh = (time.time() - entry['checked']) < self.max_age
+        if offline or fresh:
+            return (self._touch(name), None)
+
+        try:
+            response = backend.open(name, entry['etag'], entry['last_modified'])
+        except FetchError as e:
+            if e.code is None:  # network down, use what we have
+                return (self._touch(name), None)
+            raise
+
+        if response.not_modified:
+            return (self._touch(name, checked=True), None)
+        return (None, response)
+
+    def get(self, name, backend, offline=False):
+        """Returns the path to a cached copy of `name`, fetching if needed.
+
+        Raises FetchError if the file cannot be retrieved.
+        """
+
+        path, response = self._resolve(name, backend, offline)
+        if response is not None:
+            path = self._store(name, response)
+        return path
+
+    def open(self, name, backend, offline=False):
+        """Returns a binary stream with the contents of `name`.
+
+        New downloads are saved to the cache while they are read, so data is
+        available to the caller as soon as it arrives. The file is added to
+        the cache only if the stream is read to the end.
+
+        Raises FetchError if the file cannot be retrieved.
+        """
+
+        path, response = self._resolve(name, backend, offline)
+        if response is None:
+            try:
+                return open(path, 'rb')
+            except (IOError, OSError):  # evicted by another process
+                if offline:
+                    raise FetchError(None, 'Removed from cache')
+                response = backend.open(name)
+        return _CachingStream(self, name, response)
+
+    def clear(self):
+        """Removes all entries from the cache.
+        """
+        with self._locked():
+            self._index = {}
+            shutil.rmtree(self._objects, ignore_errors=True)
+            os.makedirs(self._objects)
+            self._save()
+
+
+class _CachingStream(object):
+    """Reads from a response and writes a copy to the cache as it goes.
+    """
+
+    def __init__(self, cache, name, response):
+        self.cache = cache
+        self.name = name
+        self.response = response
+        self.path = None  # set once the file is in the cache
+
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache._objects)
+        self._copy = os.fdopen(fd, 'wb')
+        self._sha = hashlib.sha256()
+        self._size = 0
+
+    def read(self, size=-1):
+        try:
+            chunk = self.response.stream.read(size)
+        except Exception:
+            self.close()
+            raise
+
+        if chunk:
+            self._sha.update(chunk)
+            self._copy.write(chunk)
+            self._size += len(chunk)
+        elif self._copy is not None and size != 0:  # EOF
+            self._copy.close()
+            self._copy = None
+            self.path = self.cache._commit(self.name, self._tmp_path,
+                                           self._sha.hexdigest(), self._size,
+                                           self.response)
+        return chunk
+
+    def close(self):
+        if self._copy is not None:  # incomplete, discard
+            self._copy.close()
+            self._copy = None
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+        self.response.stream.close()
+
+
+def _at_eof(decomp):
+    """Returns True if a zlib decompressor has seen the end of its stream.
+    """
+    eof = getattr(decomp, 'eof', None)
+    if eof is not None:
+        return eof
+
+    # Python 2: data past the end of the stream is left in unused_data
+    try:
+        decomp.decompress(b'\0')
+    except zlib.error:
+        return False
+    return bool(decomp.unused_data)
+
+
+def iter_gunzip(stream, chunk_size=64 * 1024):
+    """Decompresses a gzip stream incrementally.
+
+    Yields decompressed chunks as soon as compressed data is read from
+    `stream`, so memory use is bounded by the chunk size and not by the size
+    of the file. Raises IOError if the data is truncated.
+    """
+
+    def _read():
+        try:
+            return stream.read(chunk_size)
+        except http_client.HTTPException as e:  # e.g. IncompleteRead
+            raise IOError(str(e) or e.__class__.__name__)
+
+    decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)  # expect gzip header
+    for chunk in iter(_read, b''):
+        data = decomp.decompress(chunk)
+        while decomp.unused_data:  # concatenated gzip members
+            leftover = decomp.unused_data
+            decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data += decomp.decompress(leftover)
+        if data:
+            yield data
+
+    complete = _at_eof(decomp)
+    data = decomp.flush()
+    if data:
+        yield data
+
+    if not complete:
+        raise IOError('Compressed data ended before the end of the stream')
+
+
+def iter_gunzip_lines(stream, chunk_size=64 * 1024):
+    """Yields the lines (bytes, with newline) of a gzip stream as they arrive.
+    """
+
+    pending = b''
+    for data in iter_gunzip(stream, chunk_size):
+        lines = (pending + data).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + b'\n'
+
+    if pending:
+        yield pending
+
+
+def get_cache():
+    """Returns the cache configured in the environment, or None.
+    """
+
+    directory = os.environ.get('PDBTOOLS_CACHE')
+    if not directory:
+        return None
+
+    max_size = int(os.environ.get('PDBTOOLS_CACHE_SIZE', 1024)) * 1024 * 1024
+    max_age = int(os.environ.get('PDBTOOLS_CACHE_MAXAGE', 86400))
+    return StructureCache(directory, max_size, max_age)
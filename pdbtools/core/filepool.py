@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of output files for the tools that split a structure into many files.
+
+Lines are written to their file as they are read, so memory does not grow with
+the size of the input, and only a bounded number of files is kept open at any
+time, so that we stay well below the limit of open file descriptors.
+"""
+
+import io
+import os
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from pdbtools.core.streams import OutputSink, temp_path
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+MAX_OPEN = 256  # upper limit to the default size of the pool
+
+_replace = getattr(os, 'replace', os.rename)  # Python 2: no os.replace
+
+
+def default_max_open():
+    """Returns how many output files to keep open, based on the ulimit.
+    """
+
+    if resource is None:
+        return 64
+
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ValueError, OSError):
+        return 64
+
+    if soft == resource.RLIM_INFINITY:
+        return MAX_OPEN
+    return max(1, min(MAX_OPEN, soft // 2))  # leave room for everything else
+
+
+def output_prefix(fhandle, default='output'):
+    """Returns the root of the output file names for an input file handle.
+
+    Streams without a file name (e.g. stdin) use `default`.
+    """
+
+    name = getattr(fhandle, 'name', None)
+    if not isinstance(name, str) or name.startswith('<'):
+        return default
+
+    root, ext = os.path.splitext(os.path.basename(name))
+    if ext.lower() in ('.gz', '.bz2', '.xz'):
+        root, ext = os.path.splitext(root)
+    return root
+
+
+class FilePool(object):
+    """Set of output files, at most `max_open` of them open at a time.
+
+    Files are created (or truncated) the first time they are requested. When
+    the pool is full, the least recently used file is closed, to be reopened
+    in append mode if it is needed again. With `compress` ('gzip', 'bzip2' or
+    'xz', or True for gzip), reopened files add a new compressed stream, which
+    all readers handle transparently.
+
+    Files are written through an OutputSink, to temporary files that are only
+    renamed when the pool is closed, or removed if the pool is left after an
+    error.
+    """
+
+    def __init__(self, max_open=None, compress=False):
+        self.max_open = max_open or default_max_open()
+        if compress is True:
+            compress = 'gzip'
+        self.compress = compress or None
+        self._open = OrderedDict()  # path: OutputSink, in LRU order
+        self._created = set()
+        self._pending = set()  # paths not renamed yet
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.close(commit=exc_type is None)
+
+    def get(self, path):
+        """Returns an open handle to the file at `path`.
+
+        The handle is valid until the next call to get() or close().
+        """
+
+        fhandle = self._open.pop(path, None)
+        if fhandle is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close(commit=False)
+
+            fhandle = OutputSink(path, self.compress,
+                                 append=path in self._pending,
+                                 buffer_size=io.DEFAULT_BUFFER_SIZE)
+            self._created.add(path)
+            self._pending.add(path)
+
+        self._open[path] = fhandle  # most recently used
+        return fhandle
+
+    @property
+    def paths(self):
+        """Paths of all files written so far.
+        """
+        return sorted(self._created)
+
+    def close(self, commit=True):
+        """Closes all open files, and renames them to their final paths.
+
+        With commit=False, the files written so far are removed instead.
+        """
+
+        while self._open:
+            _, fhandle = self._open.popitem()
+            fhandle.close(commit=False)
+
+        while self._pending:
+            path = self._pending.pop()
+            if commit:
+                _replace(temp_path(path), path)
+            else:
+                os.remove(temp_path(path))
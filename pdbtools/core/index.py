@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Byte-offset indexes for PDB files.
+
+An index is a small JSON sidecar, next to the PDB file and with the same name
+plus SUFFIX, that records where models, chains and residues start and end in
+the file. Tools that select models, chains or residues use it to read only the
+bytes they need, instead of parsing the whole file.
+
+The index holds (all offsets are in bytes, `end` is exclusive):
+
+    size, mtime, sha256   of the PDB file, to detect stale indexes.
+    models     [number, start, end] for each MODEL ... ENDMDL block.
+    chains     [chain, start, end] for each run of consecutive coordinate
+               records (ATOM, HETATM, TER, ANISOU) with the same chain.
+    residues   [key, start, end] for each run of consecutive coordinate
+               records with the same key: chain, residue number and
+               insertion code (columns 22-27).
+
+An index is only used if the file has the same size and modification time as
+when it was indexed or, failing that, the same checksum.
+
+The json and hashlib modules are only imported when an index is read or built,
+to keep the startup of tools that look for an index short.
+"""
+
+import os
+
+from pdbtools.core.streams import write_lines
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+SUFFIX = '.pdbidx'
+VERSION = 1
+
+RECORDS = (b'ATOM', b'HETATM', b'TER', b'ANISOU')
+
+
+def index_path(path):
+    """Returns the path of the index of a PDB file.
+    """
+    return path + SUFFIX
+
+
+def _checksum(path):
+    """Returns the SHA-256 of the contents of a file.
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_index(path):
+    """Reads a PDB file once and returns its index, as a dictionary.
+    """
+
+    import hashlib
+    digest = hashlib.sha256()
+    models, chains, residues = [], [], []
+
+    model = chain = residue = None  # open [key, start, end] entries
+    pos = 0
+    with open(path, 'rb') as fh:
+        for line in fh:
+            digest.update(line)
+            end = pos + len(line)
+
+            if line.startswith(RECORDS):
+                fields = line.rstrip(b'\r\n')
+                chain_id = fields[21:22].decode('latin-1')
+                res_id = fields[21:27].decode('latin-1')
+
+                if chain is not None and chain[0] == chain_id:
+                    chain[2] = end
+                else:
+                    chain = [chain_id, pos, end]
+                    chains.append(chain)
+
+                if residue is not None and residue[0] == res_id:
+                    residue[2] = end
+                else:
+                    residue = [res_id, pos, end]
+                    residues.append(residue)
+
+            else:
+                chain = residue = None  # other records break runs
+
+                if line.startswith(b'MODEL '):
+                    try:  # large ensembles overflow columns 11-14
+                        number = int(line[6:].split()[0])
+                    except (ValueError, IndexError):
+                        number = len(models) + 1
+                    model = [number, pos, end]
+                    models.append(model)
+                elif line.startswith(b'ENDMDL') and model is not None:
+                    model[2] = end
+                    model = None
+
+            if model is not None:
+                model[2] = end
+            pos = end
+
+    stat = os.stat(path)
+    return {
+        'version': VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': digest.hexdigest(),
+        'models': models,
+        'chains': chains,
+        'residues': residues,
+    }
+
+
+def write_index(path, index=None):
+    """Builds (unless given) and writes the index of a PDB file.
+
+    Returns the index.
+    """
+
+    import json
+    if index is None:
+        index = build_index(path)
+
+    # Written to a temporary file first: never leave a partial index
+    write_lines([json.dumps(index, separators=(',', ':'))], index_path(path))
+    return index
+
+
+def read_index(path):
+    """Returns the index of a PDB file, or None if it is missing or stale.
+    """
+
+    idx_path = index_path(path)
+    if not os.path.isfile(idx_path):
+        return None
+
+    import json
+
+    try:
+        with open(idx_path) as fh:
+            index = json.load(fh)
+    except ValueError:  # corrupt
+        return None
+
+    if index.get('version') != VERSION:
+        return None
+
+    stat = os.stat(path)
+    if stat.st_size != index['size']:
+        return None
+    if stat.st_mtime != index['mtime'] and _checksum(path) != index['sha256']:
+        return None
+    return index
+
+
+def find_index(fhandle):
+    """Returns the index of an open PDB file, or None.
+
+    Streams that are not regular files (e.g. stdin), or are decompressed as
+    they are read, have no index.
+    """
+    if getattr(fhandle, 'compression', None) is not None:
+        return None
+    path = getattr(fhandle, 'name', None)
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return None
+    return read_index(path)
+
+
+def complement(ranges, size):
+    """Returns the byte ranges of [0, size) not covered by sorted `ranges`.
+    """
+    result = []
+    pos = 0
+    for start, end in ranges:
+        if start > pos:
+            result.append((pos, start))
+        pos = max(pos, end)
+    if pos < size:
+        result.append((pos, size))
+    return result
+
+
+def iter_ranges(path, ranges, binary=False):
+    """Yields the lines of a file within the given, sorted, byte ranges.
+
+    Line endings are normalized to '\\n', as when reading in text mode. Lines
+    are decoded, unless `binary` is set.
+    """
+
+    with open(path, 'rb') as fh:
+        for start, end in ranges:
+            fh.seek(start)
+            pos = start
+            while pos < end:
+                line = fh.readline()
+                if not line:
+                    break
+                pos += len(line)
+                if line.endswith(b'\r\n'):
+                    line = line[:-2] + b'\n'
+                if not binary:
+                    line = line.decode('utf-8')
+                yield line
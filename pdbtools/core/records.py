@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar storage for ATOM/HETATM records.
+
+Parses the fixed columns of each coordinate record exactly once and keeps
+them in compact, array-backed columns. Text fields are stored verbatim, with
+their original width (e.g. ' CA '), so they can be compared directly to the
+slices the tools already use. Numerical fields are stored in `array.array`
+columns and exposed as NumPy arrays, without copying, if NumPy is installed.
+
+Records are written back using the fixed-column PDB format. A record that was
+not modified is written exactly as it was read.
+"""
+
+from array import array
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+_numpy = []  # the numpy module (or None), once imported
+
+
+def get_numpy():
+    """Returns the numpy module, or None if it is not installed.
+
+    NumPy is optional, and only imported when first needed: importing it
+    takes longer than most tools take to run on a small file.
+    """
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
+
+
+RECORDS = ('ATOM', 'HETATM')
+
+# Text columns: name: (start, end)
+TEXT_FIELDS = (
+    ('record', 0, 6),
+    ('name', 12, 16),
+    ('altloc', 16, 17),
+    ('resname', 17, 20),
+    ('chain', 21, 22),
+    ('icode', 26, 27),
+    ('segid', 72, 76),
+    ('element', 76, 78),
+    ('charge', 78, 80),
+)
+
+# Numerical columns: name: (start, end, array typecode)
+NUMERIC_FIELDS = (
+    ('serial', 6, 11, 'l'),
+    ('resseq', 22, 26, 'l'),
+    ('x', 30, 38, 'd'),
+    ('y', 38, 46, 'd'),
+    ('z', 46, 54, 'd'),
+    ('occ', 54, 60, 'd'),
+    ('b', 60, 66, 'd'),
+)
+
+FIELDS = tuple(f[0] for f in TEXT_FIELDS) + tuple(f[0] for f in NUMERIC_FIELDS)
+
+_fmt_record = (
+    "{0:<6s}{1:>5d} {2:<4s}{3:1s}{4:<3s} {5:1s}{6:>4d}{7:1s}   "
+    "{8:>8.3f}{9:>8.3f}{10:>8.3f}{11:>6s}{12:>6s}      "
+    "{13:<4s}{14:>2s}{15:<2s}"
+)
+
+_nan = float('nan')
+
+
+def _to_float(value):
+    """Parses a float column, blank columns become NaN.
+    """
+    value = value.strip()
+    if value:
+        return float(value)
+    return _nan
+
+
+class RecordError(ValueError):
+    """Raised when a numerical field of an ATOM/HETATM record is invalid.
+
+    `field` is the name of the field (see FIELDS), `line` the record and
+    `lineno` its line number in the file, if known.
+    """
+
+    def __init__(self, field, line, lineno=None):
+        emsg = 'invalid {0} field in record'.format(field)
+        if lineno is not None:
+            emsg += ' on line {0}'.format(lineno)
+        emsg += ': \'{0}\''.format(line)
+        super(RecordError, self).__init__(emsg)
+        self.field = field
+        self.line = line
+        self.lineno = lineno
+
+
+def _bad_field(line):
+    """Returns the name of the first numerical field of `line` that does not
+    parse.
+    """
+    for name, start, end, typecode in NUMERIC_FIELDS:
+        parse = int if typecode == 'l' else float
+        if name in ('occ', 'b'):
+            parse = _to_float
+        try:
+            parse(line[start:end])
+        except ValueError:
+            return name
+    return None
+
+
+def format_atom(record, serial, name, altloc, resname, chain, resseq, icode,
+                x, y, z, occ, b, segid, element, charge, width=80):
+    """Returns a PDB line (with newline) from the values of its fields.
+
+    Text fields are written as given. NaN occupancies and b-factors are
+    written as blanks. The line is cut to `width` characters.
+    """
+    line = _fmt_record.format(
+        record, serial, name, altloc, resname, chain, resseq, icode, x, y, z,
+        '' if occ != occ else '{:6.2f}'.format(occ),  # NaN: blank
+        '' if b != b else '{:6.2f}'.format(b),
+        segid, element, charge,
+    )
+    return line[:width] + '\n'
+
+
+class AtomRecords(object):
+    """Column store for ATOM/HETATM records.
+
+    Each field in FIELDS is an attribute holding one column: a list of
+    strings for text fields, an array.array for numerical ones.
+    """
+
+    def __init__(self, lines=None):
+        for name, _, _ in TEXT_FIELDS:
+            setattr(self, name, [])
+        for name, _, _, typecode in NUMERIC_FIELDS:
+            setattr(self, name, array(typecode))
+        self.width = array('H')  # original line length (w/o newline)
+
+        if lines is not None:
+            for line in lines:
+                self.append(line)
+
+    def __len__(self):
+        return len(self.width)
+
+    def __iter__(self):
+        """Yields the records formatted as PDB lines.
+        """
+        for idx in range(len(self)):
+            yield self.format_record(idx)
+
+    def append(self, line):
+        """Parses one ATOM/HETATM line and adds it to the columns.
+
+        Raises RecordError, and leaves the columns unchanged, if a numerical
+        field cannot be parsed. Blank occupancies and b-factors are NaN.
+        """
+        line = line.rstrip('\r\n')
+        padded = line.ljust(80)
+
+        try:
+            serial = int(padded[6:11])
+            resseq = int(padded[22:26])
+            x = float(padded[30:38])
+            y = float(padded[38:46])
+            z = float(padded[46:54])
+            occ = _to_float(padded[54:60])
+            b = _to_float(padded[60:66])
+        except ValueError:
+            raise RecordError(_bad_field(padded), line)
+
+        self.record.append(padded[0:6])
+        self.name.append(padded[12:16])
+        self.altloc.append(padded[16])
+        self.resname.append(padded[17:20])
+        self.chain.append(padded[21])
+        self.icode.append(padded[26])
+        self.segid.append(padded[72:76])
+        self.element.append(padded[76:78])
+        self.charge.append(padded[78:80])
+
+        self.serial.append(serial)
+        self.resseq.append(resseq)
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.occ.append(occ)
+        self.b.append(b)
+
+        self.width.append(min(len(line), 80))
+
+    def format_record(self, idx):
+        """Returns the PDB line (with newline) for the record at `idx`.
+        """
+        return format_atom(
+            self.record[idx], self.serial[idx], self.name[idx],
+            self.altloc[idx], self.resname[idx], self.chain[idx],
+            self.resseq[idx], self.icode[idx],
+            self.x[idx], self.y[idx], self.z[idx], self.occ[idx], self.b[idx],
+            self.segid[idx], self.element[idx], self.charge[idx],
+            self.width[idx],
+        )
+
+    def take(self, indices):
+        """Returns a new AtomRecords with the records at `indices`, in order.
+        """
+        indices = list(indices)
+        new = AtomRecords()
+        for name in FIELDS + ('width',):
+            column = getattr(self, name)
+            values = [column[i] for i in indices]
+            if isinstance(column, array):
+                setattr(new, name, array(column.typecode, values))
+            else:
+                setattr(new, name, values)
+        return new
+
+    def column(self, name):
+        """Returns a numerical column as a NumPy array (no copy) or as is.
+        """
+        values = getattr(self, name)
+        numpy = get_numpy()
+        if numpy is not None and isinstance(values, array):
+            return numpy.frombuffer(values, dtype=values.typecode)
+        return values
+
+    def coordinates(self):
+        """Returns the coordinates as a (N, 3) NumPy array or list of tuples.
+        """
+        numpy = get_numpy()
+        if numpy is not None:
+            return numpy.column_stack(
+                (self.column('x'), self.column('y'), self.column('z'))
+            )
+        return list(zip(self.x, self.y, self.z))
+
+
+def read_records(fhandle):
+    """Parses all ATOM/HETATM records of a file into an AtomRecords object.
+
+    Other records are ignored.
+    """
+    return AtomRecords(line for line in fhandle if line.startswith(RECORDS))
+
+
+def iter_blocks(fhandle):
+    """Groups consecutive ATOM/HETATM records of a file.
+
+    Yields AtomRecords objects for each uninterrupted run of coordinate
+    records and the remaining lines unchanged, in file order.
+    """
+    block = None
+    for line in fhandle:
+        if line.startswith(RECORDS):
+            if block is None:
+                block = AtomRecords()
+            block.append(line)
+            continue
+
+        if block is not None:
+            yield block
+            block = None
+        yield line
+
+    if block is not None:
+        yield block
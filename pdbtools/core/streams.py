@@ -0,0 +1,553 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Input streams shared by all tools.
+
+open_input() opens a PDB (or mmCIF) file, or stdin, for reading as text. Files
+compressed with gzip, bzip2 or xz are recognized by their first bytes, not by
+their name, and decompressed as they are read, in the same process:
+
+    fh = open_input('1ctf.pdb.gz')
+    for line in fh:
+        ...
+
+Uncompressed files are opened exactly as with open(path, 'r'). The compression
+modules are only imported when compressed data is read or written. Python 2
+has no lzma module, and reads and writes only gzip and bzip2.
+
+Pure filters read and write bytes instead, to skip decoding and encoding every
+line: they open their input with open_input(path, binary=True) and run the same
+generator on str or bytes lines.
+
+All tools write their output through an OutputSink, usually with write_lines():
+
+    write_lines(select_chain(fh, set(['A'])))
+
+The sink buffers and, optionally, compresses the output, writes files
+atomically, and ends the output quietly when the reader of a pipe goes away.
+"""
+
+import errno
+import io
+import itertools
+import os
+import sys
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+BUFFER_SIZE = 1 << 20  # bytes read or written at a time
+CHUNK_LINES = 5000  # lines joined and encoded at a time
+
+# First bytes of compressed streams: compression
+MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bzip2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+MAGIC_SIZE = max(len(m) for m, _ in MAGIC)
+
+_text_type = type(u'')
+_replace = getattr(os, 'replace', os.rename)  # Python 2: no os.replace
+
+
+def detect_compression(head):
+    """Returns the compression of a stream from its first bytes, or None.
+    """
+    for magic, compression in MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def file_compression(path):
+    """Returns the compression of a file, or None.
+    """
+    with open(path, 'rb') as fh:
+        return detect_compression(fh.read(MAGIC_SIZE))
+
+
+def _lzma():
+    """Returns the lzma module, or exits with an error if it is missing.
+    """
+    try:
+        import lzma
+    except ImportError:  # Python 2
+        emsg = 'ERROR!! Reading or writing xz-compressed data requires Python 3\n'
+        sys.stderr.write(emsg)
+        sys.exit(1)
+    return lzma
+
+
+def _new_decompressor(compression):
+    """Returns a function returning decompressor objects (Python 2).
+    """
+    if compression == 'gzip':
+        import zlib
+        return lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)
+    import bz2
+    return bz2.BZ2Decompressor
+
+
+class _StreamDecompressor(io.RawIOBase):
+    """Decompresses a binary stream as it is read, one chunk at a time.
+
+    Concatenated streams, as written by FilePool, are read one after the
+    other. Python 2 has no file object that does this on a stream: GzipFile
+    seeks in its input, and BZ2File only opens files by name.
+    """
+
+    def __init__(self, fileobj, compression):
+        self._fileobj = fileobj
+        self._new = _new_decompressor(compression)
+        self._decomp = self._new()
+        self._data = b''
+
+    def readable(self):
+        return True
+
+    def _decompress(self, chunk):
+        data = []
+        while chunk:
+            try:
+                data.append(self._decomp.decompress(chunk))
+            except EOFError:  # bz2: the previous stream ended with a chunk
+                self._decomp = self._new()
+                continue
+            chunk = self._decomp.unused_data
+            if chunk:  # start of the next stream
+                self._decomp = self._new()
+        return b''.join(data)
+
+    def readinto(self, buf):
+        while not self._data:
+            chunk = self._fileobj.read(BUFFER_SIZE)
+            if not chunk:
+                return 0
+            self._data = self._decompress(chunk)
+
+        size = min(len(buf), len(self._data))
+        buf[:size] = self._data[:size]
+        self._data = self._data[size:]
+        return size
+
+
+def _decompressor(fileobj, compression):
+    """Returns a binary file object decompressing `fileobj` as it is read.
+    """
+    if compression == 'xz':
+        return _lzma().LZMAFile(fileobj, mode='rb')
+    elif sys.version_info[0] < 3:
+        return _StreamDecompressor(fileobj, compression)
+    elif compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    import bz2
+    return bz2.BZ2File(fileobj, mode='rb')
+
+
+class DecompressedBytes(io.BufferedReader):
+    """Binary stream over a compressed file or stream.
+
+    Keeps the name of the underlying file, and has no file descriptor, so
+    that it is never memory-mapped or indexed by mistake.
+    """
+
+    def __init__(self, fileobj, compression, name):
+        super(DecompressedBytes, self).__init__(
+            _decompressor(fileobj, compression), buffer_size=BUFFER_SIZE)
+        self._name = name
+        self.compression = compression
+        self._source = fileobj  # closed with the stream
+
+    @property
+    def name(self):
+        return self._name
+
+    def fileno(self):
+        raise io.UnsupportedOperation('compressed stream has no fileno')
+
+    def close(self):
+        super(DecompressedBytes, self).close()
+        self._source.close()
+
+
+class DecompressedText(io.TextIOWrapper):
+    """Text stream over a compressed file or stream.
+    """
+
+    def __init__(self, fileobj, compression=None, name=None):
+        if not isinstance(fileobj, DecompressedBytes):
+            fileobj = DecompressedBytes(fileobj, compression, name)
+        super(DecompressedText, self).__init__(fileobj)
+
+    @property
+    def name(self):
+        return self.buffer.name
+
+    @property
+    def compression(self):
+        return self.buffer.compression
+
+    def fileno(self):
+        raise io.UnsupportedOperation('compressed stream has no fileno')
+
+
+def _has_cr(stream):
+    """Returns True if the buffered head of a binary stream has a '\\r'.
+
+    Lines ending in '\\r\\n' are only normalized when reading text.
+    """
+    try:
+        return b'\r' in stream.peek(BUFFER_SIZE)[:BUFFER_SIZE]
+    except (IOError, ValueError):
+        return False
+
+
+class StdinReader(object):
+    """Stands in for sys.stdin, decompressing it if needed.
+
+    Nothing is read from stdin until the data is first requested, so that
+    tools that end up not reading stdin never wait on it. With `binary`, lines
+    are read as bytes from sys.stdin.buffer.
+    """
+
+    def __init__(self, stream, binary=False):
+        self._stream = stream
+        self._binary = binary
+        self._reader = None
+
+    def _open(self):
+        if self._reader is None:
+            buffered = self._stream.buffer
+            try:
+                compression = detect_compression(buffered.peek(MAGIC_SIZE))
+            except (IOError, ValueError):
+                compression = None
+
+            if compression is not None:
+                buffered = DecompressedBytes(buffered, compression,
+                                             self._stream.name)
+
+            if self._binary and not _has_cr(buffered):
+                self._reader = buffered
+            elif compression is not None:
+                self._reader = DecompressedText(buffered)
+            else:
+                self._reader = self._stream
+        return self._reader
+
+    @property
+    def name(self):
+        return self._stream.name
+
+    def isatty(self):
+        return self._stream.isatty()
+
+    def close(self):
+        (self._reader or self._stream).close()
+
+    def __iter__(self):
+        return iter(self._open())
+
+    def __getattr__(self, attr):  # read, readline, buffer, fileno, ...
+        return getattr(self._open(), attr)
+
+
+def open_input(path=None, binary=False):
+    """Opens a file, or stdin if `path` is None, for reading.
+
+    Compressed data (gzip, bzip2, xz) is decompressed transparently. Stand-ins
+    for stdin that are not real streams (e.g. in tests) are returned as is.
+
+    With `binary`, lines are read as bytes, without decoding, unless the data
+    has Windows line endings: it is then read as text, so that they are
+    normalized to '\\n' as usual. Tools reading with `binary` must accept
+    both str and bytes lines (see peek_lines).
+    """
+
+    if path is None:
+        stream = sys.stdin
+        if not hasattr(getattr(stream, 'buffer', None), 'peek'):
+            return stream
+        return StdinReader(stream, binary)
+
+    compression = file_compression(path)
+    if compression is None:
+        if binary:
+            fhandle = io.open(path, 'rb')  # peekable on Python 2 too
+            if not _has_cr(fhandle):
+                return fhandle
+            fhandle.close()
+            return io.open(path, 'r')  # universal newlines on Python 2 too
+        return open(path, 'r')
+
+    fhandle = DecompressedBytes(open(path, 'rb'), compression, path)
+    if binary and not _has_cr(fhandle):
+        return fhandle
+    return DecompressedText(fhandle)
+
+
+def peek_lines(lines):
+    """Returns an iterator over `lines`, and whether they are bytes.
+
+    Generators that run on both text and bytes lines use this to encode their
+    constants (see as_bytes) once, instead of decoding every line.
+    """
+
+    lines = iter(lines)
+    for first in lines:
+        return itertools.chain((first,), lines), _is_bytes(first)
+    return lines, False
+
+
+def _is_bytes(value):
+    return isinstance(value, bytes) and not isinstance(value, str)  # Py 2
+
+
+def as_bytes(value):
+    """Encodes a str, or a tuple, list, set or frozenset of them, as ASCII.
+    """
+
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return type(value)(as_bytes(v) for v in value)
+    if _is_bytes(value):
+        return value
+    return value.encode('ascii')
+
+
+class _StreamCompressor(object):
+    """Compresses what is written to a binary stream (Python 2: bzip2).
+
+    Closing it writes the end of the compressed stream, but does not close
+    the underlying stream.
+    """
+
+    def __init__(self, fileobj, compressor):
+        self._fileobj = fileobj
+        self._compressor = compressor
+
+    def write(self, data):
+        self._fileobj.write(self._compressor.compress(data))
+
+    def flush(self):
+        pass  # compressed data is only complete when the stream is closed
+
+    def close(self):
+        if self._compressor is not None:
+            self._fileobj.write(self._compressor.flush())
+            self._compressor = None
+
+
+def _compressor(fileobj, compression):
+    """Returns a binary file object compressing what is written to `fileobj`.
+
+    Closing it does not close `fileobj`.
+    """
+    if compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(filename='', fileobj=fileobj, mode='wb',
+                             compresslevel=6)
+    elif compression == 'bzip2':
+        import bz2
+        if sys.version_info[0] < 3:
+            return _StreamCompressor(fileobj, bz2.BZ2Compressor())
+        return bz2.BZ2File(fileobj, mode='wb')
+    elif compression != 'xz':
+        raise ValueError('unknown compression: {}'.format(compression))
+    return _lzma().LZMAFile(fileobj, mode='wb')
+
+
+def temp_path(path):
+    """Returns the path an output file is written to before it is complete.
+    """
+    return path + '.tmp'
+
+
+def _silence_stdout():
+    """Points stdout to os.devnull, once the reader of the pipe went away.
+
+    Otherwise, Python fails to flush stdout on exit and prints an error.
+    """
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+    except (AttributeError, ValueError, IOError, OSError):
+        pass
+
+
+class OutputSink(object):
+    """Buffered output of a tool, to stdout or to a file.
+
+    Takes str and bytes alike. Lines are joined and encoded a chunk at a
+    time, and written to a BufferedWriter of `buffer_size` bytes, compressed
+    on the way with `compression` ('gzip', 'bzip2' or 'xz').
+
+    Files are written to temp_path(path) and only renamed to `path` when the
+    sink is closed, so that a partial file is never left behind. With
+    `append`, writing resumes on the temporary file left by an earlier
+    close(commit=False). Stand-ins for stdout without a file descriptor (e.g.
+    in tests) are written to as text.
+
+    As a context manager, the sink is closed on exit, or aborted after an
+    error, and a broken pipe on stdout ends the output quietly.
+    """
+
+    def __init__(self, path=None, compression=None, append=False,
+                 buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.compression = compression
+        self.closed = False
+        self._encoding = 'utf-8'
+        self._text = None  # text stand-in for stdout
+
+        if path is None:
+            stream = sys.stdout
+            stream.flush()  # keep what was written before in order
+            self._encoding = getattr(stream, 'encoding', None) or 'utf-8'
+            try:
+                raw = io.open(stream.fileno(), 'wb', buffering=buffer_size,
+                              closefd=False)
+            except (AttributeError, ValueError, IOError, OSError):
+                raw = getattr(stream, 'buffer', None)
+                if raw is None:
+                    self._text = stream
+        else:
+            mode = 'ab' if append else 'wb'
+            raw = io.open(temp_path(path), mode, buffering=buffer_size)
+
+        self._raw = raw
+        self._stream = raw
+        if compression is not None:
+            if raw is None:
+                raise IOError('cannot write compressed data to a text stream')
+            self._stream = _compressor(raw, compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.close()
+            else:
+                self.abort()
+        except (IOError, OSError) as error:
+            if not self._broken_pipe(error):
+                raise
+            return True
+        return exc_value is not None and self._broken_pipe(exc_value)
+
+    def _broken_pipe(self, error):
+        """Returns True if `error` is a broken pipe on stdout.
+
+        Stdout is then sent to os.devnull, so that nothing else fails.
+        """
+        if self.path is not None or not isinstance(error, (IOError, OSError)):
+            return False
+        if error.errno != errno.EPIPE:
+            return False
+        _silence_stdout()
+        return True
+
+    def write(self, data):
+        """Writes a str or a bytes-like object.
+        """
+        if self._text is not None:
+            if not isinstance(data, _text_type):
+                data = bytes(data).decode(self._encoding)
+            self._text.write(data)
+        else:
+            if isinstance(data, _text_type):
+                data = data.encode(self._encoding)
+            self._stream.write(data)
+
+    def writelines(self, lines):
+        """Writes an iterable of lines, all str or all bytes.
+        """
+        lines = iter(lines)
+        while True:
+            chunk = list(itertools.islice(lines, CHUNK_LINES))
+            if not chunk:
+                break
+            self.write(chunk[0][:0].join(chunk))
+
+    def flush(self):
+        if self._text is not None:
+            self._text.flush()
+            return
+        self._stream.flush()
+        if self._stream is not self._raw:
+            self._raw.flush()
+
+    def close(self, commit=True):
+        """Flushes the output and, for files, renames them to `path`.
+
+        With commit=False, the temporary file is kept as is.
+        """
+
+        if self.closed:
+            return
+        self.closed = True
+
+        if self._stream is not self._raw:
+            self._stream.close()  # writes the end of the compressed stream
+
+        if self.path is None:
+            (self._text or self._raw).flush()
+        else:
+            self._raw.close()
+            if commit:
+                _replace(temp_path(self.path), self.path)
+
+    def abort(self):
+        """Closes the sink after an error.
+
+        Files are removed. Output to stdout is flushed, as far as it goes.
+        """
+
+        if self.path is None:
+            try:
+                self.close()
+            except (IOError, OSError) as error:
+                if not self._broken_pipe(error):
+                    raise
+            return
+
+        try:
+            self.close(commit=False)
+        finally:
+            os.remove(temp_path(self.path))
+
+
+def open_output(path=None, compression=None):
+    """Opens an OutputSink to stdout, or to the file at `path`.
+
+    Use in a with statement: a broken pipe on stdout (e.g. when piping into
+    `head`) then ends the output quietly.
+    """
+    return OutputSink(path, compression)
+
+
+def write_lines(lines, path=None, compression=None):
+    """Writes the lines yielded by a tool to stdout, or to a file.
+    """
+    with open_output(path, compression) as output:
+        output.writelines(lines)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Runs any of the pdb-tools from a single entry point.
+
+Usage:
+    pdbtools <tool> [<options>] [<pdb file>]
+    pdbtools <tool> [<options>] -batch <input> ... -outdir <dir> [-jobs <n>]
+    pdbtools -zipapp <output file>
+
+The tool is given by its name, with or without the `pdb_` prefix, and takes
+the same options as when called on its own. Only the module of that tool is
+imported, so each call starts as fast as Python does.
+
+With -batch, the tool runs on many files and writes one output file per input
+file to the output directory, optionally using a pool of processes. Inputs can
+be files, directories, glob patterns or @<manifest> files. See `pdbtools.batch`
+for details.
+
+With -zipapp, builds a single-file, executable version of the pdb-tools,
+that runs with any Python 3 interpreter.
+
+Example:
+    pdbtools selchain -A 1CTF.pdb
+    python -m pdbtools selchain -A 1CTF.pdb
+
+    pdbtools selchain -A -batch 'pdbs/*.pdb' -outdir chainA -jobs 8
+
+    pdbtools -zipapp pdbtools.pyz
+    ./pdbtools.pyz selchain -A 1CTF.pdb
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+PREFIX = 'pdb_'
+
+
+def list_tools():
+    """Returns the names of all tools, without their prefix.
+    """
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    if os.path.isdir(package_dir):
+        names = [f[:-3] for f in os.listdir(package_dir) if f.endswith('.py')]
+    else:  # zipapp
+        import pkgutil
+        import pdbtools
+        names = [n for _, n, _ in pkgutil.iter_modules(pdbtools.__path__)]
+
+    return sorted(n[len(PREFIX):] for n in names if n.startswith(PREFIX))
+
+
+def find_tool(name):
+    """Returns the name of a tool, with or without prefix, or None.
+    """
+
+    if name.endswith('.py'):
+        name = name[:-3]
+    if name.startswith(PREFIX):
+        name = name[len(PREFIX):]
+    if not name.isalnum():
+        return None
+
+    try:
+        from importlib.util import find_spec
+    except ImportError:  # Python 2
+        return name if name in list_tools() else None
+
+    # Listing the package takes longer than most tools take to run
+    if find_spec('pdbtools.' + PREFIX + name) is None:
+        return None
+    return name
+
+
+def _usage():
+    """Returns the usage message, with the list of tools.
+    """
+    import textwrap
+    tools = textwrap.fill(' '.join(list_tools()), 79,
+                          initial_indent='    ', subsequent_indent='    ')
+    return '{}\nTools:\n{}\n'.format(__doc__, tools)
+
+
+def run_tool(name, args):
+    """Runs the main() function of a tool, as if called with `args`.
+    """
+
+    import importlib
+    module = importlib.import_module('pdbtools.' + PREFIX + name)
+    sys.argv = [PREFIX + name] + list(args)
+    module.main()
+
+
+def build_zipapp(target, interpreter='/usr/bin/env python3'):
+    """Writes the pdb-tools to a single executable zip file.
+
+    Only the Python sources of the package are included, along with their
+    bytecode for the running interpreter: modules are not compiled on import
+    from a zip file. Other interpreters use the sources.
+    """
+
+    import py_compile
+    import shutil
+    import tempfile
+    import zipapp
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for root, dirs, files in os.walk(package_dir):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            relpath = os.path.relpath(root, package_dir)
+            outdir = os.path.join(tmpdir, 'pdbtools', relpath)
+            os.makedirs(outdir)
+            for fname in files:
+                if fname.endswith('.py'):
+                    source = os.path.join(outdir, fname)
+                    shutil.copy(os.path.join(root, fname), source)
+                    py_compile.compile(source, cfile=source + 'c')
+
+        options = {}
+        if sys.version_info >= (3, 7):  # older versions do not compress
+            options['compressed'] = True
+        zipapp.create_archive(tmpdir, target, interpreter=interpreter,
+                              main='pdbtools.dispatch:main', **options)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        sys.stderr.write(_usage())
+        sys.exit(1)
+
+    if args[0] == '-zipapp':
+        if len(args) != 2:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        try:
+            import zipapp  # noqa: F401
+        except ImportError:  # Python 2
+            emsg = 'ERROR!! Building a zip file requires Python 3.5 or newer\n'
+            sys.stderr.write(emsg)
+            sys.exit(1)
+
+        try:
+            build_zipapp(args[1])
+        except (IOError, OSError) as error:
+            emsg = 'ERROR!! Could not write zip file: {}\n'
+            sys.stderr.write(emsg.format(error))
+            sys.exit(1)
+        sys.exit(0)
+
+    name = find_tool(args[0])
+    if name is None:
+        emsg = 'ERROR!! Unknown tool: \'{}\'\n'
+        sys.stderr.write(emsg.format(args[0]))
+        sys.stderr.write(_usage())
+        sys.exit(1)
+
+    if '-batch' in args[1:]:
+        from pdbtools.batch import main as run_batch
+        run_batch(name, args[1:])
+
+    run_tool(name, args[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,9 @@
 """
 Modifies the chain identifier column of a PDB file (default is an empty chain).
 
+Also reads files in the binary format written by pdb_tobin, and then writes
+the result in the same format.
+
 Usage:
     python pdb_chain.py -<chain id> <pdb file>
 
@@ -34,6 +37,11 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.binary import BinaryFormatError, BinaryStructure
+from pdbtools.core.binary import sniff, write_output
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -44,7 +52,7 @@ def check_input(args):
 
     # Defaults
     option = ' '
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -69,7 +77,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -86,7 +94,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -98,6 +106,14 @@ def check_input(args):
         sys.stderr.write(emsg.format(option))
         sys.exit(1)
 
+    # Binary structures are read directly
+    try:
+        fh = sniff(fh)
+    except BinaryFormatError as error:
+        emsg = 'ERROR!! Could not read binary file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
     return (option, fh)
 
 
@@ -106,7 +122,10 @@ def pad_line(line):
     size_of_line = len(line)
     if size_of_line < 80:
         padding = 80 - size_of_line + 1
-        line = line.strip('\n') + ' ' * padding + '\n'
+        if isinstance(line, bytes):  # bytes mode, or Python 2
+            line = line.strip(b'\n') + b' ' * padding + b'\n'
+        else:
+            line = line.strip('\n') + ' ' * padding + '\n'
     return line[:81]  # 80 + newline character
 
 
@@ -116,6 +135,10 @@ def alter_chain(fhandle, chain_id):
 
     _pad_line = pad_line
     records = ('ATOM', 'HETATM', 'TER', 'ANISOU')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, chain_id = as_bytes(records), as_bytes(chain_id)
+
     for line in fhandle:
         if line.startswith(records):
             line = _pad_line(line)
@@ -124,29 +147,28 @@ def alter_chain(fhandle, chain_id):
             yield line
 
 
+def alter_chain_binary(structure, chain_id):
+    """Sets the chain identifier of all atoms of a binary structure.
+
+    TER and ANISOU records are changed as in alter_chain.
+    """
+    # Lines are padded as in pad_line
+    structure = structure.assign('chain', chain_id).pad(80, keep=79)
+    return structure.map_lines(lambda lines: alter_chain(lines, chain_id))
+
+
 def main():
     # Check Input
     chain, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
+    if isinstance(pdbfh, BinaryStructure):
+        write_output(alter_chain_binary(pdbfh, chain))
+        sys.exit(0)
+
     new_pdb = alter_chain(pdbfh, chain)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
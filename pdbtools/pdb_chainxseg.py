@@ -34,6 +34,8 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -43,7 +45,7 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe
@@ -59,7 +61,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -101,22 +103,7 @@ def main():
     # Do the job
     new_pdb = place_chain_on_seg(pdbfh)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
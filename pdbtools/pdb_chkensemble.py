@@ -18,13 +18,16 @@
 """
 Checks all models in a multi-model PDB file have the same composition.
 
-Composition is defined as same atoms/residues/chains.
+Composition is defined as same atoms/residues/chains. Each model is compared
+to the first one as soon as it is read. With -fail-fast, the check stops at
+the first model that differs.
 
 Usage:
-    python pdb_chkensemble.py <pdb file>
+    python pdb_chkensemble.py [-fail-fast] <pdb file>
 
 Example:
     python pdb_chkensemble.py 1CTF.pdb
+    python pdb_chkensemble.py -fail-fast 1CTF.pdb
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -33,10 +36,11 @@ data to another. They are based on old FORTRAN77 code that was taking too much
 effort to maintain and compile. RIP.
 """
 
-import itertools
 import os
 import sys
 
+from pdbtools.core.streams import open_input
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -46,7 +50,10 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
+
+    fail_fast = '-fail-fast' in args
+    args = [a for a in args if a != '-fail-fast']
 
     if not len(args):
         # Reading from pipe with default option
@@ -61,7 +68,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -69,19 +76,43 @@ def check_input(args):
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    return fh
+    return (fail_fast, fh)
+
+
+def _report_difference(ref_no, ref_atoms, model_no, atoms):
+    """Writes the atoms that differ between two models to stderr.
+    """
+
+    msg = 'Models {} and {} differ:\n'
+    sys.stderr.write(msg.format(ref_no, model_no))
+
+    for number, only in ((ref_no, ref_atoms - atoms),
+                         (model_no, atoms - ref_atoms)):
+        if only:
+            msg = 'Atoms in model {} only:\n'
+            sys.stderr.write(msg.format(number))
+            sys.stderr.write('\n'.join(sorted(only)) + '\n')
 
 
-def check_ensemble(fhandle):
+def check_ensemble(fhandle, fail_fast=False):
     """Checks if the ensemble is valid.
 
     - Same atoms in each model
     - Paired MODEL/ENDMDL tags
+
+    Each model is compared to the first as soon as its ENDMDL is read, so only
+    two models are kept in memory. With `fail_fast`, returns at the first
+    model that differs.
     """
 
     model_open = False
     model_no = None
-    model_data = {}  # list of sets
+    atoms = None  # set of atoms in the current model
+
+    ref_no, ref_atoms = None, None  # first model
+    n_models = 0
+    bad_ensemble = False
+
     records = ('ATOM', 'HETATM', 'ANISOU', 'TER')
     for lineno, line in enumerate(fhandle):
         if line.startswith('MODEL'):
@@ -92,7 +123,7 @@ def check_ensemble(fhandle):
 
             model_open = True
             model_no = int(line[10:14])
-            model_data[model_no] = set()
+            atoms = set()
 
         elif line.startswith('ENDMDL'):
             if not model_open:
@@ -100,8 +131,18 @@ def check_ensemble(fhandle):
                 sys.stderr.write(emsg.format(lineno))
                 return 1
 
+            n_models += 1
+            if ref_atoms is None:
+                ref_no, ref_atoms = model_no, atoms
+            elif atoms != ref_atoms:
+                bad_ensemble = True
+                _report_difference(ref_no, ref_atoms, model_no, atoms)
+                if fail_fast:
+                    return 1
+
             model_open = False
-            model_no = None  # will fail to add lines if a new model is not open
+            model_no = None
+            atoms = None  # will fail to add lines if a new model is not open
 
         elif line.startswith(records):
             if not model_open:
@@ -109,43 +150,14 @@ def check_ensemble(fhandle):
                 sys.stderr.write(emsg.format(lineno))
                 return 1
 
-            atom_uid = line[6:27]
-            model_data[model_no].add(atom_uid)
+            atoms.add(line[6:27])
         else:
             if model_open:  # Missing last ENDMDL
                 emsg = 'ERROR!! ENDMDL record missing at line \'{}\'\n'
                 sys.stderr.write(emsg.format(lineno))
                 return 1
 
-    # Verify all models have the same atoms
-    bad_ensemble = False
-    model_no_list = list(model_data.keys())
-    for model_i, model_j in itertools.combinations(model_no_list, 2):
-        atoms_i = model_data[model_i]
-        atoms_j = model_data[model_j]
-
-        difference_ij = atoms_i - atoms_j
-        difference_ji = atoms_j - atoms_i
-
-        if difference_ij or difference_ji:
-            bad_ensemble = True
-            msg = 'Models {} and {} differ:\n'
-            sys.stderr.write(msg.format(model_i, model_j))
-
-            if len(difference_ij):
-                d_ij = sorted(difference_ij)
-                msg = 'Atoms in model {} only:\n'
-                sys.stderr.write(msg.format(model_i))
-                sys.stderr.write('\n'.join(d_ij))
-
-            if len(difference_ji):
-                d_ji = sorted(difference_ji)
-                msg = 'Atoms in model {} only:\n'
-                sys.stderr.write(msg.format(model_j))
-                sys.stderr.write('\n'.join(d_ji))
-
     if not bad_ensemble:
-        n_models = len(model_data)
         msg = 'Ensemble of {} models *seems* OK\n'
         sys.stdout.write(msg.format(n_models))
         return 0
@@ -155,10 +167,10 @@ def check_ensemble(fhandle):
 
 def main():
     # Check Input
-    pdbfh = check_input(sys.argv[1:])
+    fail_fast, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    status_code = check_ensemble(pdbfh)
+    status_code = check_ensemble(pdbfh, fail_fast)
 
     pdbfh.close()
     sys.exit(status_code)
@@ -35,6 +35,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = ["Joao Rodrigues", "Joao M.C. Teixeira"]
 __email__ = ["j.p.g.l.m.rodrigues@gmail.com", "joaomcteixeira@gmail.com"]
 
@@ -45,7 +48,7 @@ def check_input(args):
 
     # Defaults
     option = ''
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -70,7 +73,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -87,7 +90,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -116,9 +119,13 @@ def delete_chain(fhandle, chain_set):
     """
 
     records = ('ATOM', 'HETATM', 'TER', 'ANISOU')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, chain_set = as_bytes(records), as_bytes(chain_set)
+
     for line in fhandle:
         if line.startswith(records):
-            if line[21] in chain_set:
+            if line[21:22] in chain_set:
                 continue
         yield line
 
@@ -130,22 +137,7 @@ def main():
     # Do the job
     new_pdb = delete_chain(pdbfh, element)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -38,6 +38,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = ["Joao Rodrigues", "Joao M.C. Teixeira"]
 __email__ = ["j.p.g.l.m.rodrigues@gmail.com", "joaomcteixeira@gmail.com"]
 
@@ -48,7 +51,7 @@ def check_input(args):
 
     # Defaults
     option = ''
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -73,7 +76,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -90,7 +93,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -118,6 +121,10 @@ def delete_elements(fhandle, element_set):
     """
 
     records = ('ATOM', 'HETATM', 'ANISOU')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, element_set = as_bytes(records), as_bytes(element_set)
+
     for line in fhandle:
         if line.startswith(records):
             if line[76:78].strip() in element_set:
@@ -132,22 +139,7 @@ def main():
     # Do the job
     new_pdb = delete_elements(pdbfh, element_set)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -34,6 +34,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -43,7 +46,7 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -58,7 +61,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0], binary=True)
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -77,15 +80,20 @@ def remove_hetatm(fhandle):
     char_ranges = (slice(6, 11), slice(11, 16),
                    slice(16, 21), slice(21, 26), slice(26, 31))
 
+    hetatm, anisou, conect = 'HETATM', 'ANISOU', 'CONECT'
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        hetatm, anisou, conect = as_bytes((hetatm, anisou, conect))
+
     het_serials = set()
     for line in fhandle:
-        if line.startswith('HETATM'):
+        if line.startswith(hetatm):
             het_serials.add(line[6:11])
             continue
-        elif line.startswith('ANISOU'):
+        elif line.startswith(anisou):
             if line[6:11] in het_serials:
                 continue
-        elif line.startswith('CONECT'):
+        elif line.startswith(conect):
             if any(line[cr] in het_serials for cr in char_ranges):
                 continue
 
@@ -99,22 +107,7 @@ def main():
     # Do the job
     new_pdb = remove_hetatm(pdbfh)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
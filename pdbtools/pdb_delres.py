@@ -45,6 +45,8 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -63,7 +65,7 @@ def check_input(args):
 
     # Defaults
     option = ':::'
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -88,7 +90,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0])
 
     elif len(args) == 2:
         # Two options: option & File
@@ -105,7 +107,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1])
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -203,22 +205,7 @@ def main():
     # Do the job
     new_pdb = delete_residues(pdbfh, resrange, step)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -37,6 +37,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = ["Joao Rodrigues", "Joao M.C. Teixeira"]
 __email__ = ["j.p.g.l.m.rodrigues@gmail.com", "joaomcteixeira@gmail.com"]
 
@@ -47,7 +50,7 @@ def check_input(args):
 
     # Defaults
     option = ''
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -72,7 +75,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -89,7 +92,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -117,6 +120,10 @@ def delete_residue_by_name(fhandle, resname_set):
     """
 
     records = ('ATOM', 'HETATM', 'ANISOU', 'TER')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, resname_set = as_bytes(records), as_bytes(resname_set)
+
     for line in fhandle:
         if line.startswith(records):
             if line[17:20].strip() in resname_set:
@@ -131,22 +138,7 @@ def main():
     # Do the job
     new_pdb = delete_residue_by_name(pdbfh, resname_set)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -20,12 +20,25 @@ Downloads a structure in PDB format from the RCSB website.
 
 Allows downloading the (first) biological structure if selected.
 
+Downloaded files are kept in a local cache if the PDBTOOLS_CACHE environment
+variable points to a directory (see PDBTOOLS_CACHE_SIZE for its size limit, in
+MB). With -offline, structures are read only from the cache. Files can also be
+fetched from a different server or a local mirror directory by setting
+PDBTOOLS_FETCH_URL.
+
+With -list, downloads all PDB codes listed in a file (or '-' for stdin) to a
+directory, using several concurrent connections, and prints one status line
+per structure. Failed downloads are retried a few times.
+
 Usage:
-    python pdb_fetch.py [-biounit] <pdb code>
+    python pdb_fetch.py [-biounit] [-offline] <pdb code>
+    python pdb_fetch.py [-biounit] [-offline] -list <file> [-outdir <dir>] [-jobs <n>]
 
 Example:
     python pdb_fetch.py 1brs  # downloads unit cell, all 6 chains
     python pdb_fetch.py -biounit 1brs  # downloads biounit, 2 chains
+    python pdb_fetch.py -offline 1brs  # reads 1brs from the local cache
+    python pdb_fetch.py -list ids.txt -outdir pdbs -jobs 8  # many at once
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -34,19 +47,22 @@ data to another. They are based on old FORTRAN77 code that was taking too much
 effort to maintain and compile. RIP.
 """
 
-import gzip
+import os
 import re
 import sys
+import threading
+import time
+import zlib
+
+from pdbtools.core.fetch import FetchError, get_backend, get_cache
+from pdbtools.core.fetch import iter_gunzip, iter_gunzip_lines
+from pdbtools.core.streams import open_input, open_output, write_lines
 
 # Python 3 vs Python 2
 if sys.version_info[0] < 3:
-    from cStringIO import StringIO as IO
-    from urllib2 import Request, build_opener
-    from urllib2 import HTTPError
+    import Queue as queue
 else:
-    from io import BytesIO as IO
-    from urllib.request import Request, build_opener
-    from urllib.error import HTTPError
+    import queue
 
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
@@ -57,99 +73,281 @@ def check_input(args):
     """
 
     # Defaults
-    option = False
+    options = {
+        '-biounit': False,
+        '-offline': False,
+        '-list': None,
+        '-outdir': '.',
+        '-jobs': 4,
+    }
+
+    if not len(args):
+        sys.stderr.write(__doc__)
+        sys.exit(1)
 
-    if len(args) == 1:
-        # pdb code only
-        if not re.match(r'[0-9a-zA-Z]{4}$', args[0]):
-            emsg = 'ERROR!! Invalid PDB code: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+    positional = []
+    seen = set()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith('-') or arg == '-':
+            positional.append(arg)
+            continue
+
+        if arg not in options or arg in seen:
+            emsg = 'ERROR!! Invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
             sys.stderr.write(__doc__)
             sys.exit(1)
+        seen.add(arg)
 
-        pdb_code = args[0]
-
-    elif len(args) == 2:
-        # biounit & pdb code
-        if not re.match(r'\-biounit$', args[0]):
-            emsg = 'ERROR!! Invalid option: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+        if arg in ('-biounit', '-offline'):
+            options[arg] = True
+        elif not args:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
             sys.stderr.write(__doc__)
             sys.exit(1)
+        else:
+            options[arg] = args.pop(0)
 
-        if not re.match(r'[0-9a-zA-Z]{4}$', args[1]):
-            emsg = 'ERROR!! Invalid PDB code: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+    if options['-list'] is None:
+        # single pdb code
+        if len(positional) != 1 or '-outdir' in seen or '-jobs' in seen:
             sys.stderr.write(__doc__)
             sys.exit(1)
+        pdb_codes = positional
 
-        option = True
-        pdb_code = args[1]
     else:
-        sys.stderr.write(__doc__)
-        sys.exit(1)
+        if positional:
+            emsg = 'ERROR!! Unexpected argument: \'{}\'\n'
+            sys.stderr.write(emsg.format(positional[0]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        fname = options['-list']
+        if fname == '-':
+            fh = open_input()
+        elif os.path.isfile(fname):
+            fh = open_input(fname)
+        else:
+            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+            sys.stderr.write(emsg.format(fname))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
 
-    return (pdb_code, option)
+        # Codes separated by whitespace or commas, # for comments
+        pdb_codes = []
+        for line in fh:
+            line = line.split('#')[0]
+            pdb_codes.extend(line.replace(',', ' ').split())
+        fh.close()
 
+        try:
+            options['-jobs'] = int(options['-jobs'])
+            if options['-jobs'] < 1:
+                raise ValueError
+        except ValueError:
+            emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+            sys.stderr.write(emsg.format(options['-jobs']))
+            sys.exit(1)
+
+    for pdb_code in pdb_codes:
+        if not re.match(r'[0-9a-zA-Z]{4}$', pdb_code):
+            emsg = 'ERROR!! Invalid PDB code: \'{}\'\n'
+            sys.stderr.write(emsg.format(pdb_code))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
 
-def fetch_structure(pdbid, biounit=False):
+    options = dict((k[1:], v) for k, v in options.items())
+    return (pdb_codes, options)
+
+
+def fetch_structure(pdbid, biounit=False, backend=None, cache=None,
+                    offline=False):
     """Downloads the structure in PDB format from the RCSB PDB website.
+
+    `backend` defaults to the one set in the environment (see
+    pdbtools.core.fetch). If a `cache` is given, files are read from and
+    saved to it. With `offline`, only the cache is used.
+
+    Raises FetchError if the structure cannot be downloaded, after the lines
+    received so far if the data is truncated or corrupted.
     """
 
-    base_url = 'https://files.rcsb.org/download/'
     pdb_type = '.pdb1' if biounit else '.pdb'
-    pdb_url = base_url + pdbid.lower() + pdb_type + '.gz'
+    pdb_name = pdbid.lower() + pdb_type + '.gz'
+
+    if backend is None:
+        backend = get_backend()
+
+    if cache is not None:
+        stream = cache.open(pdb_name, backend, offline=offline)
+    elif offline:
+        raise FetchError(None, 'No cache to read from (offline mode)')
+    else:
+        stream = backend.open(pdb_name).stream
 
+    # Decompress as data arrives, lines are available downstream
+    # before the download is complete.
     try:
-        request = Request(pdb_url)
-        opener = build_opener()
-        url_data = opener.open(request).read()
+        for line in iter_gunzip_lines(stream):
+            yield line.decode('utf-8')
 
-    except HTTPError as e:
-        emsg = '[!] Error fetching structure: ({0}) {1}\n'
-        sys.stderr.write(emsg.format(e.code, e.msg))
-        return
+    except (IOError, zlib.error) as e:
+        # Truncated or corrupted data, or connection lost mid-transfer.
+        raise FetchError(None, str(e) or e.__class__.__name__)
 
-    else:
+    finally:
+        stream.close()
 
-        try:
-            buf = IO(url_data)
-            gz_handle = gzip.GzipFile(fileobj=buf, mode='rb')
-            for line in gz_handle:
-                yield line.decode('utf-8')
 
-        except IOError as e:
-            emsg = '[!] Error fetching structure: ({0}) {1}\n'
-            sys.stderr.write(emsg.format(e.code, e.msg))
-            return
+def fetch_to_file(pdbid, outdir, biounit=False, backend=None, cache=None,
+                  offline=False, retries=3, backoff=1.0):
+    """Downloads and decompresses one structure to a file in `outdir`.
 
-        finally:
-            gz_handle.close()
+    Data is decompressed as it arrives and written to a temporary file that
+    is renamed when complete. Network and server (5xx) errors are retried
+    with exponential backoff. Returns the path of the new file.
+
+    Raises FetchError if the structure cannot be downloaded.
+    """
+
+    pdb_type = '.pdb1' if biounit else '.pdb'
+    pdb_name = pdbid.lower() + pdb_type + '.gz'
+    out_path = os.path.join(outdir, pdb_name[:-3])
+
+    if backend is None:
+        backend = get_backend()
+
+    attempt = 0
+    while True:
+        try:
+            if cache is not None:
+                stream = cache.open(pdb_name, backend, offline=offline)
+            elif offline:
+                raise FetchError(None, 'No cache to read from (offline mode)')
+            else:
+                stream = backend.open(pdb_name).stream
+
+            # One temporary file per thread, created with the same mode as
+            # open() would use, so that the umask applies.
+            tmp_path = '{0}.{1}-{2}.tmp'.format(
+                out_path, os.getpid(), threading.current_thread().ident)
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            fd = os.open(tmp_path, flags, 0o666)
+            try:
+                with os.fdopen(fd, 'wb') as out_handle:
+                    for data in iter_gunzip(stream):
+                        out_handle.write(data)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            finally:
+                stream.close()
+
+            os.rename(tmp_path, out_path)
+            return out_path
+
+        except (IOError, zlib.error) as e:
+            # Truncated or corrupted data, or connection lost mid-transfer.
+            error = FetchError(None, str(e) or e.__class__.__name__)
+        except FetchError as e:
+            error = e
+
+        transient = error.code is None or error.code == 429 or error.code >= 500
+        if offline or not transient or attempt >= retries:
+            raise error
+
+        time.sleep(backoff * 2 ** attempt)
+        attempt += 1
+
+
+def fetch_many(pdbids, outdir, biounit=False, jobs=4, backend=None,
+               cache=None, offline=False, retries=3):
+    """Downloads many structures to `outdir` using a pool of threads.
+
+    Yields (pdb code, path, error message) tuples as downloads finish. Either
+    path or error message is None.
+    """
+
+    if backend is None:
+        backend = get_backend()  # shared, one connection per thread
+
+    tasks = queue.Queue()
+    for pdbid in pdbids:
+        tasks.put(pdbid)
+    results = queue.Queue()
+
+    def _worker():
+        while True:
+            try:
+                pdbid = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                path = fetch_to_file(pdbid, outdir, biounit, backend, cache,
+                                     offline, retries)
+            except FetchError as e:
+                results.put((pdbid, None, '({0}) {1}'.format(e.code, e.msg)))
+            except Exception as e:  # keep the pool alive, report it
+                results.put((pdbid, None, '(None) {0}'.format(e)))
+            else:
+                results.put((pdbid, path, None))
+
+    workers = []
+    for _ in range(min(jobs, len(pdbids))):
+        worker = threading.Thread(target=_worker)
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    for _ in pdbids:
+        yield results.get()
+
+    for worker in workers:
+        worker.join()
 
 
 def main():
     # Check Input
-    pdb_code, biounit = check_input(sys.argv[1:])
+    pdb_codes, options = check_input(sys.argv[1:])
+
+    cache = get_cache()
+    biounit = options['biounit']
+    offline = options['offline']
+
+    if options['list'] is not None:
+        outdir = options['outdir']
+        if not os.path.isdir(outdir):
+            os.makedirs(outdir)
+
+        # Do the job, report as we go
+        n_errors = 0
+        report = fetch_many(pdb_codes, outdir, biounit, options['jobs'],
+                            cache=cache, offline=offline)
+        with open_output() as output:
+            for pdb_code, path, error in report:
+                if error is None:
+                    output.write('{}\tOK\t{}\n'.format(pdb_code, path))
+                else:
+                    n_errors += 1
+                    output.write('{}\tERROR\t{}\n'.format(pdb_code, error))
+                output.flush()
+
+        sys.exit(1 if n_errors else 0)
 
     # Do the job
-    new_pdb = fetch_structure(pdb_code, biounit)
+    new_pdb = fetch_structure(pdb_codes[0], biounit, cache=cache,
+                              offline=offline)
 
     try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+        write_lines(new_pdb)
+    except FetchError as e:
+        emsg = '[!] Error fetching structure: ({0}) {1}\n'
+        sys.stderr.write(emsg.format(e.code, e.msg))
+        sys.exit(1)
 
     sys.exit(0)
 
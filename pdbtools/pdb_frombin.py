@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Converts a file in the binary `pdb-tools` format back to PDB format.
+
+Usage:
+    python pdb_frombin.py <bin file>
+
+Example:
+    python pdb_frombin.py 1CTF.bin > 1CTF.pdb
+    python pdb_tobin.py 1CTF.pdb | python pdb_chain.py -A | python pdb_frombin.py
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+from pdbtools.core.binary import BinaryFormatError, load
+from pdbtools.core.streams import open_input, write_lines
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+def check_input(args):
+    """Checks whether to read from stdin/file and validates user input/options.
+    """
+
+    # Defaults
+    fh = open_input()  # file handle
+
+    if not len(args):
+        # Reading from pipe with default option
+        if sys.stdin.isatty():
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+    elif len(args) == 1:
+        if not os.path.isfile(args[0]):
+            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        fh = open(args[0], 'rb')
+
+    else:  # Whatever ...
+        emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
+        sys.stderr.write(emsg.format(len(args)))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    return fh
+
+
+def convert_to_pdb(fhandle):
+    """Yields the lines of a binary structure file in PDB format.
+    """
+
+    try:
+        structure = load(fhandle)
+    except BinaryFormatError as error:
+        emsg = 'ERROR!! Could not read binary file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
+    for line in structure.iter_lines():
+        yield line
+
+
+def main():
+    # Check Input
+    binfh = check_input(sys.argv[1:])
+
+    # Do the job
+    new_pdb = convert_to_pdb(binfh)
+
+    write_lines(new_pdb)
+
+    # last line of the script
+    # We can close it even if it is sys.stdin
+    binfh.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
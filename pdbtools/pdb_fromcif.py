@@ -19,7 +19,8 @@
 Rudimentarily converts a mmCIF file to the PDB format.
 
 Will not convert if the file does not 'fit' in PDB format, e.g. too many
-chains, residues, or atoms. Will convert only the coordinate section.
+chains, residues, or atoms. Will convert only the coordinate section. Files
+with several data blocks are written as consecutive models.
 
 Usage:
     python pdb_fromcif.py <pdb file>
@@ -35,9 +36,11 @@ effort to maintain and compile. RIP.
 """
 
 import os
-import re
 import sys
 
+from pdbtools import cif
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -47,7 +50,7 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -62,7 +65,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -73,142 +76,181 @@ def check_input(args):
     return fh
 
 
+# Items of _atom_site we read, in order, with their fallbacks.
+# Preference is given to auth items to match PDBs
+# http://mmcif.wwpdb.org/docs/pdb_to_pdbx_correspondences.html
+_atom_site_items = (
+    ('pdbx_PDB_model_num',),
+    ('group_PDB',),
+    ('auth_atom_id', 'label_atom_id'),
+    ('type_symbol',),
+    ('label_alt_id',),
+    ('auth_comp_id', 'label_comp_id'),
+    ('auth_asym_id', 'label_asym_id'),
+    ('auth_seq_id', 'label_seq_id'),
+    ('pdbx_PDB_ins_code',),
+    ('Cartn_x',),
+    ('Cartn_y',),
+    ('Cartn_z',),
+    ('occupancy',),
+    ('B_iso_or_equiv',),
+    ('pdbx_formal_charge',),
+)
+
+
+def _resolve_columns(items):
+    """Returns the position of each column in _atom_site_items in the loop.
+
+    Called once per loop header, instead of looking up items for every atom.
+    """
+
+    positions = dict((item, pos) for pos, item in enumerate(items))
+
+    columns = []
+    for names in _atom_site_items:
+        for name in names:
+            pos = positions.get(name)
+            if pos is not None:
+                break
+        else:
+            emsg = 'ERROR!! Missing _atom_site item: \'{}\'\n'
+            sys.stderr.write(emsg.format(names[0]))
+            sys.exit(1)
+        columns.append(pos)
+    return columns
+
+
+def _atom_site_rows(fhandle):
+    """Yields (block, columns, row) for each row of the _atom_site loops.
+    """
+
+    try:
+        parsed = cif.iter_categories(fhandle, categories=('atom_site',))
+        for block, _, items, rows in parsed:
+            columns = _resolve_columns(items)
+            for row in rows:
+                yield block, columns, row
+    except cif.CIFError as error:
+        emsg = 'ERROR!! Could not parse mmCIF file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
+
 def convert_to_pdb(fhandle):
     """Converts a structure in mmCIF format to PDB format.
+
+    Lines are written as they are converted. Only the first model is held in
+    memory, until we know whether the file is an ensemble or not.
     """
 
     _a = "{:6s}{:5d} {:<4s}{:1s}{:3s} {:1s}{:4d}{:1s}   {:8.3f}{:8.3f}{:8.3f}"
     _a += "{:6.2f}{:6.2f}      {:<4s}{:<2s}{:2s}\n"
+    _fmt = _a.format
+    _model = "MODEL {:>5d}\n".format
 
-    in_section, read_atom = False, False
-
-    label_pos = 0
-    labels = {}
     empty = set(('.', '?'))
 
-    prev_model = None
+    columns = None
+    prev_block, prev_model = None, None
+    num_models = 0
     atom_num = 0
     serial = 0  # do not read serial numbers from mmCIF. Wrong in multi-models.
 
-    model_data = []  # store atom data to account for multi-model files
-    for line in fhandle:
-        if line.startswith('loop_'):  # start of section
-            in_section = True
-
-        elif line.startswith('#'):  # end of section
-            in_section = False
-            read_atom = False
-
-        elif in_section and line.startswith('_atom_site.'):  # ATOM/HETATM
-            read_atom = True
-            labels[line.strip()] = label_pos
-            label_pos += 1
-
-        elif read_atom and line.startswith(('ATOM', 'HETATM')):  # convert
-            fields = re.findall(r'[^"\s]\S*|".+?"', line)  # find enclosed ''
-
-            # Pick fields, giving preference to auth to match PDBs
-            # http://mmcif.wwpdb.org/docs/pdb_to_pdbx_correspondences.html
-            model_no = fields[labels.get('_atom_site.pdbx_PDB_model_num')]
-            if prev_model != model_no:  # first line will trigger
-                prev_model = model_no
-                model_data.append([])
-                serial = 0
-
-            record = fields[labels.get('_atom_site.group_PDB')]
-
-            # serial = int(fields[labels.get('_atom_site.id')])
-            serial += 1
-
-            fid = labels.get('_atom_site.auth_atom_id')
-            if fid is None:
-                fid = labels.get('_atom_site.label_atom_id')
-            atname = fields[fid]
-
-            element = fields[labels.get('_atom_site.type_symbol')]
-            if element in empty:
-                element = ' '
-
-            # handle atom name
-            if atname[0] == '"' and atname[-1] == '"':
-                atname = atname[1:-1]
-
-            if len(atname) < 4 and atname[0].isalpha() and len(element) < 2:
-                atname = ' ' + atname  # pad
-
-            altloc = fields[labels.get('_atom_site.label_alt_id')]
-            if altloc in empty:
-                altloc = ' '
-
-            fid = labels.get('_atom_site.auth_comp_id')
-            if fid is None:
-                fid = labels.get('_atom_site.label_comp_id')
-            resname = fields[fid]
-
-            fid = labels.get('_atom_site.auth_asym_id')
-            if fid is None:
-                fid = labels.get('_atom_site.label_asym_id')
-            chainid = fields[fid]
-
-            fid = labels.get('_atom_site.auth_seq_id')
-            if fid is None:
-                fid = labels.get('_atom_site.label_seq_id')
-            resnum = int(fields[fid])
-
-            icode = fields[labels.get('_atom_site.pdbx_PDB_ins_code')]
-            if icode in empty:
-                icode = ' '
-
-            x = float(fields[labels.get('_atom_site.Cartn_x')])
-            y = float(fields[labels.get('_atom_site.Cartn_y')])
-            z = float(fields[labels.get('_atom_site.Cartn_z')])
-            occ = float(fields[labels.get('_atom_site.occupancy')])
-            bfactor = float(fields[labels.get('_atom_site.B_iso_or_equiv')])
-
-            charge = fields[labels.get('_atom_site.pdbx_formal_charge')]
-            try:
-                charge = charge
-            except ValueError:
-                charge = '  '
-
-            segid = chainid
-
-            atom_line = _a.format(record, serial, atname, altloc, resname,
-                                  chainid, resnum, icode, x, y, z, occ, bfactor,
-                                  segid, element, charge)
-
-            atom_num += 1
-
-            # Check if structure is too large
-            if atom_num > 99999:
-                emsg = 'ERROR!! Number of atoms exceeds PDB format limit: \'{}\'\n'
-                sys.stderr.write(emsg.format(atom_num))
-                sys.stderr.write(__doc__)
-                sys.exit(1)
-            elif len(chainid) > 1:
-                emsg = 'ERROR!! Chain IDs is too large: \'{}\'\n'
-                sys.stderr.write(emsg.format(chainid))
-                sys.stderr.write(__doc__)
-                sys.exit(1)
-            elif resnum > 9999:
-                emsg = 'ERROR!! Too many residues (\'{}\') in chain \'{}\' \n'
-                sys.stderr.write(emsg.format(resnum, chainid))
-                sys.stderr.write(__doc__)
-                sys.exit(1)
-
-            model_data[-1].append(atom_line)
-
-    # Check if multi-model
-    is_ensemble = len(model_data) > 1
-    if is_ensemble:
-        for model_no, model in enumerate(model_data, start=1):
-            yield "MODEL {:>5d}\n".format(model_no)
-            for line in model:
-                yield line
-            yield 'ENDMDL\n'
-    else:
-        for line in model_data[0]:
-            yield line
+    first_model = []  # held back until we see a second model, or EOF
+    for block, row_columns, fields in _atom_site_rows(fhandle):
+        if row_columns is not columns:  # new loop header
+            columns = row_columns
+            (c_model, c_record, c_name, c_elem, c_altloc, c_resname,
+             c_chain, c_resnum, c_icode, c_x, c_y, c_z, c_occ, c_bfactor,
+             c_charge) = columns
+
+        model_no = fields[c_model]
+        if prev_model != model_no or prev_block != block:  # first line too
+            prev_block, prev_model = block, model_no
+            num_models += 1
+            serial = 0
+
+            if num_models == 2:  # ensemble: release first model
+                yield _model(1)
+                for atom_line in first_model:
+                    yield atom_line
+                yield 'ENDMDL\n'
+                first_model = None
+
+            if num_models > 2:
+                yield 'ENDMDL\n'
+            if num_models > 1:
+                yield _model(num_models)
+
+        record = fields[c_record]
+
+        serial += 1
+
+        atname = fields[c_name]
+
+        element = fields[c_elem]
+        if element in empty:
+            element = ' '
+
+        # handle atom name
+        if len(atname) < 4 and atname[0].isalpha() and len(element) < 2:
+            atname = ' ' + atname  # pad
+
+        altloc = fields[c_altloc]
+        if altloc in empty:
+            altloc = ' '
+
+        resname = fields[c_resname]
+        chainid = fields[c_chain]
+        resnum = int(fields[c_resnum])
+
+        icode = fields[c_icode]
+        if icode in empty:
+            icode = ' '
+
+        x = float(fields[c_x])
+        y = float(fields[c_y])
+        z = float(fields[c_z])
+        occ = float(fields[c_occ])
+        bfactor = float(fields[c_bfactor])
+
+        charge = fields[c_charge]
+
+        segid = chainid
+
+        atom_line = _fmt(record, serial, atname, altloc, resname,
+                         chainid, resnum, icode, x, y, z, occ, bfactor,
+                         segid, element, charge)
+
+        atom_num += 1
+
+        # Check if structure is too large
+        if atom_num > 99999:
+            emsg = 'ERROR!! Number of atoms exceeds PDB format limit: \'{}\'\n'
+            sys.stderr.write(emsg.format(atom_num))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        elif len(chainid) > 1:
+            emsg = 'ERROR!! Chain IDs is too large: \'{}\'\n'
+            sys.stderr.write(emsg.format(chainid))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        elif resnum > 9999:
+            emsg = 'ERROR!! Too many residues (\'{}\') in chain \'{}\' \n'
+            sys.stderr.write(emsg.format(resnum, chainid))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        if num_models == 1:
+            first_model.append(atom_line)
+        else:
+            yield atom_line
+
+    if num_models == 1:
+        for atom_line in first_model:
+            yield atom_line
+    elif num_models > 1:
+        yield 'ENDMDL\n'
 
     yield "{:<80s}\n".format("END")
 
@@ -220,22 +262,7 @@ def main():
     # Do the job
     new_pdb = convert_to_pdb(pdbfh)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
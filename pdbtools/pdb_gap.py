@@ -19,13 +19,20 @@
 Finds gaps between consecutive protein residues in the PDB.
 
 Detects gaps both by a distance criterion or discontinuous residue numbering.
-Only applies to protein residues.
+By default, only applies to protein residues and measures the distance between
+consecutive CA atoms (gap if > 4.0A). Alternatively, checks the C-N peptide
+bond (-peptide) or the O3'-P link of nucleic acids (-nucleic) between
+consecutive residues (gap if > 2.0A). Models of an ensemble can be processed
+in parallel by a pool of processes (-jobs).
 
 Usage:
-    python pdb_gap.py <pdb file>
+    python pdb_gap.py [-peptide | -nucleic] [-jobs <n>] <pdb file>
 
 Example:
     python pdb_gap.py 1CTF.pdb
+    python pdb_gap.py -peptide 1CTF.pdb  # checks C-N bonds
+    python pdb_gap.py -nucleic 1BNA.pdb  # checks O3'-P links
+    python pdb_gap.py -jobs 4 2K9Q.pdb  # 4 models at a time
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -36,99 +43,278 @@ effort to maintain and compile. RIP.
 
 import os
 import sys
+from array import array
+
+from pdbtools.core.streams import open_input, open_output
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
 
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
 
+# Backbone links: name: (atom of residue i, atom of residue i+1, cutoff)
+# Respect spacing. 'CA  ' != ' CA '
+LINKS = {
+    'ca': (' CA ', ' CA ', 4.0),
+    'peptide': (' C  ', ' N  ', 2.0),
+    'nucleic': (" O3'", ' P  ', 2.0),
+}
+
+_NAN3 = array('d', [float('nan')] * 3)
+
+
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    options = {
+        '-peptide': False,
+        '-nucleic': False,
+        '-jobs': 1,
+    }
+    fh = open_input()  # file handle
+
+    positional = []
+    seen = set()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg not in options:
+            positional.append(arg)
+            continue
+
+        if arg in seen:
+            emsg = 'ERROR!! Invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        seen.add(arg)
+
+        if arg != '-jobs':
+            options[arg] = True
+        elif not args:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        else:
+            options[arg] = args.pop(0)
 
-    if not len(args):
+    if not len(positional):
         # Reading from pipe with default option
         if sys.stdin.isatty():
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-    elif len(args) == 1:
-        if not os.path.isfile(args[0]):
+    elif len(positional) == 1:
+        if not os.path.isfile(positional[0]):
             emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(emsg.format(positional[0]))
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(positional[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
-        sys.stderr.write(emsg.format(len(args)))
+        sys.stderr.write(emsg.format(len(positional)))
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    return fh
+    if options['-peptide'] and options['-nucleic']:
+        emsg = 'ERROR!! Options -peptide and -nucleic are mutually exclusive\n'
+        sys.stderr.write(emsg)
+        sys.stderr.write(__doc__)
+        sys.exit(1)
 
+    try:
+        options['-jobs'] = int(options['-jobs'])
+        if options['-jobs'] < 1:
+            raise ValueError
+    except ValueError:
+        emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+        sys.stderr.write(emsg.format(options['-jobs']))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
 
-def detect_gaps(fhandle):
-    """Detects gaps between residues in the PDB file.
-    """
+    link = 'ca'
+    if options['-peptide']:
+        link = 'peptide'
+    elif options['-nucleic']:
+        link = 'nucleic'
 
-    fmt_GAPd = "{0[1]}:{0[3]}{0[2]} < {2:7.2f}A > {1[1]}:{1[3]}{1[2]}\n"
-    fmt_GAPs = "{0[1]}:{0[3]}{0[2]} < Seq. Gap > {1[1]}:{1[3]}{1[2]}\n"
+    return (link, options['-jobs'], fh)
 
-    centroid = ' CA '  # respect spacing. 'CA  ' != ' CA '
-    distance_threshold = 4.0 * 4.0
 
-    def calculate_sq_atom_distance(i, j):
-        """Squared euclidean distance between two 3d points"""
-        return (i[0] - j[0]) * (i[0] - j[0]) + \
-               (i[1] - j[1]) * (i[1] - j[1]) + \
-               (i[2] - j[2]) * (i[2] - j[2])
+def _iter_models(fhandle):
+    """Yields the ATOM records of each model of the file, as lists of lines.
+    """
 
-    prev_at = (None, None, None, None, (None, None, None))
-    model = 0
-    n_gaps = 0
+    lines = []
     for line in fhandle:
+        if line.startswith('ATOM'):
+            lines.append(line)
+        elif line.startswith('MODEL') and lines:
+            yield lines
+            lines = []
 
-        if line.startswith('MODEL'):
-            model = int(line[10:14])
+    if lines:
+        yield lines
 
-        elif line.startswith('ATOM'):
-            atom_name = line[12:16]
-            if atom_name != centroid:
-                continue
 
-            resn = line[17:20]
-            resi = int(line[22:26])
+def _read_segments(lines, link):
+    """Collects the backbone atoms of each run of residues of the same chain.
+
+    Returns a list of (chain, resnames, resnums, tails, heads) tuples, one per
+    run. `tails` and `heads` hold the flat coordinates of the atoms linking
+    each residue to the next and previous ones (NaN if missing). With CA
+    atoms, each CA is an entry of its own, so alternate locations are
+    compared too.
+    """
+
+    tail_name, head_name, _ = link
+    per_atom = tail_name == head_name
+
+    segments = []
+    chain = key = None
+    for line in lines:
+        name = line[12:16]
+        if per_atom and name != tail_name:
+            continue
+
+        if line[21] != chain:
             chain = line[21]
-            x = float(line[30:38])
-            y = float(line[38:46])
-            z = float(line[46:54])
+            key = None
+            resnames, resnums = [], array('l')
+            tails, heads = array('d'), array('d')
+            segments.append((chain, resnames, resnums, tails, heads))
+
+        if per_atom or line[17:27] != key:  # new entry
+            key = line[17:27]
+            resnames.append(line[17:20])
+            resnums.append(int(line[22:26]))
+            tails.extend(_NAN3)
+            heads.extend(_NAN3)
+
+        if name == tail_name and tails[-1] != tails[-1]:  # first one only
+            tails[-3:] = array('d', (float(line[30:38]),
+                                     float(line[38:46]),
+                                     float(line[46:54])))
+        if name == head_name and heads[-1] != heads[-1]:
+            heads[-3:] = array('d', (float(line[30:38]),
+                                     float(line[38:46]),
+                                     float(line[46:54])))
+
+    return segments
+
+
+def _find_gaps(resnums, tails, heads, cutoff):
+    """Returns (index, distance) for each gap after entry `index`.
+
+    Distance is None for gaps in the residue numbering only. Entries with
+    missing atoms are only checked for their numbering.
+    """
+
+    n_entries = len(resnums)
+    if n_entries < 2:
+        return []
+
+    sq_cutoff = cutoff * cutoff
+    if numpy is not None:
+        resnums = numpy.frombuffer(resnums, dtype=resnums.typecode)
+        tails = numpy.frombuffer(tails, dtype='d').reshape(-1, 3)
+        heads = numpy.frombuffer(heads, dtype='d').reshape(-1, 3)
+
+        sq_dist = ((tails[:-1] - heads[1:]) ** 2).sum(axis=1)
+        with numpy.errstate(invalid='ignore'):  # NaN: missing atoms
+            far = sq_dist > sq_cutoff
+        seq = resnums[:-1] + 1 != resnums[1:]
+
+        gaps = []
+        for idx in numpy.flatnonzero(far | seq).tolist():
+            if far[idx]:
+                gaps.append((idx, float(sq_dist[idx]) ** 0.5))
+            else:
+                gaps.append((idx, None))
+        return gaps
+
+    gaps = []
+    for idx in range(n_entries - 1):
+        i, j = 3 * idx, 3 * idx + 3
+        sq_dist = (tails[i] - heads[j]) * (tails[i] - heads[j]) + \
+                  (tails[i + 1] - heads[j + 1]) * (tails[i + 1] - heads[j + 1]) + \
+                  (tails[i + 2] - heads[j + 2]) * (tails[i + 2] - heads[j + 2])
+        if sq_dist > sq_cutoff:
+            gaps.append((idx, sq_dist ** 0.5))
+        elif resnums[idx] + 1 != resnums[idx + 1]:
+            gaps.append((idx, None))
+    return gaps
+
+
+def _model_gaps(task):
+    """Returns the gap messages of a model, from its ATOM records.
+    """
+
+    lines, link = task
 
-            at_uid = (model, chain, resi, resn, atom_name, (x, y, z))
-            if prev_at[0] == at_uid[0] and prev_at[1] == at_uid[1]:
-                d = calculate_sq_atom_distance(at_uid[5], prev_at[5])
-                if d > distance_threshold:
-                    sys.stdout.write(fmt_GAPd.format(prev_at, at_uid, d**0.5))
-                    n_gaps += 1
-                elif prev_at[2] + 1 != at_uid[2]:
-                    sys.stdout.write(fmt_GAPs.format(prev_at, at_uid))
-                    n_gaps += 1
+    fmt_GAPd = "{0}:{1}{2} < {3:7.2f}A > {0}:{4}{5}\n"
+    fmt_GAPs = "{0}:{1}{2} < Seq. Gap > {0}:{4}{5}\n"
 
-            prev_at = at_uid
+    messages = []
+    for segment in _read_segments(lines, link):
+        chain, resnames, resnums, tails, heads = segment
+        for idx, dist in _find_gaps(resnums, tails, heads, link[2]):
+            fmt = fmt_GAPs if dist is None else fmt_GAPd
+            messages.append(fmt.format(chain,
+                                       resnames[idx], resnums[idx],
+                                       dist,
+                                       resnames[idx + 1], resnums[idx + 1]))
+    return messages
+
+
+def detect_gaps(fhandle, link='ca', jobs=1):
+    """Detects gaps between residues in the PDB file.
+
+    `link` is one of the keys of LINKS. With more than one job, models are
+    processed in parallel, and reported in the order of the file.
+    """
+
+    link = LINKS[link]
+    tasks = ((lines, link) for lines in _iter_models(fhandle))
+
+    pool = None
+    if jobs > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(_model_gaps, tasks)
+    else:
+        results = (_model_gaps(task) for task in tasks)
+
+    n_gaps = 0
+    with open_output() as output:
+        try:
+            for messages in results:
+                output.write(''.join(messages))
+                n_gaps += len(messages)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
-    sys.stdout.write('Found {} gap(s) in the structure\n'.format(n_gaps))
+        output.write('Found {} gap(s) in the structure\n'.format(n_gaps))
 
 
 def main():
     # Check Input
-    pdbfh = check_input(sys.argv[1:])
+    link, jobs, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    detect_gaps(pdbfh)
+    detect_gaps(pdbfh, link, jobs)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Writes a byte-offset index for a PDB file.
+
+The index is written next to the file, with the '.pdbidx' extension, and
+records where each model, chain and residue starts and ends in the file. With
+an index, pdb_selmodel, pdb_selchain and pdb_selres read only the parts of the
+file they need. Indexes of files that changed are detected and ignored.
+
+Usage:
+    python pdb_index.py <pdb file>
+
+Example:
+    python pdb_index.py 1CTF.pdb  # writes 1CTF.pdb.pdbidx
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+from pdbtools.core.index import index_path, write_index
+from pdbtools.core.streams import file_compression
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+def check_input(args):
+    """Checks whether to read from stdin/file and validates user input/options.
+    """
+
+    if len(args) != 1:
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    if not os.path.isfile(args[0]):
+        emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+        sys.stderr.write(emsg.format(args[0]))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    if file_compression(args[0]) is not None:
+        emsg = 'ERROR!! Compressed files cannot be indexed: \'{}\'\n'
+        sys.stderr.write(emsg.format(args[0]))
+        sys.exit(1)
+
+    return args[0]
+
+
+def index_file(path):
+    """Writes the index of a PDB file and returns a summary line.
+    """
+
+    index = write_index(path)
+    summary = '{}: {} models, {} chains, {} residues\n'
+    return summary.format(index_path(path), len(index['models']),
+                          len(index['chains']), len(index['residues']))
+
+
+def main():
+    # Check Input
+    path = check_input(sys.argv[1:])
+
+    # Do the job
+    try:
+        summary = index_file(path)
+    except (IOError, OSError) as error:
+        emsg = 'ERROR!! Could not write index: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
+    sys.stdout.write(summary)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
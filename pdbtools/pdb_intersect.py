@@ -22,11 +22,15 @@ Atoms are judged equal is their name, altloc, res. name, res. num, insertion
 code and chain fields are the same. Coordinates are taken from the first input
 file. Keeps matching TER/ANISOU records.
 
+The files after the first are read in parallel by a pool of threads (4 by
+default, see -jobs).
+
 Usage:
-    python pdb_intersect.py <pdb file> <pdb file>
+    python pdb_intersect.py [-jobs <n>] <pdb file> <pdb file> [<pdb file> ...]
 
 Example:
     python pdb_intersect.py 1XYZ.pdb 1ABC.pdb
+    python pdb_intersect.py -jobs 8 *.pdb
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -38,17 +42,44 @@ effort to maintain and compile. RIP.
 import collections
 import os
 import sys
+import threading
+
+from pdbtools.core.streams import open_input, write_lines
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
 
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
 
+RECORDS = ('ATOM', 'HETATM', 'ANISOU', 'TER')
+
+
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
     """
 
     # Defaults
     fl = []  # file list
+    jobs = 4
+
+    args = list(args)
+    if '-jobs' in args:
+        idx = args.index('-jobs')
+        value = args[idx + 1] if idx + 1 < len(args) else ''
+        try:
+            jobs = int(value)
+            if jobs < 1:
+                raise ValueError
+        except ValueError:
+            emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+            sys.stderr.write(emsg.format(value))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        del args[idx:idx + 2]
 
     if len(args) >= 1:
         for fn in args:
@@ -58,72 +89,117 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(fn, 'r')
+            fh = open_input(fn)
             fl.append(fh)
 
     else:  # no arguments
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    return fl
+    return (jobs, fl)
+
+
+def _read_atoms(fhandle, candidates):
+    """Returns the set of atom uids of a file that are among `candidates`.
+
+    Atoms that are not candidates are not kept, so memory is bounded by the
+    size of the reference file.
+    """
+
+    atoms = set()
+    for line in fhandle:
+        if line.startswith(RECORDS):
+            atom_uid = line[12:27]
+            if atom_uid in candidates:
+                atoms.add(atom_uid)
+
+    fhandle.close()
+    return atoms
 
 
-def intersect_pdb_files(flist):
+def intersect_pdb_files(flist, jobs=4):
     """Returns atoms common to all input files.
+
+    Atoms of the first file are counted as the other files are read, by a
+    pool of `jobs` threads, and dropped as soon as a file without them has
+    been read. The output follows the order of the first file.
     """
 
     atom_data = collections.OrderedDict()  # atom_uid: line
-    records = ('ATOM', 'HETATM', 'ANISOU', 'TER')
 
     ref = flist[0]
     for line in ref:
 
-        if line.startswith(records):
+        if line.startswith(RECORDS):
             atom_uid = line[12:27]
             atom_data[atom_uid] = line
 
     ref.close()
 
-    common_atoms = set(atom_data.keys())
-    for fhandle in flist[1:]:
-        file_atoms = set()
-
-        for line in fhandle:
-            atom_uid = line[12:27]
-            file_atoms.add(atom_uid)
-
-        fhandle.close()
-
-        common_atoms = common_atoms & file_atoms
+    # atom_uid: number of files with the atom. Shared with the readers, which
+    # only look up keys; only this thread adds or removes them.
+    counts = dict.fromkeys(atom_data, 1)
+
+    others = flist[1:]
+    tasks = queue.Queue()
+    for fhandle in others:
+        tasks.put(fhandle)
+    results = queue.Queue()
+
+    def _worker():
+        while True:
+            try:
+                fhandle = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                results.put((_read_atoms(fhandle, counts), None))
+            except Exception as e:  # report it, in the main thread
+                results.put((None, e))
+
+    for _ in range(min(jobs, len(others))):
+        worker = threading.Thread(target=_worker)
+        worker.daemon = True
+        worker.start()
+
+    for nread in range(2, len(others) + 2):
+        file_atoms, error = results.get()
+        if error is not None:
+            raise error
+
+        for atom_uid in file_atoms:
+            if atom_uid in counts:
+                counts[atom_uid] += 1
+
+        # Atoms missing from any file read so far can not be common to all.
+        missing = [a for a, n in counts.items() if n < nread]
+        for atom_uid in missing:
+            del counts[atom_uid]
+
+        if not counts:  # nothing left in common, stop early
+            break
+
+    # Stop the readers that are still waiting for files
+    while True:
+        try:
+            tasks.get_nowait().close()
+        except queue.Empty:
+            break
 
     for atom in atom_data:
-        if atom in common_atoms:
+        if atom in counts:
             yield atom_data[atom]
 
 
 def main():
     # Check Input
-    pdbflist = check_input(sys.argv[1:])
+    jobs, pdbflist = check_input(sys.argv[1:])
 
     # Do the job
-    new_pdb = intersect_pdb_files(pdbflist)
-
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    new_pdb = intersect_pdb_files(pdbflist, jobs)
+
+    write_lines(new_pdb)
 
     sys.exit(0)
 
@@ -36,6 +36,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -45,7 +48,7 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -60,7 +63,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0], binary=True)
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -78,6 +81,10 @@ def keep_coordinates(fhandle):
     records = ('MODEL ', 'ATOM  ', 'HETATM',
                'ENDMDL', 'END   ',
                'TER   ', 'CONECT', 'MASTER')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records = as_bytes(records)
+
     for line in fhandle:
         if line.startswith(records):
             yield line
@@ -90,22 +97,7 @@ def main():
     # Do the job
     new_pdb = keep_coordinates(pdbfh)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -37,6 +37,8 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -93,7 +95,7 @@ def make_ensemble(f_name_list):
 
         yield fmt_MODEL.format(fileno)
 
-        with open(file_name, 'r') as fhandle:
+        with open_input(file_name) as fhandle:
 
             for line in fhandle:
                 if line.startswith(records):
@@ -119,22 +121,7 @@ def main():
     # Do the job
     new_pdb = make_ensemble(pdbfile_list)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     sys.exit(0)
 
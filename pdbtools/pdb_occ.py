@@ -18,6 +18,9 @@
 """
 Modifies the occupancy column of a PDB file (default 1.0).
 
+Also reads files in the binary format written by pdb_tobin, and then writes
+the result in the same format.
+
 Usage:
     python pdb_occ.py -<occupancy> <pdb file>
 
@@ -34,6 +37,11 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.binary import BinaryFormatError, BinaryStructure
+from pdbtools.core.binary import sniff, write_output
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -44,7 +52,7 @@ def check_input(args):
 
     # Defaults
     option = 1.0
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -69,7 +77,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -86,7 +94,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -100,6 +108,14 @@ def check_input(args):
         sys.stderr.write(emsg.format(option))
         sys.exit(1)
 
+    # Binary structures are read directly
+    try:
+        fh = sniff(fh)
+    except BinaryFormatError as error:
+        emsg = 'ERROR!! Could not read binary file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
     return (option, fh)
 
 
@@ -109,6 +125,10 @@ def alter_occupancy(fhandle, occupancy):
 
     records = ('ATOM', 'HETATM')
     occupancy = "{0:>6.2f}".format(occupancy)
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, occupancy = as_bytes(records), as_bytes(occupancy)
+
     for line in fhandle:
         if line.startswith(records):
             yield line[:54] + occupancy + line[60:]
@@ -116,30 +136,25 @@ def alter_occupancy(fhandle, occupancy):
             yield line
 
 
+def alter_occupancy_binary(structure, occupancy):
+    """Sets the occupancy column of a binary structure to a given value.
+    """
+    return structure.assign('occ', occupancy).pad(60)
+
+
 def main():
     # Check Input
     occupancy, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
+    if isinstance(pdbfh, BinaryStructure):
+        write_output(alter_occupancy_binary(pdbfh, occupancy))
+        sys.exit(0)
+
     new_pdb = alter_occupancy(pdbfh, occupancy)
 
     # Output results
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # Close file handle even if it is sys.stdin, no problem here.
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs a chain of pdb-tools in a single process.
+
+The pipeline is a quoted string of tools separated by '|'. Tools are named
+without the `pdb_` prefix and their option, if any, follows a colon. The
+result is the same as piping the individual scripts together, without the
+cost of starting one interpreter per tool.
+
+Usage:
+    python pdb_pipe.py '<tool[:option]> | <tool[:option]> | ...' <pdb file>
+
+Example:
+    python pdb_pipe.py 'selchain:-A | delhetatm | reres:-1 | tidy' 1CTF.pdb
+    python pdb_pipe.py 'selatom:-CA,C,N,O | tidy' 1CTF.pdb
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+from pdbtools.core.streams import open_input, write_lines
+from pdbtools.pipeline import parse_pipeline, build_pipeline
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+def check_input(args):
+    """Checks whether to read from stdin/file and validates user input/options.
+    """
+
+    # Defaults
+    fh = open_input()  # file handle
+
+    if len(args) == 1:
+        # Pipeline & Pipe
+        if sys.stdin.isatty():  # ensure the PDB data is streamed in
+            emsg = 'ERROR!! No data to process!\n'
+            sys.stderr.write(emsg)
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+    elif len(args) == 2:
+        # Pipeline & File
+        if not os.path.isfile(args[1]):
+            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[1]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        fh = open_input(args[1])
+
+    else:  # Whatever ...
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    # Validate pipeline
+    spec = args[0]
+    try:
+        parse_pipeline(spec)
+    except ValueError as err:
+        emsg = 'ERROR!! Invalid pipeline: {}\n'
+        sys.stderr.write(emsg.format(err))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    return (spec, fh)
+
+
+def main():
+    # Check Input
+    spec, pdbfh = check_input(sys.argv[1:])
+
+    # Do the job
+    new_pdb = build_pipeline(spec, pdbfh)
+
+    write_lines(new_pdb)
+
+    # last line of the script
+    # We can close it even if it is sys.stdin
+    pdbfh.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -34,6 +34,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -44,7 +47,7 @@ def check_input(args):
 
     # Defaults
     option = ' '
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -69,7 +72,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -86,7 +89,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -106,7 +109,10 @@ def pad_line(line):
     size_of_line = len(line)
     if size_of_line < 80:
         padding = 80 - size_of_line + 1
-        line = line.strip('\n') + ' ' * padding + '\n'
+        if isinstance(line, bytes):  # bytes mode, or Python 2
+            line = line.strip(b'\n') + b' ' * padding + b'\n'
+        else:
+            line = line.strip('\n') + ' ' * padding + '\n'
     return line[:81]  # 80 + newline character
 
 
@@ -116,10 +122,15 @@ def alter_segid(fhandle, segment_id):
 
     _pad_line = pad_line
     records = ('ATOM', 'HETATM')
+    segment_id = segment_id.ljust(4)
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, segment_id = as_bytes(records), as_bytes(segment_id)
+
     for line in fhandle:
         if line.startswith(records):
             line = _pad_line(line)
-            yield line[:72] + segment_id.ljust(4) + line[76:]
+            yield line[:72] + segment_id + line[76:]
         else:
             yield line
 
@@ -131,22 +142,7 @@ def main():
     # Do the job
     new_pdb = alter_segid(pdbfh, segment_id)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -18,6 +18,10 @@
 """
 Extracts one or more chains from a PDB file.
 
+Also reads files in the binary format written by pdb_tobin, and then writes
+the result in the same format. If the file was indexed with pdb_index, the
+records of other chains are skipped without being read.
+
 Usage:
     python pdb_selchain.py -<chain id> <pdb file>
 
@@ -35,6 +39,12 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.binary import BinaryFormatError, BinaryStructure
+from pdbtools.core.binary import sniff, write_output
+from pdbtools.core.index import complement, find_index, iter_ranges
+from pdbtools.core.streams import as_bytes, open_input, peek_lines
+from pdbtools.core.streams import write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -45,7 +55,7 @@ def check_input(args):
 
     # Defaults
     option = ''
-    fh = sys.stdin  # file handle
+    fh = open_input(binary=True)  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -70,7 +80,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0], binary=True)
 
     elif len(args) == 2:
         # Two options: option & File
@@ -87,7 +97,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1], binary=True)
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -108,6 +118,14 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
+    # Binary structures are read directly
+    try:
+        fh = sniff(fh)
+    except BinaryFormatError as error:
+        emsg = 'ERROR!! Could not read binary file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
     return (option_set, fh)
 
 
@@ -116,36 +134,54 @@ def select_chain(fhandle, chain_set):
     """
 
     records = ('ATOM', 'HETATM', 'TER', 'ANISOU')
+    fhandle, binary = peek_lines(fhandle)
+    if binary:
+        records, chain_set = as_bytes(records), as_bytes(chain_set)
+
     for line in fhandle:
         if line.startswith(records):
-            if line[21] not in chain_set:
+            if line[21:22] not in chain_set:
                 continue
         yield line
 
 
+def select_chain_indexed(path, chain_set, index, binary=False):
+    """Filters the PDB file for specific chain identifiers, using its index.
+
+    The records of the other chains are skipped without being read. Lines are
+    yielded as bytes with `binary`.
+    """
+
+    skip = [(start, end) for chain, start, end in index['chains']
+            if chain not in chain_set]
+    return iter_ranges(path, complement(skip, index['size']), binary)
+
+
+def select_chain_binary(structure, chain_set):
+    """Filters a binary structure for specific chain identifiers.
+
+    TER and ANISOU records are filtered as in select_chain.
+    """
+    structure = structure.take(structure.where('chain', chain_set))
+    return structure.map_lines(lambda lines: select_chain(lines, chain_set))
+
+
 def main():
     # Check Input
     chain, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    new_pdb = select_chain(pdbfh, chain)
+    if isinstance(pdbfh, BinaryStructure):
+        write_output(select_chain_binary(pdbfh, chain))
+        sys.exit(0)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    index = find_index(pdbfh)
+    if index is not None:
+        new_pdb = select_chain_indexed(pdbfh.name, chain, index, binary=True)
+    else:
+        new_pdb = select_chain(pdbfh, chain)
+
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Extracts one or more models from a PDB file.
+
+If one model is selected, its records are written without the MODEL/ENDMDL
+lines. If several are, they are written as an ensemble, in file order. If the
+file was indexed with pdb_index, only the selected models are read.
+
+Usage:
+    python pdb_selmodel.py -<model number>[,<model number>] <pdb file>
+
+Example:
+    python pdb_selmodel.py -1 1GGR.pdb  # first model
+    python pdb_selmodel.py -1,3 1GGR.pdb  # first and third models
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+from pdbtools.core.index import find_index, iter_ranges
+from pdbtools.core.streams import open_input, write_lines
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+def check_input(args):
+    """Checks whether to read from stdin/file and validates user input/options.
+    """
+
+    # Defaults
+    option = ''
+    fh = open_input()  # file handle
+
+    if not len(args):
+        # Reading from pipe with default option
+        if sys.stdin.isatty():
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+    elif len(args) == 1:
+        # One of two options: option & Pipe OR file & default option
+        if args[0].startswith('-'):
+            option = args[0][1:]
+            if sys.stdin.isatty():  # ensure the PDB data is streamed in
+                emsg = 'ERROR!! No data to process!\n'
+                sys.stderr.write(emsg)
+                sys.stderr.write(__doc__)
+                sys.exit(1)
+
+        else:
+            if not os.path.isfile(args[0]):
+                emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+                sys.stderr.write(emsg.format(args[0]))
+                sys.stderr.write(__doc__)
+                sys.exit(1)
+
+            fh = open_input(args[0])
+
+    elif len(args) == 2:
+        # Two options: option & File
+        if not args[0].startswith('-'):
+            emsg = 'ERROR! First argument is not an option: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        if not os.path.isfile(args[1]):
+            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[1]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        option = args[0][1:]
+        fh = open_input(args[1])
+
+    else:  # Whatever ...
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    # Validate option
+    model_set = set()
+    for model in option.split(','):
+        try:
+            model = int(model)
+            if model < 1:
+                raise ValueError
+        except ValueError:
+            emsg = 'ERROR!! Model number must be a positive integer: \'{}\'\n'
+            sys.stderr.write(emsg.format(model))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        model_set.add(model)
+
+    return (model_set, fh)
+
+
+def _check_found(model_set, found):
+    """Exits with an error if some of the selected models were not found.
+    """
+    missing = sorted(model_set - found)
+    if missing:
+        emsg = 'ERROR!! Model(s) not found in file: {}\n'
+        sys.stderr.write(emsg.format(','.join(str(m) for m in missing)))
+        sys.exit(1)
+
+
+def select_model(fhandle, model_set):
+    """Outputs the records of the selected models.
+
+    Stops reading at the end of the last selected model.
+    """
+
+    ensemble = len(model_set) > 1
+    found = set()
+
+    in_model = False
+    for line in fhandle:
+        if line.startswith('MODEL '):
+            try:
+                number = int(line[6:].split()[0])
+            except (ValueError, IndexError):
+                number = None
+            in_model = number in model_set
+            if in_model:
+                found.add(number)
+                if ensemble:
+                    yield line
+
+        elif line.startswith('ENDMDL'):
+            if in_model:
+                if ensemble:
+                    yield line
+                if len(found) == len(model_set):  # nothing else to read
+                    return
+            in_model = False
+
+        elif in_model:
+            yield line
+
+    _check_found(model_set, found)
+
+
+def select_model_indexed(path, model_set, index):
+    """Outputs the records of the selected models, reading only those.
+
+    Uses the index of the file, see pdb_index.
+    """
+
+    ensemble = len(model_set) > 1
+
+    entries = [m for m in index['models'] if m[0] in model_set]
+    _check_found(model_set, set(m[0] for m in entries))
+
+    ranges = [(start, end) for _, start, end in entries]
+    for line in iter_ranges(path, ranges):
+        if ensemble or not line.startswith(('MODEL ', 'ENDMDL')):
+            yield line
+
+
+def main():
+    # Check Input
+    model_set, pdbfh = check_input(sys.argv[1:])
+
+    # Do the job
+    index = find_index(pdbfh)
+    if index is not None:
+        new_pdb = select_model_indexed(pdbfh.name, model_set, index)
+    else:
+        new_pdb = select_model(pdbfh, model_set)
+
+    write_lines(new_pdb)
+
+    # last line of the script
+    # We can close it even if it is sys.stdin
+    pdbfh.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,8 @@ Selects residues by their index, piecewise or in a range.
 
 The range option has three components: start, end, and step. Start and end
 are optional and if ommitted the range will start at the first residue or
-end at the last, respectively.
+end at the last, respectively. If the file was indexed with pdb_index, the
+records of other residues are skipped without being read.
 
 Usage:
     python pdb_selres.py -[resid]:[resid]:[step] <pdb file>
@@ -44,6 +45,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.index import complement, find_index, iter_ranges
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -70,7 +74,7 @@ def check_input(args):
                 sys.stderr.write(emsg.format(value))
                 sys.exit(1)
 
-    def _validate_opt_range(value, resid_list):
+    def _validate_opt_range(value):
         """Returns a numerical range or dies trying"""
 
         # Validate formatting
@@ -116,13 +120,11 @@ def check_input(args):
             sys.stderr.write(emsg.format(start, end))
             sys.exit(1)
 
-        # Build range
-        bounded_resid = [r for r in resid_list if start <= r <= end]
-        return bounded_resid[::step]
+        return (start, end, step)
 
     # Defaults
     option = '::'
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -147,7 +149,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0])
 
     elif len(args) == 2:
         # Two options: option & File
@@ -164,41 +166,61 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1])
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    # Read file handle to extract residue numbers
-    resid_list = []
-    records = ('ATOM', 'HETATM', 'TER', 'ANISOU')
-    prev_res = None
-    for line in fh:
-        if line.startswith(records):
-            res_id = line[21:26]  # include chain ID
-            if res_id != prev_res:
-                prev_res = res_id
-                resid_list.append(int(line[22:26]))
-
-    fh.seek(0)  # rewind
-
-    residue_range = set()  # stores all the residues to write.
+    residue_range = []  # (start, end, step) of the residues to write.
     for entry in option.split(','):
         if ':' in entry:
-            resrange = _validate_opt_range(entry, resid_list)
-            residue_range.update(resrange)
+            resrange = _validate_opt_range(entry)
+            residue_range.append(resrange)
         else:
             singleres = _validate_opt_numeric(entry)
-            residue_range.add(singleres)
+            residue_range.append((singleres, singleres, 1))
 
     return (residue_range, fh)
 
 
+def _residue_selector(residue_range):
+    """Returns a function telling whether to keep the next residue read.
+
+    Each range is a (start, end, step) tuple, single residue numbers are also
+    accepted. Each range counts the residues that fall within its bounds and
+    keeps every step-th one.
+    """
+
+    ranges = []
+    for entry in residue_range:
+        if isinstance(entry, int):
+            entry = (entry, entry, 1)
+        ranges.append(entry)
+
+    counters = [0] * len(ranges)  # no. of residues seen within each range
+
+    def keep_residue(resid):
+        keep = False
+        for idx, (start, end, step) in enumerate(ranges):
+            if start <= resid <= end:
+                if not counters[idx] % step:
+                    keep = True
+                counters[idx] += 1
+        return keep
+
+    return keep_residue
+
+
 def select_residues(fhandle, residue_range):
     """Outputs residues within a certain numbering range.
+
+    Ranges are applied as residues are read, in a single pass.
     """
 
+    keep_residue = _residue_selector(residue_range)
+
+    keep = False
     prev_res = None
     records = ('ATOM', 'HETATM', 'TER', 'ANISOU')
     for line in fhandle:
@@ -207,36 +229,49 @@ def select_residues(fhandle, residue_range):
             res_id = line[21:26]  # include chain ID
             if res_id != prev_res:
                 prev_res = res_id
+                keep = keep_residue(int(line[22:26]))
 
-            if int(line[22:26]) not in residue_range:
+            if not keep:
                 continue
 
         yield line
 
 
+def select_residues_indexed(path, residue_range, index):
+    """Outputs residues within a certain numbering range, using the index.
+
+    The records of other residues are skipped without being read.
+    """
+
+    keep_residue = _residue_selector(residue_range)
+
+    skip = []
+    keep = False
+    prev_res = None
+    for key, start, end in index['residues']:
+        res_id = key[:5]  # include chain ID
+        if res_id != prev_res:
+            prev_res = res_id
+            keep = keep_residue(int(key[1:5]))
+
+        if not keep:
+            skip.append((start, end))
+
+    return iter_ranges(path, complement(skip, index['size']))
+
+
 def main():
     # Check Input
     resrange, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    new_pdb = select_residues(pdbfh, resrange)
-
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    index = find_index(pdbfh)
+    if index is not None:
+        new_pdb = select_residues_indexed(pdbfh.name, resrange, index)
+    else:
+        new_pdb = select_residues(pdbfh, resrange)
+
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -34,8 +34,11 @@ following order:
     - CONECT, sorted by the serial number of the central (first) atom
 
 MASTER, TER, END statements are removed. Headers (HEADER, REMARK, etc) are kept
-and placed first. Does NOT support multi-model files. Use pdb_splitmodel, then
-pdb_sort on each model, and then pdb_mkensemble.
+and placed first. In multi-model files, each model is sorted independently.
+
+Large files are sorted in chunks that are temporarily written to disk. The
+amount of memory used before that happens (in MB, default 1024) can be set
+with the PDBTOOLS_SORT_MEMORY environment variable.
 
 Usage:
     python pdb_sort.py -<option> <pdb file>
@@ -52,12 +55,22 @@ data to another. They are based on old FORTRAN77 code that was taking too much
 effort to maintain and compile. RIP.
 """
 
+import heapq
 import os
 import sys
+import tempfile
+
+from pdbtools.core.streams import open_input, write_lines
 
 __author__ = ["Joao Rodrigues", "Joao M.C. Teixeira"]
 __email__ = ["j.p.g.l.m.rodrigues@gmail.com", "joaomcteixeira@gmail.com"]
 
+# Records are sorted in memory up to this limit (in MB), then sorted chunks
+# are written to temporary files and merged. Set PDBTOOLS_SORT_MEMORY to
+# change it.
+MEMORY_LIMIT = int(os.environ.get('PDBTOOLS_SORT_MEMORY', 1024)) * 1024 * 1024
+RECORD_OVERHEAD = 200  # approx. bytes per record besides the line itself
+
 
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
@@ -65,7 +78,7 @@ def check_input(args):
 
     # Defaults
     option = 'CR'
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -90,7 +103,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0])
 
     elif len(args) == 2:
         # Two options: option & File
@@ -107,7 +120,7 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1])
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
@@ -126,96 +139,171 @@ def check_input(args):
     return (option, fh)
 
 
-def sort_file(fhandle, sorting_keys):
+class _RecordSorter(object):
+    """Sorts lines by a key, spilling sorted runs to disk above a memory limit.
+
+    Lines are kept in memory until `add` reports that the limit was exceeded
+    and `spill` is called. Each spill writes one sorted run to a temporary
+    file. Iterating over the sorter merges all runs with the lines still in
+    memory. Ties keep the order in which lines were added.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.lines = []
+        self.runs = []  # temporary files, each holding one sorted run
+        self.size = 0  # rough estimate of memory used, in bytes
+
+    def add(self, line):
+        self.lines.append(line)
+        self.size += len(line) + RECORD_OVERHEAD
+
+    def spill(self):
+        if not self.lines:
+            return
+
+        self.lines.sort(key=self.key)
+        run = tempfile.TemporaryFile(mode='w+')
+        run.writelines(self.lines)
+        run.seek(0)
+        self.runs.append(run)
+
+        self.lines = []
+        self.size = 0
+
+    def __iter__(self):
+        self.lines.sort(key=self.key)
+        if not self.runs:
+            for line in self.lines:
+                yield line
+            return
+
+        def _decorate(source, rank):
+            key = self.key
+            for pos, line in enumerate(source):
+                yield (key(line), rank, pos, line)
+
+        sources = self.runs + [self.lines]
+        merged = heapq.merge(*[_decorate(src, rank)
+                               for rank, src in enumerate(sources)])
+        for item in merged:
+            yield item[3]
+
+        for run in self.runs:
+            run.close()
+
+
+def sort_file(fhandle, sorting_keys, memory_limit=None):
     """Sorts the contents of the PDB file.
+
+    Records are sorted with a single composite key. If the estimated size of
+    the records held in memory goes above `memory_limit` (in bytes), sorted
+    chunks are written to temporary files and merged at the end. Each model of
+    a multi-model file is sorted independently.
     """
 
-    # Sort keys
-    chain_key = lambda x: x[21]  # chain id
-    resid_key = lambda x: (int(x[22:26]), x[26])  # resid, icode
-    atoms_key = lambda x: int(x[6:11])  # atom serial
-    altloc_key = lambda x: x[16]
-    icode_key = lambda x: x[26]
+    if memory_limit is None:
+        memory_limit = MEMORY_LIMIT
+
+    by_chain = 'C' in sorting_keys
+    by_resid = 'R' in sorting_keys
 
     # ignored fields
     ignored = (('END', 'MASTER', 'TER'))
 
-    # First, separate records
-    header_data = []
-    atomic_data = []
-    hetatm_data = []
-    anisou_data = {}  # Matches a unique atom uid
-    conect_data = []
-    chains_list = []  # list of chain identifiers in order they were read
+    def new_block():
+        """Returns the data structures to sort one model."""
+
+        # Map original chain orders to integers
+        # To circumvent mixed chains when sorting by residue number
+        chain_order = {}
+
+        # chain, [resid, icode,] altloc, serial
+        def record_key(x):
+            if by_chain:
+                chain = x[21]
+            else:  # keep original order
+                chain = chain_order[x[21]]
+
+            if by_resid:
+                return (chain, int(x[22:26]), x[26], x[16], int(x[6:11]))
+            return (chain, x[16], int(x[6:11]))
+
+        # Sort conect statements by the central atom
+        # Share the same format at ATOM serial number
+        conect_key = lambda x: int(x[6:11])
+
+        return (
+            [],  # header_data
+            _RecordSorter(record_key),  # atomic_data
+            _RecordSorter(record_key),  # hetatm_data
+            {},  # anisou_data, matches a unique atom uid
+            _RecordSorter(conect_key),  # conect_data
+            chain_order,
+        )
+
+    def flush_block(block):
+        """Yields the records of one model in order:
+            - ATOMs intercalated with ANISOU
+            - HETATM
+            - CONECT
+        """
+
+        header_data, atomic_data, hetatm_data, anisou_data, conect_data, _ = block
+        for section in (header_data, atomic_data, hetatm_data, conect_data):
+            for line in section:
+
+                yield line
+
+                atom_uid = line[12:27]
+                anisou_record = anisou_data.get(atom_uid)
+                if anisou_record:
+                    yield anisou_record
+
+    block = new_block()
+    header_data, atomic_data, hetatm_data, anisou_data, conect_data, chain_order = block
+    sorters = (atomic_data, hetatm_data, conect_data)
     for line in fhandle:
-        if line.startswith('ATOM'):
-            atomic_data.append(line)
-            chains_list.append(line[21])
-        elif line.startswith('HETATM'):
-            hetatm_data.append(line)
-            chains_list.append(line[21])
+        if line.startswith(('ATOM', 'HETATM')):
+            chain = line[21]
+            if chain not in chain_order:
+                chain_order[chain] = len(chain_order)
+
+            if line.startswith('ATOM'):
+                atomic_data.add(line)
+            else:
+                hetatm_data.add(line)
+
         elif line.startswith('ANISOU'):
             atom_uid = line[12:27]  # aname, chain, resid, resname, & alt/icode
             anisou_data[atom_uid] = line
+            continue
         elif line.startswith('CONECT'):
-            conect_data.append(line)
+            conect_data.add(line)
+        elif line.startswith(('MODEL', 'ENDMDL')):
+            # Sort each model on its own
+            for sorted_line in flush_block(block):
+                yield sorted_line
+            yield line
+
+            block = new_block()
+            header_data, atomic_data, hetatm_data, anisou_data, conect_data, chain_order = block
+            sorters = (atomic_data, hetatm_data, conect_data)
+            continue
         elif line.startswith(ignored):
             continue
-        elif line.startswith(('MODEL', 'ENDMDL')):
-            emsg = 'ERROR!! Sorting does not support multi-model files\n'
-            sys.stderr.write(emsg)
-            sys.stderr.write(__doc__)
-            sys.exit(1)
         elif line.strip():  # remove empty lines
             header_data.append(line)
+            continue
+        else:
+            continue
+
+        if sum(s.size for s in sorters) > memory_limit:
+            for sorter in sorters:
+                sorter.spill()
 
-    # Map original chain orders to integers
-    # To circumvent mixed chains when sorting by residue number
-    chain_order = {}
-    ordinal = 0
-    for chain in chains_list:
-        if chain not in chain_order:
-            chain_order[chain] = ordinal
-            ordinal += 1
-    del chains_list
-
-    # Always sort by altloc
-    atomic_data.sort(key=atoms_key)
-    atomic_data.sort(key=altloc_key)
-    hetatm_data.sort(key=atoms_key)
-    hetatm_data.sort(key=altloc_key)
-
-    if 'R' in sorting_keys:
-        atomic_data.sort(key=icode_key)
-        atomic_data.sort(key=resid_key)
-        hetatm_data.sort(key=icode_key)
-        hetatm_data.sort(key=resid_key)
-
-    if 'C' in sorting_keys:
-        atomic_data.sort(key=chain_key)
-        hetatm_data.sort(key=chain_key)
-    else:  # restore original order
-        chain_key = lambda x: chain_order.get(x[21])
-        atomic_data.sort(key=chain_key)
-        hetatm_data.sort(key=chain_key)
-
-    # Sort conect statements by the central atom
-    # Share the same format at ATOM serial number
-    conect_data.sort(key=atoms_key)
-
-    # Now return everything in order:
-    #  - ATOMs intercalated with ANISOU
-    #  - HETATM
-    #  - CONECT
-    sorted_data = header_data + atomic_data + hetatm_data + conect_data
-    for line in sorted_data:
-
-        yield line
-
-        atom_uid = line[12:27]
-        anisou_record = anisou_data.get(atom_uid)
-        if anisou_record:
-            yield anisou_record
+    for sorted_line in flush_block(block):
+        yield sorted_line
 
 
 def main():
@@ -225,22 +313,7 @@ def main():
     # Do the job
     new_pdb = sort_file(pdbfh, chain)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_pdb):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_pdb)
 
     # last line of the script
     # We can close it even if it is sys.stdin
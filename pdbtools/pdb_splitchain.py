@@ -18,11 +18,22 @@
 """
 Splits a PDB file into several, each containing one chain.
 
+Files are named after the input file (or 'output' when reading from stdin),
+e.g. 1CTF_A.pdb, and written as the input is read, so memory use does not
+depend on the size of the structure.
+
+Options:
+    -outdir <dir>     directory for the new files (default: current directory)
+    -prefix <name>    root of the new file names
+    -gzip             write gzip-compressed files (.pdb.gz)
+
 Usage:
-    python pdb_splitchain.py <pdb file>
+    python pdb_splitchain.py [-outdir <dir>] [-prefix <name>] [-gzip] <pdb file>
 
 Example:
     python pdb_splitchain.py 1CTF.pdb
+    python pdb_splitchain.py -outdir chains -gzip 1CTF.pdb
+    cat 1CTF.pdb | python pdb_splitchain.py -prefix 1CTF
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -34,6 +45,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.filepool import FilePool, output_prefix
+from pdbtools.core.streams import open_input
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -45,65 +59,113 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    options = {
+        '-outdir': '.',
+        '-prefix': None,
+        '-gzip': False,
+    }
+    fh = open_input()  # file handle
+
+    positional = []
+    seen = set()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg not in options:
+            positional.append(arg)
+            continue
+
+        if arg in seen:
+            emsg = 'ERROR!! Invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        seen.add(arg)
+
+        if arg == '-gzip':
+            options[arg] = True
+        elif not args:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        else:
+            options[arg] = args.pop(0)
 
-    if not len(args):
+    if not len(positional):
         # Reading from pipe with default option
         if sys.stdin.isatty():
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-    elif len(args) == 1:
-        if not os.path.isfile(args[0]):
+    elif len(positional) == 1:
+        if not os.path.isfile(positional[0]):
             emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(emsg.format(positional[0]))
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(positional[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
-        sys.stderr.write(emsg.format(len(args)))
+        sys.stderr.write(emsg.format(len(positional)))
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    return fh
+    outdir = options['-outdir']
+    if os.path.exists(outdir) and not os.path.isdir(outdir):
+        emsg = 'ERROR!! Output path is not a directory: \'{}\'\n'
+        sys.stderr.write(emsg.format(outdir))
+        sys.exit(1)
+
+    options = dict((k[1:], v) for k, v in options.items())
+    return (options, fh)
 
 
-def split_chain(fhandle):
+def split_chain(fhandle, outdir='.', prefix=None, gzip=False, max_open=None):
     """Splits the contents of the PDB file into new files, each containing a chain
-    of the original file
+    of the original file.
+
+    Lines are written as they are read, through a pool of at most `max_open`
+    open files. Returns the paths of the new files.
     """
 
-    fname_root = fhandle.name[:-4] if fhandle.name != '<stdin>' else 'output'
-    basename = os.path.basename(fname_root)
+    if prefix is None:
+        prefix = output_prefix(fhandle)
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
 
-    chain_data = {}  # {chain_id: lines}
+    template = os.path.join(outdir, prefix + '_{}.pdb')
+    if gzip:
+        template += '.gz'
 
+    outfh = None
     prev_chain = None
     records = ('ATOM', 'HETATM', 'ANISOU', 'TER')
-    for line in fhandle:
-        if line.startswith(records):
-            line_chain = line[21]
-            if line_chain != prev_chain:
-                if line_chain not in chain_data:
-                    chain_data[line_chain] = []
-                prev_chain = line_chain
-            chain_data[line_chain].append(line)
+    with FilePool(max_open, compress=gzip) as pool:
+        for line in fhandle:
+            if line.startswith(records):
+                line_chain = line[21]
+                if line_chain != prev_chain:
+                    outfh = pool.get(template.format(line_chain))
+                    prev_chain = line_chain
+                outfh.write(line)
 
-    for chain_id in sorted(chain_data.keys()):
-        lines = chain_data[chain_id]
-        with open(basename + '_' + chain_id + '.pdb', 'w') as fh:
-            fh.write(''.join(lines))
+    return pool.paths
 
 
 def main():
     # Check Input
-    pdbfh = check_input(sys.argv[1:])
+    options, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    split_chain(pdbfh)
+    try:
+        split_chain(pdbfh, **options)
+    except (IOError, OSError) as error:
+        emsg = 'ERROR!! Could not write output files: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -34,6 +34,9 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.filepool import output_prefix
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -45,7 +48,7 @@ def check_input(args):
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -60,7 +63,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -76,20 +79,17 @@ def split_model(fhandle):
     MODEL in the original file
     """
 
-    fname_root = fhandle.name[:-4] if fhandle.name != '<stdin>' else 'pdbfile'
-    basename = os.path.basename(fname_root)
+    basename = output_prefix(fhandle, default='pdbfile')
 
     model_lines = []
     records = ('ATOM', 'HETATM', 'ANISOU', 'TER')
     for line in fhandle:
         if line.startswith('MODEL'):
             model_no = line[10:14].strip()
-            fh = open(basename + '_' + model_no + '.pdb', 'w')
             model_lines = []
 
         elif line.startswith('ENDMDL'):
-            fh.write(''.join(model_lines))
-            fh.close()
+            write_lines(model_lines, basename + '_' + model_no + '.pdb')
 
         elif line.startswith(records):
             model_lines.append(line)
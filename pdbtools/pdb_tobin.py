@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Converts a PDB file to the binary, columnar `pdb-tools` format.
+
+Binary files are read directly by the tools that change or select a single
+column (pdb_b, pdb_occ, pdb_chain, pdb_selchain), which then skip parsing the
+PDB text, and converted back to PDB with pdb_frombin. Coordinates are stored
+in double precision, or in single precision with the -float32 option (which
+is exact for the 3 decimals of the PDB format).
+
+Usage:
+    python pdb_tobin.py [-float32] <pdb file> > <bin file>
+
+Example:
+    python pdb_tobin.py 1CTF.pdb > 1CTF.bin
+    python pdb_b.py -10 1CTF.bin | python pdb_frombin.py > 1CTF_b10.pdb
+
+This program is part of the `pdb-tools` suite of utilities and should not be
+distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
+files using the terminal, and can be used sequentially, with one tool streaming
+data to another. They are based on old FORTRAN77 code that was taking too much
+effort to maintain and compile. RIP.
+"""
+
+import os
+import sys
+
+from pdbtools.core.binary import from_pdb, write_output
+from pdbtools.core.records import RecordError
+from pdbtools.core.streams import open_input
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+def check_input(args):
+    """Checks whether to read from stdin/file and validates user input/options.
+    """
+
+    # Defaults
+    option = ''
+    fh = open_input()  # file handle
+
+    if not len(args):
+        # Reading from pipe with default option
+        if sys.stdin.isatty():
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+    elif len(args) == 1:
+        # One of two options: option & Pipe OR file & default option
+        if args[0].startswith('-'):
+            option = args[0][1:]
+            if sys.stdin.isatty():  # ensure the PDB data is streamed in
+                emsg = 'ERROR!! No data to process!\n'
+                sys.stderr.write(emsg)
+                sys.stderr.write(__doc__)
+                sys.exit(1)
+
+        else:
+            if not os.path.isfile(args[0]):
+                emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+                sys.stderr.write(emsg.format(args[0]))
+                sys.stderr.write(__doc__)
+                sys.exit(1)
+
+            fh = open_input(args[0])
+
+    elif len(args) == 2:
+        # Two options: option & File
+        if not args[0].startswith('-'):
+            emsg = 'ERROR! First argument is not an option: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        if not os.path.isfile(args[1]):
+            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+            sys.stderr.write(emsg.format(args[1]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+
+        option = args[0][1:]
+        fh = open_input(args[1])
+
+    else:  # Whatever ...
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    # Validate option
+    if option not in ('', 'float32'):
+        emsg = 'ERROR!! Unknown option: \'-{}\'\n'
+        sys.stderr.write(emsg.format(option))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    return (option == 'float32', fh)
+
+
+def convert_to_binary(fhandle, float32=False):
+    """Returns the structure in a PDB file as a BinaryStructure.
+    """
+    return from_pdb(fhandle, float32=float32)
+
+
+def main():
+    # Check Input
+    float32, pdbfh = check_input(sys.argv[1:])
+
+    if sys.stdout.isatty():
+        emsg = 'ERROR!! Refusing to write binary data to a terminal\n'
+        sys.stderr.write(emsg)
+        sys.exit(1)
+
+    # Do the job
+    try:
+        structure = convert_to_binary(pdbfh, float32)
+    except RecordError as error:
+        emsg = 'ERROR!! Could not convert PDB file: {}\n'
+        sys.stderr.write(emsg.format(error))
+        sys.exit(1)
+
+    write_output(structure)
+
+    # last line of the script
+    # We can close it even if it is sys.stdin
+    pdbfh.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,7 +18,11 @@
 """
 Rudimentarily converts the PDB file to mmCIF format.
 
-Will convert only the coordinate section.
+Will convert only the coordinate section. Models are numbered as in the MODEL
+records. Polymer chains (ATOM records, and HETATM records before the TER
+record or the end of the chain) are numbered sequentially in label_seq_id,
+and chains with the same sequence are the same entity; other HETATM residues
+form one entity per residue name.
 
 Usage:
     python pdb_tocif.py <pdb file>
@@ -34,18 +38,53 @@ effort to maintain and compile. RIP.
 """
 
 import os
+import re
 import sys
 
+from pdbtools import cif
+from pdbtools.core.filepool import output_prefix
+from pdbtools.core.streams import open_input, write_lines
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
 
+# Items of the _atom_site loop, in the order they are written.
+_atom_site_items = (
+    'group_PDB',
+    'id',
+    'type_symbol',
+    'label_atom_id',
+    'label_alt_id',
+    'label_comp_id',
+    'label_asym_id',
+    'label_entity_id',
+    'label_seq_id',
+    'pdbx_PDB_ins_code',
+    'Cartn_x',
+    'Cartn_y',
+    'Cartn_z',
+    'occupancy',
+    'B_iso_or_equiv',
+    'pdbx_formal_charge',
+    'auth_seq_id',
+    'auth_comp_id',
+    'auth_asym_id',
+    'auth_atom_id',
+    'pdbx_PDB_model_num',
+)
+
+
+# Placeholder of an entity id, by position in the list of held entities.
+_token_re = re.compile('\x00([0-9]+)\x00')
+
+
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -60,7 +99,7 @@ def check_input(args):
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(args[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
@@ -80,105 +119,225 @@ def pad_line(line):
     return line[:81]  # 80 + newline character
 
 
+def _close_polymers(polymers, chains):
+    """Ends the polymers of some chains: their sequence is now complete.
+
+    Returns the number of polymers ended.
+    """
+
+    n_closed = 0
+    for chain in chains:
+        slot = polymers.pop(chain, None)
+        if slot is not None:
+            slot[1] = (True, tuple(slot[1][1]))
+            n_closed += 1
+    return n_closed
+
+
+def _release(pending, slots, held, entities):
+    """Returns the held output, with entity ids in place of their tokens.
+
+    `slots` are the [token, key] of the entities seen while output was held,
+    in order of appearance, and ids are given in that order. Empties all
+    three containers of held output.
+    """
+
+    ids = []
+    for _, key in slots:
+        entity = entities.get(key)
+        if entity is None:
+            entity = entities[key] = str(len(entities) + 1)
+        ids.append(entity)
+
+    text = ''.join(pending)
+    if ids:
+        text = _token_re.sub(lambda m: ids[int(m.group(1))], text)
+    del pending[:]
+    del slots[:]
+    held.clear()
+    return text
+
+
+def _residue_template(record, resname, chainid, entity, seq_id, icode,
+                      resnum, model_no):
+    """Returns the %-format template of the rows of the atoms of a residue.
+
+    Only the atom fields are left to fill in: serial, element, name, altloc,
+    coordinates, occupancy, b-factor, charge, and name again.
+    """
+
+    # The spacing here is just aesthetic purposes when printing the file
+    residue = '{:3s} {:3s} {:1s} {:5s} {:1s}'.format(resname, chainid, entity,
+                                                     seq_id, icode)
+    auth = '{:5s} {:3s} {:1s}'.format(resnum, resname, chainid)
+
+    return ''.join((
+        '{:<6s} %5d %-2s %-6s %-1s '.format(record),
+        residue.replace('%', '%%'),
+        ' %10.3f %10.3f %10.3f %10.3f %10.3f %-1s ',
+        auth.replace('%', '%%'),
+        ' %-4s {:1d}\n'.format(model_no),
+    ))
+
+
 def convert_to_mmcif(fhandle):
     """Converts a structure in PDB format to mmCIF format.
     """
 
     _pad_line = pad_line
 
-    # The spacing here is just aesthetic purposes when printing the file
-    _a = '{:<6s} {:5d} {:2s} {:6s} {:1s} {:3s} {:3s} {:1s} {:5s} {:1s} '
-    _a += '{:10.3f} {:10.3f} {:10.3f} {:10.3f} {:10.3f} {:1s} '
-    _a += '{:5s} {:3s} {:1s} {:4s} {:1d}\n'
-
     yield '# Converted to mmCIF by pdb-tools\n'
     yield '#\n'
 
     # Headers
-    fname, _ = os.path.splitext(os.path.basename(fhandle.name))
-    if fname == '<stdin>':
-        fname = 'cell'
+    fname = output_prefix(fhandle, default='cell')
     yield 'data_{}\n'.format(fname)
 
     yield '#\n'
-    yield 'loop_\n'
-    yield '_atom_site.group_PDB\n'
-    yield '_atom_site.id\n'
-    yield '_atom_site.type_symbol\n'
-    yield '_atom_site.label_atom_id\n'
-    yield '_atom_site.label_alt_id\n'
-    yield '_atom_site.label_comp_id\n'
-    yield '_atom_site.label_asym_id\n'
-    yield '_atom_site.label_entity_id\n'
-    yield '_atom_site.label_seq_id\n'
-    yield '_atom_site.pdbx_PDB_ins_code\n'
-    yield '_atom_site.Cartn_x\n'
-    yield '_atom_site.Cartn_y\n'
-    yield '_atom_site.Cartn_z\n'
-    yield '_atom_site.occupancy\n'
-    yield '_atom_site.B_iso_or_equiv\n'
-    yield '_atom_site.pdbx_formal_charge\n'
-    yield '_atom_site.auth_seq_id\n'
-    yield '_atom_site.auth_comp_id\n'
-    yield '_atom_site.auth_asym_id\n'
-    yield '_atom_site.auth_atom_id\n'
-    yield '_atom_site.pdbx_PDB_model_num\n'
+    yield cif.format_loop_header('atom_site', _atom_site_items)
 
     # Coordinate data
     model_no = 1
     serial = 0
 
+    # The entity of a polymer is only known once its sequence is, at the end
+    # of the chain. Until then, rows get a token instead of the entity id and
+    # output is held back, to keep the rows in order.
+    entities = {}  # (True, sequence) or (False, residue name): entity id
+    polymers = {}  # chains with ATOM records and no TER yet: slot
+    slots = []  # [token, key] of entities seen while output is held
+    held = {}  # key: slot, of the residue names in slots
+    pending = []  # held output
+    seq_ids = {}  # chain: last label_seq_id, in this model
+    waters = ('HOH', 'WAT', 'DOD', 'H2O')
+
+    names = {}  # columns 13-16: quoted atom name
+    elements = {}  # columns 77-80: (element, charge)
+
+    # The rows of each residue are formatted at once, with the same template
+    res_uid = None  # record + residue of the current template
+    template = None
+    values, n_rows = [], 0  # of the rows of the current residue
+    chain = ' '  # of the last residue
+
     records = (('ATOM', 'HETATM'))
     for line in fhandle:
         if line.startswith(records):
-            line = _pad_line(line)
+            if len(line) < 81:
+                line = _pad_line(line)
+
+            uid = line[0:6] + line[17:27]
+            if uid != res_uid:  # new residue
+                if n_rows:
+                    pending.append((template * n_rows) % tuple(values))
+                    values, n_rows = [], 0
+                res_uid = uid
+
+                # Chains are contiguous: a new chain ends open polymers
+                chain = line[21]
+                if polymers and chain not in polymers:
+                    _close_polymers(polymers, list(polymers))
+                if pending and not polymers:
+                    yield _release(pending, slots, held, entities)
+
+                record = line[0:6].strip()
+                resname = line[17:20]
+                if record == 'ATOM' and chain not in polymers:
+                    slot = ['\x00{}\x00'.format(len(slots)), (True, [])]
+                    slots.append(slot)
+                    polymers[chain] = slot
+
+                polymer = polymers.get(chain)
+                if polymer is not None and resname.strip() not in waters:
+                    entity = polymer[0]
+                    polymer[1][1].append(resname.strip())
+                    seq_id = seq_ids.get(chain, 0) + 1
+                    seq_ids[chain] = seq_id
+                    seq_id = str(seq_id)
+                else:
+                    entity_key = (False, resname)
+                    entity = entities.get(entity_key)
+                    if entity is None:
+                        slot = held.get(entity_key)
+                        if slot is None:
+                            slot = ['\x00{}\x00'.format(len(slots)),
+                                    entity_key]
+                            slots.append(slot)
+                            held[entity_key] = slot
+                        entity = slot[0]
+                    seq_id = '.'
+
+                chainid = chain
+                if chainid == ' ':
+                    chainid = '?'
+
+                resnum = line[22:26].strip()
+                icode = line[26]
+                if icode == ' ':
+                    icode = '?'
+
+                template = _residue_template(record, resname, chainid,
+                                             entity, seq_id, icode, resnum,
+                                             model_no)
 
-            record = line[0:6].strip()
             serial += 1
 
-            element = line[76:78].strip()
-            if not element:
-                element = '?'
-
-            atname = line[12:16].strip()
-            atname = atname.replace('"', "'")
-            if "'" in atname:
-                atname = '"{}"'.format(atname)
+            atname = names.get(line[12:16])
+            if atname is None:
+                atname = line[12:16].strip()
+                atname = cif.quote(atname.replace('"', "'"))
+                names[line[12:16]] = atname
 
             altloc = line[16]
             if altloc == ' ':
                 altloc = '?'
 
-            resname = line[17:20]
-            chainid = line[21]
-            if chainid == ' ':
-                chainid = '?'
-
-            resnum = line[22:26].strip()
-            icode = line[26]
-            if icode == ' ':
-                icode = '?'
-
-            x = float(line[30:38])
-            y = float(line[38:46])
-            z = float(line[46:54])
-
-            occ = float(line[54:60])
-            bfac = float(line[60:66])
-
-            charge = line[78:80].strip()
-            if charge == '':
-                charge = '?'
-
-            yield _a.format(record, serial, element, atname, altloc,
-                            resname, chainid, '?', resnum, icode, x, y, z, occ,
-                            bfac, charge, resnum, resname, chainid, atname,
-                            model_no)
-
-        elif line.startswith('ENDMDL'):
-            model_no += 1
-        else:
-            continue
+            element_charge = elements.get(line[76:80])
+            if element_charge is None:
+                element = line[76:78].strip() or '?'
+                charge = line[78:80].strip() or '?'
+                element_charge = elements[line[76:80]] = (element, charge)
+            element, charge = element_charge
+
+            values.extend((serial, element, atname, altloc,
+                           float(line[30:38]), float(line[38:46]),
+                           float(line[46:54]), float(line[54:60]),
+                           float(line[60:66]), charge, atname))
+            n_rows += 1
+
+        elif line.startswith(('TER', 'MODEL', 'ENDMDL')):
+            # TER ends the polymer of its chain, or of the last chain if
+            # blank, and models end all polymers.
+            if line.startswith('TER'):
+                closed = [line[21:22].strip() or chain]
+            else:
+                closed = list(polymers)
+
+            if _close_polymers(polymers, closed):
+                res_uid = None  # no more rows with their tokens
+
+            if line.startswith('MODEL'):
+                try:  # large ensembles overflow columns 11-14
+                    model_no = int(line[6:].split()[0])
+                except (ValueError, IndexError):
+                    pass
+                seq_ids = {}
+                res_uid = None
+
+            elif line.startswith('ENDMDL'):
+                model_no += 1  # unless the next MODEL says otherwise
+                res_uid = None
+
+            if res_uid is None and n_rows:
+                pending.append((template * n_rows) % tuple(values))
+                values, n_rows = [], 0
+            if not polymers and pending:
+                yield _release(pending, slots, held, entities)
+
+    if n_rows:
+        pending.append((template * n_rows) % tuple(values))
+    _close_polymers(polymers, list(polymers))
+    yield _release(pending, slots, held, entities)
 
     yield '#'  # close block
 
@@ -190,22 +349,7 @@ def main():
     # Do the job
     new_cif = convert_to_mmcif(pdbfh)
 
-    try:
-        _buffer = []
-        _buffer_size = 5000  # write N lines at a time
-        for lineno, line in enumerate(new_cif):
-            if not (lineno % _buffer_size):
-                sys.stdout.write(''.join(_buffer))
-                _buffer = []
-            _buffer.append(line)
-
-        sys.stdout.write(''.join(_buffer))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    write_lines(new_cif)
 
     # last line of the script
     # We can close it even if it is sys.stdin
@@ -24,11 +24,20 @@ one-letter code while all others are represented by 'X'.
 The -multi option splits the different chains into different records in the
 FASTA file.
 
+The -seqres option reads the sequence from the SEQRES records instead of the
+coordinates, and stops reading the file once they end.
+
+Many files, or directories of files (.pdb/.ent, also compressed), can be
+converted at once, to a single FASTA file where records are named after the
+file. Files are read by a pool of processes (-jobs, 1 by default).
+
 Usage:
-    python pdb_tofasta.py [-multi] <pdb file>
+    python pdb_tofasta.py [-multi] [-seqres] [-jobs <n>] <pdb file> [...]
 
 Example:
     python pdb_tofasta.py 1CTF.pdb
+    python pdb_tofasta.py -multi -seqres 1CTF.pdb
+    python pdb_tofasta.py -multi -jobs 8 pdb_files/ > all.fasta
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -40,94 +49,170 @@ effort to maintain and compile. RIP.
 import os
 import sys
 
+from pdbtools.core.filepool import output_prefix
+from pdbtools.core.streams import open_input, open_output
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
 
+res_codes = [
+    # 20 canonical amino acids
+    ('CYS', 'C'), ('ASP', 'D'), ('SER', 'S'), ('GLN', 'Q'),
+    ('LYS', 'K'), ('ILE', 'I'), ('PRO', 'P'), ('THR', 'T'),
+    ('PHE', 'F'), ('ASN', 'N'), ('GLY', 'G'), ('HIS', 'H'),
+    ('LEU', 'L'), ('ARG', 'R'), ('TRP', 'W'), ('ALA', 'A'),
+    ('VAL', 'V'), ('GLU', 'E'), ('TYR', 'Y'), ('MET', 'M'),
+    # Non-canonical amino acids
+    # ('MSE', 'M'), ('SOC', 'C'),
+    # Canonical xNA
+    ('  U', 'U'), ('  A', 'A'), ('  G', 'G'), ('  C', 'C'),
+    ('  T', 'T'),
+]
+
+three_to_one = dict(res_codes)
+
+# Extensions of the files read from directories, possibly compressed
+EXTENSIONS = tuple(ext + comp for ext in ('.pdb', '.ent')
+                   for comp in ('', '.gz', '.bz2', '.xz'))
+
+
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
     """
 
     # Defaults
-    option = None
-    fh = sys.stdin  # file handle
+    options = {
+        '-multi': None,
+        '-seqres': False,
+        '-jobs': 1,
+    }
+    fh = open_input()  # file handle
+
+    positional = []
+    seen = set()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith('-'):
+            positional.append(arg)
+            continue
+
+        if arg not in options or arg in seen:
+            emsg = 'ERROR!! You provided an invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg[1:]))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        seen.add(arg)
+
+        if arg == '-multi':
+            options[arg] = 'multi'
+        elif arg == '-seqres':
+            options[arg] = True
+        elif not args:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        else:
+            options[arg] = args.pop(0)
 
-    if not len(args):
+    try:
+        options['-jobs'] = int(options['-jobs'])
+        if options['-jobs'] < 1:
+            raise ValueError
+    except ValueError:
+        emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+        sys.stderr.write(emsg.format(options['-jobs']))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    paths = None  # batch mode
+    if not len(positional):
         # Reading from pipe with default option
         if sys.stdin.isatty():
+            if seen:  # ensure the PDB data is streamed in
+                emsg = 'ERROR!! No data to process!\n'
+                sys.stderr.write(emsg)
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-    elif len(args) == 1:
-        # One of two options: option & Pipe OR file & default option
-        if args[0].startswith('-'):
-            option = args[0][1:]
-            if sys.stdin.isatty():  # ensure the PDB data is streamed in
-                emsg = 'ERROR!! No data to process!\n'
-                sys.stderr.write(emsg)
+    else:
+        for fn in positional:
+            if not (os.path.isfile(fn) or os.path.isdir(fn)):
+                emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
+                sys.stderr.write(emsg.format(fn))
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
+        if len(positional) == 1 and os.path.isfile(positional[0]):
+            fh = open_input(positional[0])
         else:
-            if not os.path.isfile(args[0]):
-                emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
-                sys.stderr.write(emsg.format(args[0]))
-                sys.stderr.write(__doc__)
-                sys.exit(1)
+            fh = None
+            paths = list_files(positional)
 
-            fh = open(args[0], 'r')
+    options = dict((k[1:], v) for k, v in options.items())
+    return (options, paths, fh)
 
-    elif len(args) == 2:
-        # Two options: option & File
-        if not args[0].startswith('-'):
-            emsg = 'ERROR! First argument is not an option: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
-            sys.stderr.write(__doc__)
-            sys.exit(1)
 
-        if not os.path.isfile(args[1]):
-            emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[1]))
-            sys.stderr.write(__doc__)
-            sys.exit(1)
+def list_files(paths):
+    """Returns the files in a list of files and directories.
 
-        option = args[0][1:]
-        fh = open(args[1], 'r')
+    Directories are searched recursively for files with one of EXTENSIONS.
+    """
 
-    else:  # Whatever ...
-        sys.stderr.write(__doc__)
-        sys.exit(1)
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
 
-    # Validate option
-    if option is not None and option != 'multi':
-        emsg = 'ERROR!! You provided an invalid option: \'{}\'\n'
-        sys.stderr.write(emsg.format(option))
-        sys.stderr.write(__doc__)
-        sys.exit(1)
+        for root, dirs, fnames in os.walk(path):
+            dirs.sort()
+            for fname in sorted(fnames):
+                if fname.lower().endswith(EXTENSIONS):
+                    files.append(os.path.join(root, fname))
+    return files
 
-    return (option, fh)
 
+def read_seqres(fhandle):
+    """Returns the sequence of each chain in the SEQRES records.
 
-def pdb_to_fasta(fhandle, multi):
-    """Reads residue names of ATOM/HETATM records and exports them to a FASTA
-    file.
+    Stops reading at the first record after the SEQRES records, or at the
+    first coordinate record if there are none. Returns a list of chain
+    sequences, each a list with the chain identifier and the one-letter
+    codes of the residues.
+    """
+
+    coords = ('ATOM', 'HETATM', 'MODEL')
+
+    sequence = []
+    prev_chain = None
+    for line in fhandle:
+        if line.startswith('SEQRES'):
+            chain_id = line[11]
+            if chain_id != prev_chain:
+                sequence.append([chain_id])
+                prev_chain = chain_id
+
+            for col in range(19, 68, 4):  # up to 13 residues per line
+                resn = line[col:col + 3]
+                if not resn.strip():
+                    break
+                sequence[-1].append(three_to_one.get(resn, 'X'))
+
+        elif sequence or line.startswith(coords):
+            break
+
+    return sequence
+
+
+def read_coordinates(fhandle):
+    """Returns the sequence of each chain in the ATOM/HETATM records.
+
+    Returns a list of chain sequences, as read_seqres().
     """
 
-    res_codes = [
-        # 20 canonical amino acids
-        ('CYS', 'C'), ('ASP', 'D'), ('SER', 'S'), ('GLN', 'Q'),
-        ('LYS', 'K'), ('ILE', 'I'), ('PRO', 'P'), ('THR', 'T'),
-        ('PHE', 'F'), ('ASN', 'N'), ('GLY', 'G'), ('HIS', 'H'),
-        ('LEU', 'L'), ('ARG', 'R'), ('TRP', 'W'), ('ALA', 'A'),
-        ('VAL', 'V'), ('GLU', 'E'), ('TYR', 'Y'), ('MET', 'M'),
-        # Non-canonical amino acids
-        # ('MSE', 'M'), ('SOC', 'C'),
-        # Canonical xNA
-        ('  U', 'U'), ('  A', 'A'), ('  G', 'G'), ('  C', 'C'),
-        ('  T', 'T'),
-    ]
-
-    three_to_one = dict(res_codes)
     records = ('ATOM', 'HETATM')
 
     sequence = []  # list of chain sequences
@@ -150,6 +235,22 @@ def pdb_to_fasta(fhandle, multi):
             aa_resn = three_to_one.get(line[17:20], 'X')
             sequence[-1].append(aa_resn)
 
+    return sequence
+
+
+def pdb_to_fasta(fhandle, multi, seqres=False, name='PDB'):
+    """Reads residue names of ATOM/HETATM records and exports them to a FASTA
+    file.
+
+    With `seqres`, reads the residue names of the SEQRES records instead.
+    Records are named `name`|chain(s).
+    """
+
+    if seqres:
+        sequence = read_seqres(fhandle)
+    else:
+        sequence = read_coordinates(fhandle)
+
     # Yield fasta format
     _olw = 60
     if multi is None:
@@ -157,12 +258,12 @@ def pdb_to_fasta(fhandle, multi):
         labels = sorted(set([c[0] for c in sequence]))
         sequence = [[r for c in sequence for r in c[1:]]]
 
-        yield '>PDB|' + ''.join(labels) + '\n'
+        yield '>' + name + '|' + ''.join(labels) + '\n'
 
     for chain in sequence:
         if multi is not None:
             label = chain[0]
-            yield '>PDB|' + label + '\n'
+            yield '>' + name + '|' + label + '\n'
             chain = chain[1:]
 
         seq = ''.join(chain)
@@ -170,27 +271,77 @@ def pdb_to_fasta(fhandle, multi):
         yield ''.join(fmt_seq)
 
 
+def fasta_from_options(fhandle, options, paths=None):
+    """Runs pdb_to_fasta with the options returned by check_input.
+
+    This is the generator used when pdb_tofasta is a pipeline stage.
+    """
+    return pdb_to_fasta(fhandle, options['multi'], options['seqres'])
+
+
+def _file_to_fasta(task):
+    """Returns (FASTA text, error message) for a file. Either one is None.
+    """
+
+    path, multi, seqres = task
+    try:
+        with open_input(path) as fhandle:
+            name = output_prefix(fhandle)
+            return (''.join(pdb_to_fasta(fhandle, multi, seqres, name)), None)
+    except (IOError, OSError, UnicodeDecodeError) as e:
+        return (None, '{}: {}'.format(path, e))
+
+
+def fasta_many(paths, multi, seqres=False, jobs=1):
+    """Yields (FASTA text, error message) for each file, in order.
+
+    With more than one job, files are read by a pool of processes.
+    """
+
+    tasks = ((path, multi, seqres) for path in paths)
+    if jobs == 1:
+        for task in tasks:
+            yield _file_to_fasta(task)
+        return
+
+    import multiprocessing
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for result in pool.imap(_file_to_fasta, tasks, chunksize=8):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
 def main():
     # Check Input
-    multi, pdbfh = check_input(sys.argv[1:])
+    options, paths, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    fasta = pdb_to_fasta(pdbfh, multi)
+    if paths is None:
+        results = [(''.join(pdb_to_fasta(pdbfh, options['multi'],
+                                         options['seqres'])), None)]
+    else:
+        results = fasta_many(paths, options['multi'], options['seqres'],
+                             options['jobs'])
 
     # Output results
-    try:
-        sys.stdout.write(''.join(fasta))
-        sys.stdout.flush()
-    except IOError:
-        # This is here to catch Broken Pipes
-        # for example to use 'head' or 'tail' without
-        # the error message showing up
-        pass
+    retcode = 0
+    with open_output() as output:
+        for fasta, error in results:
+            if error is not None:
+                emsg = 'ERROR!! Could not read file: {}\n'
+                sys.stderr.write(emsg.format(error))
+                retcode = 1
+                continue
+            output.write(fasta)
 
     # last line of the script
     # Close file handle even if it is sys.stdin, no problem here.
-    pdbfh.close()
-    sys.exit(0)
+    if pdbfh is not None:
+        pdbfh.close()
+    sys.exit(retcode)
 
 
 if __name__ == '__main__':
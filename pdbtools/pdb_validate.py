@@ -20,11 +20,17 @@ Validates the PDB file ATOM/HETATM lines according to the format specifications.
 
 Does not catch all the errors though... people are creative!
 
+Large files can be validated in chunks by a pool of processes (-jobs). Errors
+can be written as JSON objects, one per line (-json), for other programs to
+read.
+
 Usage:
-    python pdb_validate.py <pdb file>
+    python pdb_validate.py [-json] [-jobs <n>] <pdb file>
 
 Example:
     python pdb_validate.py 1CTF.pdb
+    python pdb_validate.py -jobs 4 1CTF.pdb  # 4 chunks at a time
+    python pdb_validate.py -json 1CTF.pdb  # machine-readable errors
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -33,140 +39,280 @@ data to another. They are based on old FORTRAN77 code that was taking too much
 effort to maintain and compile. RIP.
 """
 
+import json
 import os
 import re
 import sys
 
+from pdbtools.core.streams import open_input, open_output
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
 
+CHUNK_SIZE = 50000  # lines per task, with -jobs
+
+# Fields of ATOM/HETATM lines: name, columns, format
+_fmt_check = (
+    ('Atm. Num.', (slice(6, 11), re.compile(r'[\d\s]+'))),
+    ('Alt. Loc.', (slice(11, 12), re.compile(r'\s'))),
+    ('Atm. Nam.', (slice(12, 16), re.compile(r'\s*[A-Z0-9]+\s*'))),
+    ('Spacer #1', (slice(16, 17), re.compile(r'[A-Z0-9 ]{1}'))),
+    ('Res. Nam.', (slice(17, 20), re.compile(r'\s*[A-Z0-9]+\s*'))),
+    ('Spacer #2', (slice(20, 21), re.compile(r'\s'))),
+    ('Chain Id.', (slice(21, 22), re.compile(r'[A-Za-z0-9 ]{1}'))),
+    ('Res. Num.', (slice(22, 26), re.compile(r'\s*[\d\-]+\s*'))),
+    ('Ins. Code', (slice(26, 27), re.compile(r'[A-Z0-9 ]{1}'))),
+    ('Spacer #3', (slice(27, 30), re.compile(r'\s+'))),
+    ('Coordn. X', (slice(30, 38), re.compile(r'\s*[\d\.\-]+\s*'))),
+    ('Coordn. Y', (slice(38, 46), re.compile(r'\s*[\d\.\-]+\s*'))),
+    ('Coordn. Z', (slice(46, 54), re.compile(r'\s*[\d\.\-]+\s*'))),
+    ('Occupancy', (slice(54, 60), re.compile(r'\s*[\d\.\-]+\s*'))),
+    ('Tmp. Fac.', (slice(60, 66), re.compile(r'\s*[\d\.\-]+\s*'))),
+    ('Spacer #4', (slice(66, 72), re.compile(r'\s+'))),
+    ('Segm. Id.', (slice(72, 76), re.compile(r'[\sA-Z0-9\-\+]+'))),
+    ('At. Elemt', (slice(76, 78), re.compile(r'[\sA-Z0-9\-\+]+'))),
+    ('At. Charg', (slice(78, 80), re.compile(r'[\sA-Z0-9\-\+]+'))),
+)
+
+# All the checks above, for a well-formed 80-column line, in a single match.
+# The field formats only look at the start of each field: its first character
+# or, for padded fields, its first non-blank character, which must be within
+# the field. Lines that do not match are checked field by field.
+_fast_check = re.compile(r"""
+    (?:ATOM\ \ |HETATM)
+    [\d\s].{4}                       # Atm. Num.
+    \s                               # Alt. Loc.
+    (?=\s{0,3}[A-Z0-9]).{4}          # Atm. Nam.
+    [A-Z0-9\ ]                       # Spacer #1
+    (?=\s{0,2}[A-Z0-9]).{3}          # Res. Nam.
+    \s                               # Spacer #2
+    [A-Za-z0-9\ ]                    # Chain Id.
+    (?=\s{0,3}[\d\-]).{4}            # Res. Num.
+    [A-Z0-9\ ]                       # Ins. Code
+    \s.{2}                           # Spacer #3
+    (?=\s{0,7}[\d\.\-]).{8}          # Coordn. X
+    (?=\s{0,7}[\d\.\-]).{8}          # Coordn. Y
+    (?=\s{0,7}[\d\.\-]).{8}          # Coordn. Z
+    (?=\s{0,5}[\d\.\-]).{6}          # Occupancy
+    (?=\s{0,5}[\d\.\-]).{6}          # Tmp. Fac.
+    \s.{5}                           # Spacer #4
+    [\sA-Z0-9\-\+].{3}               # Segm. Id.
+    [\sA-Z0-9\-\+].                  # At. Elemt
+    [\sA-Z0-9\-\+].                  # At. Charg
+    \Z
+""", re.VERBOSE | re.DOTALL)
+
+
 def check_input(args):
     """Checks whether to read from stdin/file and validates user input/options.
     """
 
     # Defaults
-    fh = sys.stdin  # file handle
+    options = {
+        '-json': False,
+        '-jobs': 1,
+    }
+    fh = open_input()  # file handle
+
+    positional = []
+    seen = set()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg not in options:
+            positional.append(arg)
+            continue
+
+        if arg in seen:
+            emsg = 'ERROR!! Invalid option: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        seen.add(arg)
 
-    if not len(args):
+        if arg == '-json':
+            options[arg] = True
+        elif not args:
+            emsg = 'ERROR!! Option requires a value: \'{}\'\n'
+            sys.stderr.write(emsg.format(arg))
+            sys.stderr.write(__doc__)
+            sys.exit(1)
+        else:
+            options[arg] = args.pop(0)
+
+    if not len(positional):
         # Reading from pipe with default option
         if sys.stdin.isatty():
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-    elif len(args) == 1:
-        if not os.path.isfile(args[0]):
+    elif len(positional) == 1:
+        if not os.path.isfile(positional[0]):
             emsg = 'ERROR!! File not found or not readable: \'{}\'\n'
-            sys.stderr.write(emsg.format(args[0]))
+            sys.stderr.write(emsg.format(positional[0]))
             sys.stderr.write(__doc__)
             sys.exit(1)
 
-        fh = open(args[0], 'r')
+        fh = open_input(positional[0])
 
     else:  # Whatever ...
         emsg = 'ERROR!! Script takes 1 argument, not \'{}\'\n'
-        sys.stderr.write(emsg.format(len(args)))
+        sys.stderr.write(emsg.format(len(positional)))
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    try:
+        options['-jobs'] = int(options['-jobs'])
+        if options['-jobs'] < 1:
+            raise ValueError
+    except ValueError:
+        emsg = 'ERROR!! Number of jobs must be a positive integer: \'{}\'\n'
+        sys.stderr.write(emsg.format(options['-jobs']))
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    return fh
+    return (options['-json'], options['-jobs'], fh)
 
 
-def check_pdb_format(fhandle):
-    """
-    Compares each ATOM/HETATM line with the format defined on the official
-    PDB website.
+def _check_lines(task):
+    """Returns the errors found in a list of lines.
 
-    http://deposit.rcsb.org/adit/docs/pdb_atom_format.html
+    `task` is a (number of the first line, lines) tuple. Errors are dictionaries
+    with the line number, the type of error ('short', 'long' or 'field') and
+    its details.
     """
 
-    has_error = False
-    _fmt_check = (
-        ('Atm. Num.', (slice(6, 11), re.compile(r'[\d\s]+'))),
-        ('Alt. Loc.', (slice(11, 12), re.compile(r'\s'))),
-        ('Atm. Nam.', (slice(12, 16), re.compile(r'\s*[A-Z0-9]+\s*'))),
-        ('Spacer #1', (slice(16, 17), re.compile(r'[A-Z0-9 ]{1}'))),
-        ('Res. Nam.', (slice(17, 20), re.compile(r'\s*[A-Z0-9]+\s*'))),
-        ('Spacer #2', (slice(20, 21), re.compile(r'\s'))),
-        ('Chain Id.', (slice(21, 22), re.compile(r'[A-Za-z0-9 ]{1}'))),
-        ('Res. Num.', (slice(22, 26), re.compile(r'\s*[\d\-]+\s*'))),
-        ('Ins. Code', (slice(26, 27), re.compile(r'[A-Z0-9 ]{1}'))),
-        ('Spacer #3', (slice(27, 30), re.compile(r'\s+'))),
-        ('Coordn. X', (slice(30, 38), re.compile(r'\s*[\d\.\-]+\s*'))),
-        ('Coordn. Y', (slice(38, 46), re.compile(r'\s*[\d\.\-]+\s*'))),
-        ('Coordn. Z', (slice(46, 54), re.compile(r'\s*[\d\.\-]+\s*'))),
-        ('Occupancy', (slice(54, 60), re.compile(r'\s*[\d\.\-]+\s*'))),
-        ('Tmp. Fac.', (slice(60, 66), re.compile(r'\s*[\d\.\-]+\s*'))),
-        ('Spacer #4', (slice(66, 72), re.compile(r'\s+'))),
-        ('Segm. Id.', (slice(72, 76), re.compile(r'[\sA-Z0-9\-\+]+'))),
-        ('At. Elemt', (slice(76, 78), re.compile(r'[\sA-Z0-9\-\+]+'))),
-        ('At. Charg', (slice(78, 80), re.compile(r'[\sA-Z0-9\-\+]+'))),
-    )
-
-    def _make_pointer(column):
-        col_bg, col_en = column.start, column.stop
-        pt = ['^' if c in range(col_bg, col_en) else ' ' for c in range(80)]
-        return ''.join(pt)
-
-    for iline, line in enumerate(fhandle, start=1):
+    first, lines = task
+
+    errors = []
+    for iline, line in enumerate(lines, start=first):
         line = line.rstrip('\n').rstrip('\r')  # CR/LF
         if not line:
             continue
 
-        # Type check for ATOM/HETATM lines
-        if line[0:6] in ('ATOM  ', 'HETATM'):
-            linelen = len(line)
-            if linelen < 80:
-                emsg = '[!] Line {0} is short: {1} < 80\n'
-                sys.stdout.write(emsg.format(iline, linelen))
-                has_error = True
+        linelen = len(line)
+        if linelen == 80 and _fast_check.match(line):
+            continue
 
-            elif linelen > 80:
-                emsg = '[!] Line {0} is long: {1} > 80\n'
-                sys.stdout.write(emsg.format(iline, linelen))
-                has_error = True
+        if linelen < 80:
+            errors.append({'line': iline, 'error': 'short', 'length': linelen})
+        elif linelen > 80:
+            errors.append({'line': iline, 'error': 'long', 'length': linelen})
 
+        # Type check for ATOM/HETATM lines
+        if line[0:6] in ('ATOM  ', 'HETATM'):
             for fname, (fcol, fcheck) in _fmt_check:
                 field = line[fcol]
                 if not fcheck.match(field):
-                    pointer = _make_pointer(fcol)
-                    emsg = '[!] Offending field ({0}) at line {1}\n'
-                    sys.stdout.write(emsg.format(fname, iline))
+                    errors.append({
+                        'line': iline,
+                        'error': 'field',
+                        'field': fname,
+                        'columns': [fcol.start + 1, fcol.stop],
+                        'record': line,
+                    })
+                    break
+
+    return errors
 
-                    sys.stdout.write(repr(line) + '\n')
-                    sys.stdout.write(pointer + '\n')
 
+def _format_error(error):
+    """Returns the message for an error, as written by default.
+    """
+
+    if error['error'] == 'short':
+        emsg = '[!] Line {0} is short: {1} < 80\n'
+        return emsg.format(error['line'], error['length'])
+    elif error['error'] == 'long':
+        emsg = '[!] Line {0} is long: {1} > 80\n'
+        return emsg.format(error['line'], error['length'])
+
+    col_bg, col_en = error['columns']
+    pointer = ' ' * (col_bg - 1) + '^' * (col_en - col_bg + 1)
+    pointer += ' ' * (80 - col_en)
+
+    emsg = '[!] Offending field ({0}) at line {1}\n'
+    return ''.join((emsg.format(error['field'], error['line']),
+                    repr(error['record']) + '\n',
+                    pointer + '\n'))
+
+
+def _iter_chunks(fhandle, size):
+    """Yields (number of the first line, lines) tuples of `size` lines.
+    """
+
+    chunk = []
+    first = 1
+    for line in fhandle:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield first, chunk
+            first += size
+            chunk = []
+
+    if chunk:
+        yield first, chunk
+
+
+def check_pdb_format(fhandle, jobs=1, as_json=False):
+    """
+    Compares each ATOM/HETATM line with the format defined on the official
+    PDB website.
+
+    http://deposit.rcsb.org/adit/docs/pdb_atom_format.html
+
+    With more than one job, chunks of the file are checked in parallel. With
+    `as_json`, errors are written as JSON objects, one per line.
+    """
+
+    chunks = _iter_chunks(fhandle, CHUNK_SIZE)
+
+    pool = None
+    if jobs > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(_check_lines, chunks)
+    else:
+        results = (_check_lines(chunk) for chunk in chunks)
+
+    if as_json:
+        formatter = lambda e: json.dumps(e, sort_keys=True) + '\n'
+    else:
+        formatter = _format_error
+
+    has_error = False
+    with open_output() as output:
+        try:
+            for errors in results:
+                if errors:
+                    output.write(''.join(formatter(e) for e in errors))
                     has_error = True
-                    break
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if as_json:
+            return int(has_error)
+
+        if has_error:
+            msg = '\nTo understand your errors, read the format specification:\n'
+            msg += '  http://www.wwpdb.org/documentation/file-format-content/format33/sect9.html#ATOM\n'
+            output.write(msg)
+            return 1
         else:
-            # Do basic line length check
-            linelen = len(line)
-            if linelen < 80:
-                emsg = '[!] Line {0} is short: {1} < 80\n'
-                sys.stdout.write(emsg.format(iline, linelen))
-                has_error = True
-            elif linelen > 80:
-                emsg = '[!] Line {0} is long: {1} > 80\n'
-                sys.stdout.write(emsg.format(iline, linelen))
-                has_error = True
-
-    if has_error:
-        msg = '\nTo understand your errors, read the format specification:\n'
-        msg += '  http://www.wwpdb.org/documentation/file-format-content/format33/sect9.html#ATOM\n'
-        sys.stdout.write(msg)
-        return 1
-    else:
-        msg = 'It *seems* everything is OK.'
-        sys.stdout.write(msg)
-        return 0
+            msg = 'It *seems* everything is OK.'
+            output.write(msg)
+            return 0
 
 
 def main():
     # Check Input
-    pdbfh = check_input(sys.argv[1:])
+    as_json, jobs, pdbfh = check_input(sys.argv[1:])
 
     # Do the job
-    retcode = check_pdb_format(pdbfh)
+    retcode = check_pdb_format(pdbfh, jobs, as_json)
 
     # last line of the script
     # We can close it even if it is sys.stdin
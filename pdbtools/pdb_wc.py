@@ -28,11 +28,15 @@ options to produce focused but more detailed summaries:
     [o] - no. of disordered atoms (altloc) (plus per-model if multi-model file).
     [i] - no. of insertion codes (plus per-model if multi-model file).
 
+The -json option writes all of the above, plus counts per model and per
+chain, as a single JSON object.
+
 Usage:
     python pdb_wc.py [-<option>] <pdb file>
 
 Example:
     python pdb_wc.py 1CTF.pdb
+    python pdb_wc.py -json 1CTF.pdb
 
 This program is part of the `pdb-tools` suite of utilities and should not be
 distributed isolatedly. The `pdb-tools` were created to quickly manipulate PDB
@@ -41,9 +45,12 @@ data to another. They are based on old FORTRAN77 code that was taking too much
 effort to maintain and compile. RIP.
 """
 
+import json
 import os
 import sys
 
+from pdbtools.core.streams import open_input
+
 __author__ = "Joao Rodrigues"
 __email__ = "j.p.g.l.m.rodrigues@gmail.com"
 
@@ -56,7 +63,7 @@ def check_input(args):
 
     # Defaults
     option = ''  # empty produces overall summary
-    fh = sys.stdin  # file handle
+    fh = open_input()  # file handle
 
     if not len(args):
         # Reading from pipe with default option
@@ -81,7 +88,7 @@ def check_input(args):
                 sys.stderr.write(__doc__)
                 sys.exit(1)
 
-            fh = open(args[0], 'r')
+            fh = open_input(args[0])
 
     elif len(args) == 2:
         # Two options: option & File
@@ -98,13 +105,13 @@ def check_input(args):
             sys.exit(1)
 
         option = args[0][1:]
-        fh = open(args[1], 'r')
+        fh = open_input(args[1])
 
     else:  # Whatever ...
         sys.stderr.write(__doc__)
         sys.exit(1)
 
-    if option:
+    if option and option != 'json':
         valid = set('mcrahoi')
         if set(option) - valid:
             diff = ''.join(set(option) - valid)
@@ -115,45 +122,142 @@ def check_input(args):
     return (option, fh)
 
 
-def summarize_file(fhandle, option):
-    """Returns summary of models, chains, residue, and atoms.
+def _close_model(summary, model_id, chains, resids, atoms, hetatm):
+    """Adds the counts of a model to the summary.
+
+    `chains` is the list of chains of the model, in order of appearance, and
+    `resids`, `atoms` and `hetatm` the sets of unique residues, atoms and
+    HETATM residues (line[17:26], line[12:27], line[17:26]).
     """
 
-    models = set()
-    chains, resids, atoms, hetatm = set(), set(), set(), set()
-    has_altloc, has_icode = False, False  # flags only
+    per_chain = dict((c, [0, 0, 0]) for c in chains)
+    for key in resids:
+        per_chain[key[4]][0] += 1
+    for key in atoms:
+        per_chain[key[9]][1] += 1
+    for key in hetatm:
+        per_chain[key[4]][2] += 1
+
+    summary['chain_ids'].extend(chains)
+    summary['resnames'].update(key[0:3].strip() for key in resids)
+    summary['atom_names'].update(key[0:4] for key in atoms)
+    summary['hetnames'].update(key[0:3] for key in hetatm)
+
+    summary['per_model'].append({
+        'model': model_id,
+        'chains': len(chains),
+        'residues': len(resids),
+        'atoms': len(atoms),
+        'hetatm': len(hetatm),
+    })
+
+    for chain in chains:
+        n_resids, n_atoms, n_hetatm = per_chain[chain]
+        summary['per_chain'].append({
+            'model': model_id,
+            'chain': chain,
+            'residues': n_resids,
+            'atoms': n_atoms,
+            'hetatm': n_hetatm,
+        })
+
+
+def count_file(fhandle):
+    """Returns the counts of models, chains, residues, and atoms, as a dict.
+
+    Atoms are counted one model at a time: only the unique residues and atoms
+    of the current model are kept in memory.
+    """
 
-    model_id = "X   "
+    summary = {
+        'models': [],  # model numbers, as in the file
+        'per_model': [],
+        'per_chain': [],
+        'chain_ids': [],  # one per chain of each model
+        'resnames': set(),
+        'atom_names': set(),
+        'hetnames': set(),
+        'altloc': False,
+        'icodes': False,
+    }
+
+    model_id = None
+    seen_models = set()
+    chains, seen_chains = [], set()
+    resids, atoms, hetatm = set(), set(), set()
     for line in fhandle:
         if line.startswith('MODEL'):
-            model_id = line[10:14]
-            models.add(model_id.strip())
+            if chains or model_id is not None:
+                _close_model(summary, model_id, chains, resids, atoms, hetatm)
+                chains, seen_chains = [], set()
+                resids, atoms, hetatm = set(), set(), set()
 
-        elif line.startswith('ATOM'):
+            model_id = line[10:14].strip()
+            if model_id not in seen_models:
+                seen_models.add(model_id)
+                summary['models'].append(model_id)
 
-            chains.add(model_id + line[21])
-            resids.add(model_id + line[17:26])
-            atoms.add(model_id + line[12:27])
+        elif line.startswith('ATOM'):
+            if line[21] not in seen_chains:
+                seen_chains.add(line[21])
+                chains.append(line[21])
+            resids.add(line[17:26])
+            atoms.add(line[12:27])
 
             if line[16] != ' ':
-                has_altloc = True
+                summary['altloc'] = True
 
             if line[26] != ' ':
-                has_icode = True
+                summary['icodes'] = True
 
         elif line.startswith('HETATM'):
-            chains.add(model_id + line[21])
-            hetatm.add(model_id + line[17:26])
+            if line[21] not in seen_chains:
+                seen_chains.add(line[21])
+                chains.append(line[21])
+            hetatm.add(line[17:26])
+
+    if chains or model_id is not None:
+        _close_model(summary, model_id, chains, resids, atoms, hetatm)
 
+    return summary
+
+
+def summarize_file(fhandle, option):
+    """Returns summary of models, chains, residue, and atoms.
+    """
+
+    summary = count_file(fhandle)
+
+    models = set(summary['models'])
     if not models:
         models = {None}
 
     # Tally counts
     n_models = len(models)
-    n_chains = len(chains)
-    n_resids = len(resids)
-    n_atoms = len(atoms)
-    n_hetatm = len(hetatm)
+    n_chains = sum(m['chains'] for m in summary['per_model'])
+    n_resids = sum(m['residues'] for m in summary['per_model'])
+    n_atoms = sum(m['atoms'] for m in summary['per_model'])
+    n_hetatm = sum(m['hetatm'] for m in summary['per_model'])
+
+    if option == 'json':
+        result = {
+            'models': n_models,
+            'chains': n_chains,
+            'residues': n_resids,
+            'atoms': n_atoms,
+            'hetatm': n_hetatm,
+            'altloc': summary['altloc'],
+            'icodes': summary['icodes'],
+            'model_ids': summary['models'],
+            'chain_ids': sorted(set(summary['chain_ids'])),
+            'resnames': sorted(summary['resnames']),
+            'atom_names': sorted(summary['atom_names']),
+            'hetnames': sorted(summary['hetnames']),
+            'per_model': summary['per_model'],
+            'per_chain': summary['per_chain'],
+        }
+        sys.stdout.write(json.dumps(result, sort_keys=True) + '\n')
+        return
 
     # Per-model
     n_atoms_pm = '{0:>6.1f}'.format(n_atoms / n_models)
@@ -177,10 +281,10 @@ def summarize_file(fhandle, option):
             'No. HETATM:\t{0}\n'.format(n_hetatm)
         )
         sys.stdout.write(
-            'Multiple Occ.:\t{0}\n'.format(has_altloc)
+            'Multiple Occ.:\t{0}\n'.format(summary['altloc'])
         )
         sys.stdout.write(
-            'Res. Inserts:\t{0}\n'.format(has_icode)
+            'Res. Inserts:\t{0}\n'.format(summary['icodes'])
         )
 
         return
@@ -199,7 +303,7 @@ def summarize_file(fhandle, option):
         sys.stdout.write(
             'No. chains:\t{0}\t({1}/model)\n'.format(n_chains, n_chains_pm)
         )
-        chains_str = ','.join(sorted((c[4:] for c in chains)))
+        chains_str = ','.join(sorted(summary['chain_ids']))
         sys.stdout.write(
             '\t->\t{0}\n'.format(chains_str)
         )
@@ -208,7 +312,7 @@ def summarize_file(fhandle, option):
         sys.stdout.write(
             'No. residues:\t{0}\t({1}/model)\n'.format(n_resids, n_resids_pm)
         )
-        resnames = ','.join(sorted({f[4:7].strip() for f in resids}))
+        resnames = ','.join(sorted(summary['resnames']))
         sys.stdout.write(
             '\t->\t{0}\n'.format(resnames)
         )
@@ -217,7 +321,7 @@ def summarize_file(fhandle, option):
         sys.stdout.write(
             'No. atoms:\t{0}\t({1}/model)\n'.format(n_atoms, n_atoms_pm)
         )
-        atnames = ','.join(sorted({repr(f[4:8]) for f in atoms}))
+        atnames = ','.join(sorted(repr(n) for n in summary['atom_names']))
         sys.stdout.write(
             '\t->\t{0}\n'.format(atnames)
         )
@@ -226,19 +330,19 @@ def summarize_file(fhandle, option):
         sys.stdout.write(
             'No. HETATM:\t{0}\n'.format(n_hetatm)
         )
-        hetnames = ','.join(sorted({repr(f[4:7]) for f in hetatm}))
+        hetnames = ','.join(sorted(repr(n) for n in summary['hetnames']))
         sys.stdout.write(
             '\t->\t{0}\n'.format(hetnames)
         )
 
     if 'o' in option:
         sys.stdout.write(
-            'Multiple Occ.:\t{0}\n'.format(has_altloc)
+            'Multiple Occ.:\t{0}\n'.format(summary['altloc'])
         )
 
     if 'i' in option:
         sys.stdout.write(
-            'Res. Inserts:\t{0}\n'.format(has_icode)
+            'Res. Inserts:\t{0}\n'.format(summary['icodes'])
         )
 
 
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process pipeline engine for the `pdb-tools`.
+
+A pipeline is written as a chain of stages separated by '|', just like on the
+command line. Each stage is the name of a tool, without the `pdb_` prefix,
+optionally followed by a colon and the option it would take on the command
+line:
+
+    'selchain:-A | delhetatm | reres:-1 | tidy'
+
+Stages are built by calling the tool's own `check_input` function, so options
+are validated exactly as they are by the individual scripts, and then by
+feeding the output of the previous stage to the tool's generator function.
+Everything runs in the same Python process, lazily, one line at a time.
+"""
+
+import importlib
+import sys
+
+__author__ = "Joao Rodrigues"
+__email__ = "j.p.g.l.m.rodrigues@gmail.com"
+
+
+# Tools that can be used as pipeline stages.
+# name: (module, generator function)
+STAGES = {
+    'b': ('pdb_b', 'alter_bfactor'),
+    'chain': ('pdb_chain', 'alter_chain'),
+    'chainbows': ('pdb_chainbows', 'set_chain_sequence'),
+    'chainxseg': ('pdb_chainxseg', 'place_chain_on_seg'),
+    'delchain': ('pdb_delchain', 'delete_chain'),
+    'delelem': ('pdb_delelem', 'delete_elements'),
+    'delhetatm': ('pdb_delhetatm', 'remove_hetatm'),
+    'delinsertion': ('pdb_delinsertion', 'delete_insertions'),
+    'delres': ('pdb_delres', 'delete_residues'),
+    'delresname': ('pdb_delresname', 'delete_residue_by_name'),
+    'element': ('pdb_element', 'assign_element'),
+    'fromcif': ('pdb_fromcif', 'convert_to_pdb'),
+    'head': ('pdb_head', 'get_first_n_lines'),
+    'keepcoord': ('pdb_keepcoord', 'keep_coordinates'),
+    'occ': ('pdb_occ', 'alter_occupancy'),
+    'reatom': ('pdb_reatom', 'renumber_atom_serials'),
+    'reres': ('pdb_reres', 'renumber_residues'),
+    'rplchain': ('pdb_rplchain', 'replace_chain_identifiers'),
+    'rplresname': ('pdb_rplresname', 'rename_residues'),
+    'seg': ('pdb_seg', 'alter_segid'),
+    'segxchain': ('pdb_segxchain', 'place_seg_on_chain'),
+    'selaltloc': ('pdb_selaltloc', 'select_occupancy'),
+    'selatom': ('pdb_selatom', 'filter_atoms'),
+    'selchain': ('pdb_selchain', 'select_chain'),
+    'selelem': ('pdb_selelem', 'delete_elements'),
+    'selhetatm': ('pdb_selhetatm', 'select_hetatm'),
+    'selmodel': ('pdb_selmodel', 'select_model'),
+    'selres': ('pdb_selres', 'select_residues'),
+    'selresname': ('pdb_selresname', 'filter_residue_by_name'),
+    'selseg': ('pdb_selseg', 'select_segment_id'),
+    'shiftres': ('pdb_shiftres', 'renumber_residues'),
+    'sort': ('pdb_sort', 'sort_file'),
+    'tidy': ('pdb_tidy', 'tidy_pdbfile'),
+    'tocif': ('pdb_tocif', 'convert_to_mmcif'),
+    'tofasta': ('pdb_tofasta', 'fasta_from_options'),
+    'uniqname': ('pdb_uniqname', 'rename_atoms'),
+}
+
+
+class _StageInput(object):
+    """Stands in for sys.stdin while a stage validates its options.
+
+    The tools refuse to run when stdin is a terminal. Inside a pipeline the
+    data comes from the previous stage, so we pretend to be a pipe and swap
+    this object for the actual upstream generator afterwards.
+    """
+
+    def isatty(self):
+        return False
+
+    def close(self):
+        pass
+
+
+def parse_pipeline(spec):
+    """Splits a pipeline string into a list of (tool name, [options]).
+
+    Raises ValueError if the pipeline is empty or names an unknown tool.
+    """
+
+    stages = []
+    for stage in spec.split('|'):
+        tokens = stage.split()
+        if not tokens:
+            raise ValueError('empty stage in pipeline: \'{}\''.format(spec))
+
+        name, args = tokens[0], tokens[1:]
+        if ':' in name:
+            name, option = name.split(':', 1)
+            args.insert(0, option)
+
+        if name.startswith('pdb_'):
+            name = name[4:]
+
+        if name not in STAGES:
+            raise ValueError('tool cannot be used in a pipeline: \'{}\''.format(name))
+
+        stages.append((name, args))
+
+    return stages
+
+
+def build_stage(name, args, source):
+    """Returns the generator of a single stage reading from `source`.
+    """
+
+    modname, funcname = STAGES[name]
+    module = importlib.import_module('pdbtools.' + modname)
+    func = getattr(module, funcname)
+
+    placeholder = _StageInput()
+    _stdin = sys.stdin
+    sys.stdin = placeholder
+    try:
+        parsed = module.check_input(args)
+    finally:
+        sys.stdin = _stdin
+
+    if isinstance(parsed, tuple):
+        params, fh = parsed[:-1], parsed[-1]
+    else:
+        params, fh = (), parsed
+
+    if fh is not placeholder:  # stage opened a file of its own
+        if fh is not None:
+            fh.close()
+        raise ValueError('stage cannot read from a file: \'{}\''.format(name))
+
+    return func(source, *params)
+
+
+def build_pipeline(spec, fhandle):
+    """Chains the stages in `spec` on top of `fhandle`.
+
+    Returns a generator yielding the lines produced by the last stage.
+    """
+
+    return build_stages(parse_pipeline(spec), fhandle)
+
+
+def build_stages(stages, fhandle):
+    """Chains a list of (tool name, [options]) stages on top of `fhandle`.
+
+    Returns a generator yielding the lines produced by the last stage.
+    """
+
+    stream = fhandle
+    for name, args in stages:
+        stream = build_stage(name, args, stream)
+    return stream
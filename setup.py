@@ -20,11 +20,14 @@ here = path.abspath(path.dirname(__file__))
 with open(path.join(here, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
 
-# Collect names of bin/*py scripts
-# e.g. 'pdb_intersect=bin.pdb_intersect:main',
+# Collect names of pdbtools/pdb_*py scripts
+# e.g. 'pdb_intersect=pdbtools.pdb_intersect:main',
+# Other modules in the package are shared code, not tools.
 binfiles = listdir(path.join(here, 'pdbtools'))
 bin_py = [f[:-3] + '=pdbtools.' + f[:-3] + ':main' for f in binfiles
-          if f.endswith('.py')]
+          if f.startswith('pdb_') and f.endswith('.py')]
+# Single entry point to all tools, e.g. 'pdbtools selchain -A 1CTF.pdb'
+bin_py.append('pdbtools=pdbtools.dispatch:main')
 
 setup(
     name='pdb-tools',  # Required
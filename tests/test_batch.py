@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.batch`.
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.dispatch'
+        self.module = __import__(name, fromlist=[''])
+        self.batch = __import__('pdbtools.batch', fromlist=[''])
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.outdir = os.path.join(self.tmpdir, 'out')
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def run_tool(self, name, args, fpath):
+        """Returns the output of a tool run on its own."""
+
+        self.module = __import__('pdbtools.pdb_' + name, fromlist=[''])
+        sys.argv = [''] + args + [fpath]
+        self.exec_module()
+        self.module = __import__('pdbtools.dispatch', fromlist=[''])
+        return self.stdout
+
+    def read(self, fname):
+        with open(os.path.join(self.outdir, fname)) as fhandle:
+            return fhandle.read().splitlines()
+
+    def test_expand_inputs(self):
+        """expand_inputs() reads files, directories, globs and manifests"""
+
+        dummy = os.path.join(data_dir, 'dummy.pdb')
+        hetatm = os.path.join(data_dir, 'hetatm.pdb')
+        manifest = os.path.join(self.tmpdir, 'manifest.txt')
+        with open(manifest, 'w') as fhandle:
+            fhandle.write('# structures\n\n{}\n{}\n'.format(hetatm, dummy))
+
+        expand = self.batch.expand_inputs
+        self.assertEqual(expand([dummy, dummy]), [dummy])
+        self.assertEqual(expand(['@' + manifest]), [hetatm, dummy])
+        self.assertEqual(expand([os.path.join(data_dir, 'dumm*.pdb')]),
+                         [dummy,
+                          os.path.join(data_dir, 'dummy_az09.pdb'),
+                          os.path.join(data_dir, 'dummy_insertions.pdb')])
+
+        paths = expand([data_dir])
+        self.assertIn(hetatm, paths)
+        self.assertFalse(any(p.endswith('.cif') for p in paths))
+
+        for missing in ('nothing.pdb', 'nothing*.pdb', '@nothing.txt'):
+            self.assertRaises(ValueError, expand, [missing])
+
+    def test_schedule(self):
+        """schedule() sorts files by size, largest first"""
+
+        paths = self.batch.expand_inputs([data_dir])
+        sizes = [os.path.getsize(p) for p in self.batch.schedule(paths)]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+    def test_output_name(self):
+        """output_name() removes compression suffixes, follows conversions"""
+
+        name = self.batch.output_name
+        self.assertEqual(name('a/1ctf.pdb', [('tidy', [])]), '1ctf.pdb')
+        self.assertEqual(name('a/1ctf.pdb.gz', [('tidy', [])]), '1ctf.pdb')
+        self.assertEqual(name('1ctf.ent', [('tocif', [])]), '1ctf.cif')
+        self.assertEqual(name('1ctf.cif', [('fromcif', []), ('tidy', [])]),
+                         '1ctf.pdb')
+        self.assertEqual(name('1ctf.pdb', [('tofasta', ['-multi'])]),
+                         '1ctf.fasta')
+
+    def test_plan_outputs(self):
+        """plan_outputs() refuses clashing outputs"""
+
+        plan = self.batch.plan_outputs
+        stages = [('tidy', [])]
+        dummy = os.path.join(data_dir, 'dummy.pdb')
+
+        self.assertRaises(ValueError, plan, [dummy, dummy + '.gz'],
+                          stages, self.outdir)
+        self.assertRaises(ValueError, plan, [dummy], stages, data_dir)
+        self.assertEqual(plan([dummy], stages, self.outdir),
+                         [(dummy, os.path.join(self.outdir, 'dummy.pdb'))])
+
+    def test_batch_tool(self):
+        """$ pdbtools selchain -A -batch data/*.pdb -outdir out -jobs 2"""
+
+        fnames = ['dummy.pdb', 'hetatm.pdb', 'ensemble_OK.pdb']
+        paths = [os.path.join(data_dir, f) for f in fnames]
+        sys.argv = ['', 'selchain', '-A', '-batch'] + paths + \
+            ['-outdir', self.outdir, '-jobs', '2']
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 3)
+        self.assertEqual(sorted(l.split('\t')[0] for l in self.stdout),
+                         sorted(paths))
+        self.assertTrue(all(l.split('\t')[1] == 'OK' for l in self.stdout))
+        self.assertTrue(self.stderr[0].startswith('Processed 3 file(s) in'))
+        self.assertTrue(self.stderr[0].endswith('3 OK, 0 failed'))
+
+        for fname, path in zip(fnames, paths):
+            expected = self.run_tool('selchain', ['-A'], path)
+            self.assertEqual(self.read(fname), expected)
+
+    def test_batch_pipeline(self):
+        """$ pdbtools pipe 'delhetatm | tidy' -batch @manifest -outdir out"""
+
+        fpath = os.path.join(data_dir, 'hetatm.pdb')
+        gzpath = os.path.join(self.tmpdir, 'hetatm.pdb.gz')
+        with open(fpath, 'rb') as src, gzip.open(gzpath, 'wb') as dst:
+            dst.write(src.read())
+
+        manifest = os.path.join(self.tmpdir, 'manifest.txt')
+        with open(manifest, 'w') as fhandle:
+            fhandle.write(gzpath + '\n')
+
+        sys.argv = ['', 'pipe', 'delhetatm | tidy', '-batch', '@' + manifest,
+                    '-outdir', self.outdir]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(self.stdout[0].split('\t')[:3],
+                         [gzpath, 'OK', os.path.join(self.outdir,
+                                                     'hetatm.pdb')])
+
+        module = __import__('pdbtools.pdb_pipe', fromlist=[''])
+        self.module = module
+        sys.argv = ['', 'delhetatm | tidy', fpath]
+        self.exec_module()
+        self.assertEqual(self.read('hetatm.pdb'), self.stdout)
+
+    def test_batch_failure(self):
+        """$ pdbtools reres -9998 -batch data/dummy.pdb -outdir out"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'reres', '-9998', '-batch', fpath,
+                    '-outdir', self.outdir]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(self.stdout,
+                         [fpath + '\tERROR\ttool exited with status 1'])
+        self.assertEqual(self.stderr[-1][-14:], '0 OK, 1 failed')
+        self.assertEqual(os.listdir(self.outdir), [])  # no partial output
+
+    def test_not_a_stage(self):
+        """$ pdbtools wc -batch data/dummy.pdb -outdir out"""
+
+        sys.argv = ['', 'wc', '-batch', os.path.join(data_dir, 'dummy.pdb'),
+                    '-outdir', self.outdir]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! tool cannot be used in batch mode: 'wc'")
+
+    def test_invalid_stage_option(self):
+        """$ pdbtools selchain -AB1 -batch data/dummy.pdb -outdir out"""
+
+        sys.argv = ['', 'selchain', '-AB1', '-batch',
+                    os.path.join(data_dir, 'dummy.pdb'), '-outdir', self.outdir]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertFalse(os.path.exists(self.outdir))
+
+    def test_missing_outdir(self):
+        """$ pdbtools selchain -A -batch data/dummy.pdb"""
+
+        sys.argv = ['', 'selchain', '-A', '-batch',
+                    os.path.join(data_dir, 'dummy.pdb')]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! Batch mode requires an output directory: "
+                         "'-outdir'")
+
+    def test_invalid_jobs(self):
+        """$ pdbtools selchain -A -batch data/dummy.pdb -outdir out -jobs 0"""
+
+        sys.argv = ['', 'selchain', '-A', '-batch',
+                    os.path.join(data_dir, 'dummy.pdb'), '-outdir', self.outdir,
+                    '-jobs', '0']
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! Number of jobs must be a positive integer: "
+                         "'0'")
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
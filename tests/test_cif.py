@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.cif`.
+"""
+
+import os
+import sys
+import unittest
+
+from config import data_dir
+
+
+CIF = """\
+data_first
+_entry.id first
+_struct.title
+;A title that spans
+two lines
+;
+_struct.pdbx_descriptor   'quoted value'
+#
+loop_
+_struct_keywords.entry_id
+_struct_keywords.text
+first "it's a 'test'"
+#
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.label_atom_id
+ATOM 1 N
+ATOM 2 "C1'"
+ATOM
+3 CA
+#
+data_second
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.label_atom_id
+HETATM 1 O
+"""
+
+
+class TestCIF(unittest.TestCase):
+    """
+    Tests for the mmCIF reader.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.cif'
+        self.module = __import__(name, fromlist=[''])
+
+    def read(self, categories=None):
+        """Returns the categories of CIF as lists of rows"""
+        lines = CIF.splitlines(True)
+        parsed = self.module.iter_categories(lines, categories)
+        return [(b, c, i, list(r)) for b, c, i, r in parsed]
+
+    def test_tokenize(self):
+        """tokenize() types tokens and removes quotes"""
+
+        m = self.module
+        lines = ['data_x\n', "loop_ _a.b 'c d' e # comment\n", ';text\n', ';\n']
+        tokens = list(m.tokenize(lines))
+
+        expected = [(m.DATA, 'x'), (m.LOOP, 'loop_'), (m.TAG, '_a.b'),
+                    (m.VALUE, 'c d'), (m.VALUE, 'e'), (m.VALUE, 'text')]
+        self.assertEqual(tokens, expected)
+
+    def test_all_categories(self):
+        """iter_categories() reads every category and data block"""
+
+        parsed = self.read()
+        names = [(b, c) for b, c, _, _ in parsed]
+        expected = [('first', 'entry'), ('first', 'struct'),
+                    ('first', 'struct_keywords'), ('first', 'atom_site'),
+                    ('second', 'atom_site')]
+        self.assertEqual(names, expected)
+
+        # Non-looped category with a text field
+        _, _, items, rows = parsed[1]
+        self.assertEqual(items, ['title', 'pdbx_descriptor'])
+        self.assertEqual(rows, [['A title that spans\ntwo lines',
+                                 'quoted value']])
+
+        # Quotes inside quoted values
+        self.assertEqual(parsed[2][3], [['first', "it's a 'test'"]])
+
+        # Rows spanning several lines
+        self.assertEqual(parsed[3][3], [['ATOM', '1', 'N'],
+                                        ['ATOM', '2', "C1'"],
+                                        ['ATOM', '3', 'CA']])
+
+    def test_select_categories(self):
+        """iter_categories() skips categories that were not requested"""
+
+        parsed = self.read(categories=['atom_site'])
+        self.assertEqual([(b, c) for b, c, _, _ in parsed],
+                         [('first', 'atom_site'), ('second', 'atom_site')])
+        self.assertEqual(parsed[1][3], [['HETATM', '1', 'O']])
+
+    def test_unread_rows(self):
+        """Rows that are not read do not leak into the next category"""
+
+        lines = CIF.splitlines(True)
+        parsed = self.module.iter_categories(lines)
+        names = [c for _, c, _, _ in parsed]
+        self.assertEqual(len(names), 5)
+
+    def test_file(self):
+        """iter_categories() reads a file from the test data"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.cif')
+        with open(fpath) as fh:
+            parsed = self.module.iter_categories(fh, ['atom_site'])
+            for block, _, items, rows in parsed:
+                self.assertEqual(block, 'ensemble_OK')
+                self.assertEqual(len(items), 18)
+                self.assertEqual(len(list(rows)), 4)
+
+    def test_errors(self):
+        """Syntax errors raise CIFError"""
+
+        bad = [
+            ['loop_\n', '_a.b\n', '_a.c\n', '1 2 3\n'],
+            ['_a.b\n', ';unterminated\n'],
+            ['_a.b\n', '_a.c 1\n'],
+        ]
+        for lines in bad:
+            with self.assertRaises(self.module.CIFError):
+                list(self.module.iter_categories(lines))
+
+    def test_quote(self):
+        """quote() writes values that are read back unchanged"""
+
+        values = ['CA', "C1'", 'a b', 'it\'s "x"', '_x', 'data_x', '#1']
+        line = ' '.join(self.module.quote(v) for v in values)
+        lines = ['_a.b\n'] + line.splitlines(True)
+
+        tokens = list(self.module.tokenize(lines))[1:]
+        self.assertEqual([t[1] for t in tokens], values)
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
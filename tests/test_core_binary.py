@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.core.binary`.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+
+
+class TestBinary(unittest.TestCase):
+    """
+    Tests for the binary structure format.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.core.binary'
+        self.module = __import__(name, fromlist=[''])
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read_lines(self, fname):
+        with open(os.path.join(data_dir, fname)) as fh:
+            return fh.readlines()
+
+    def write(self, structure):
+        """Dumps a structure to a file and returns its path"""
+        fpath = os.path.join(self.tempdir, 'structure.bin')
+        with open(fpath, 'wb') as binfile:
+            structure.dump(binfile)
+        return fpath
+
+    def test_roundtrip(self):
+        """Structures are written back exactly as they were read"""
+
+        for fname in ('dummy.pdb', 'dummy_insertions.pdb', 'hetatm.pdb'):
+            lines = self.read_lines(fname)
+            for float32 in (False, True):
+                structure = self.module.from_pdb(lines, float32=float32)
+                loaded = self.module.load(self.write(structure))
+
+                self.assertEqual(len(loaded), len(structure))
+                self.assertEqual(list(loaded.iter_lines()), lines)
+
+    def test_stream(self):
+        """Streams that cannot be mapped are read in full"""
+
+        lines = self.read_lines('dummy.pdb')
+        data = io.BytesIO()
+        self.module.from_pdb(lines).dump(data)
+        data.seek(0)
+
+        loaded = self.module.load(data)
+        self.assertEqual(list(loaded.iter_lines()), lines)
+
+    def test_columns(self):
+        """Columns are typed views of the file"""
+
+        lines = [l for l in self.read_lines('dummy.pdb')
+                 if l.startswith(('ATOM', 'HETATM'))]
+        structure = self.module.from_pdb(lines)
+        loaded = self.module.load(self.write(structure))
+
+        self.assertAlmostEqual(loaded.columns['x'][0], float(lines[0][30:38]))
+        self.assertEqual(loaded.columns['serial'][-1], int(lines[-1][6:11]))
+        self.assertEqual(loaded.text('name')[1], lines[1][12:16])
+        self.assertEqual(len(loaded.column('b')), len(lines))
+
+    def test_models(self):
+        """Model index is kept when selecting atoms"""
+
+        lines = self.read_lines('ensemble_OK.pdb')
+        structure = self.module.from_pdb(lines)
+        self.assertEqual(list(structure.models), [0, 2])
+        self.assertEqual(structure.model_range(1), (2, 4))
+
+        subset = structure.take([1, 3])
+        self.assertEqual(list(subset.models), [0, 1])
+
+        loaded = self.module.load(self.write(subset))
+        output = [l[:6] for l in loaded.iter_lines()]
+        self.assertEqual(output.count('ATOM  '), 2)
+        self.assertEqual(output.count('MODEL '), 2)
+        self.assertEqual(output.index('ENDMDL'), 4)
+
+    def test_sniff(self):
+        """sniff() only loads binary files"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            self.assertIs(self.module.sniff(fh), fh)
+            self.assertEqual(fh.readline()[:6], 'HEADER')
+
+        structure = self.module.from_pdb(self.read_lines('dummy.pdb'))
+        with open(self.write(structure)) as fh:
+            loaded = self.module.sniff(fh)
+            self.assertIsInstance(loaded, self.module.BinaryStructure)
+
+    def test_invalid(self):
+        """Invalid files raise BinaryFormatError"""
+
+        structure = self.module.from_pdb(self.read_lines('dummy.pdb'))
+        data = io.BytesIO()
+        structure.dump(data)
+
+        bad = [b'HEADER', b'x' * 64, data.getvalue()[:-100]]
+        for content in bad:
+            with self.assertRaises(self.module.BinaryFormatError):
+                self.module.load(io.BytesIO(content))
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.core.index`.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from config import data_dir
+
+
+class TestIndex(unittest.TestCase):
+    """
+    Tests for the byte-offset index.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.core.index'
+        self.module = __import__(name, fromlist=[''])
+
+        self.tempdir = tempfile.mkdtemp()
+        self.fpath = os.path.join(self.tempdir, 'ensemble.pdb')
+        shutil.copy(os.path.join(data_dir, 'ensemble_OK.pdb'), self.fpath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_build(self):
+        """build_index() records models, chains and residues"""
+
+        index = self.module.build_index(self.fpath)
+        with open(self.fpath, 'rb') as fh:
+            data = fh.read()
+
+        self.assertEqual(index['size'], len(data))
+        self.assertEqual([m[0] for m in index['models']], [1, 2])
+
+        number, start, end = index['models'][1]
+        model = data[start:end].decode()
+        self.assertTrue(model.startswith('MODEL        2'))
+        self.assertTrue(model.endswith('ENDMDL' + ' ' * 74 + '\n'))
+
+        chain, start, end = index['chains'][0]
+        self.assertEqual(chain, 'A')
+        lines = data[start:end].decode().splitlines()
+        self.assertEqual([l[:4] for l in lines], ['ATOM', 'ATOM'])
+
+        self.assertEqual(index['residues'][0][0], 'A   1 ')
+
+    def test_read(self):
+        """read_index() returns valid indexes only"""
+
+        self.assertIsNone(self.module.read_index(self.fpath))
+
+        index = self.module.write_index(self.fpath)
+        self.assertEqual(self.module.read_index(self.fpath), index)
+
+        # Same content, new modification time
+        mtime = time.time() + 10
+        os.utime(self.fpath, (mtime, mtime))
+        self.assertEqual(self.module.read_index(self.fpath), index)
+
+        # Same size, different content
+        with open(self.fpath, 'r+b') as fh:
+            fh.write(b'REMARK')
+        os.utime(self.fpath, (mtime + 10, mtime + 10))
+        self.assertIsNone(self.module.read_index(self.fpath))
+
+    def test_ranges(self):
+        """iter_ranges() reads the lines of the complement of ranges"""
+
+        index = self.module.build_index(self.fpath)
+        skip = [(s, e) for _, s, e in index['models']]
+        ranges = self.module.complement(skip, index['size'])
+
+        lines = list(self.module.iter_ranges(self.fpath, ranges))
+        self.assertEqual([l[:6] for l in lines], ['HEADER', 'TITLE ', 'END   '])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
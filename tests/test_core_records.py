@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.core.records`.
+"""
+
+import os
+import sys
+import unittest
+
+from config import data_dir
+
+
+class TestRecords(unittest.TestCase):
+    """
+    Tests for the columnar ATOM/HETATM store.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.core.records'
+        self.module = __import__(name, fromlist=[''])
+
+    def read_lines(self, fname):
+        """Returns the coordinate lines of a file in data/"""
+        with open(os.path.join(data_dir, fname)) as fh:
+            return [l for l in fh if l.startswith(('ATOM', 'HETATM'))]
+
+    def test_roundtrip(self):
+        """Records are written back exactly as they were read"""
+
+        for fname in ('dummy.pdb', 'dummy_insertions.pdb', 'hetatm.pdb'):
+            lines = self.read_lines(fname)
+            records = self.module.AtomRecords(lines)
+
+            self.assertEqual(len(records), len(lines))
+            self.assertEqual(list(records), lines)
+
+    def test_columns(self):
+        """Fields are parsed once into typed columns"""
+
+        lines = self.read_lines('dummy.pdb')
+        records = self.module.AtomRecords(lines)
+
+        self.assertEqual(records.serial[0], int(lines[0][6:11]))
+        self.assertEqual(records.resseq[0], int(lines[0][22:26]))
+        self.assertEqual(records.name[0], lines[0][12:16])
+        self.assertEqual(records.chain[-1], lines[-1][21])
+        self.assertAlmostEqual(records.x[0], float(lines[0][30:38]))
+        self.assertAlmostEqual(records.b[-1], float(lines[-1][60:66]))
+
+        xyz = records.coordinates()
+        self.assertEqual(len(xyz), len(lines))
+        self.assertAlmostEqual(xyz[1][2], float(lines[1][46:54]))
+
+    def test_modify(self):
+        """Modified columns are formatted in fixed columns"""
+
+        lines = self.read_lines('dummy.pdb')
+        records = self.module.AtomRecords(lines)
+        records.chain[0] = 'Z'
+        records.b[0] = 99.5
+
+        new_line = records.format_record(0)
+        self.assertEqual(new_line[21], 'Z')
+        self.assertEqual(new_line[60:66], ' 99.50')
+        self.assertEqual(new_line[:21], lines[0][:21])
+        self.assertEqual(new_line[66:], lines[0][66:])
+
+    def test_short_lines(self):
+        """Blank occupancy/b-factor are kept blank"""
+
+        line = 'ATOM      1  N   ARG A   1      10.000  20.000  30.000\n'
+        records = self.module.AtomRecords([line])
+
+        self.assertNotEqual(records.occ[0], records.occ[0])  # NaN
+        self.assertEqual(records.format_record(0), line)
+
+    def test_invalid_field(self):
+        """Unparsable numerical fields raise RecordError"""
+
+        lines = [
+            ('serial', 'ATOM  A0000  N   ALA A   1      11.104   6.134  -6.504  1.00  0.00           N\n'),
+            ('resseq', 'ATOM      1  N   ALA A          11.104   6.134  -6.504  1.00  0.00           N\n'),
+            ('x', 'ATOM      1  N   ALA A   1\n'),
+            ('b', 'ATOM      1  N   ALA A   1      11.104   6.134  -6.504  1.00 x0.00           N\n'),
+        ]
+
+        records = self.module.AtomRecords()
+        for field, line in lines:
+            with self.assertRaises(self.module.RecordError) as context:
+                records.append(line)
+            self.assertEqual(context.exception.field, field)
+            self.assertEqual(context.exception.line, line.rstrip('\n'))
+
+        # Columns are left unchanged
+        self.assertEqual(len(records), 0)
+        self.assertEqual(len(records.name), 0)
+
+    def test_take(self):
+        """take() reorders records"""
+
+        lines = self.read_lines('dummy.pdb')
+        records = self.module.AtomRecords(lines)
+        subset = records.take([2, 0])
+
+        self.assertEqual(list(subset), [lines[2], lines[0]])
+
+    def test_iter_blocks(self):
+        """iter_blocks() groups coordinate records and keeps other lines"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            original = fh.readlines()
+
+        with open(fpath) as fh:
+            output = []
+            for item in self.module.iter_blocks(fh):
+                if isinstance(item, self.module.AtomRecords):
+                    output.extend(item)
+                else:
+                    output.append(item)
+
+        self.assertEqual(output, original)
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdbtools.core.streams`.
+"""
+
+import bz2
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+
+try:
+    import lzma
+except ImportError:  # Python 2
+    lzma = None
+
+
+class _Stdin(io.TextIOWrapper):
+    """Stands in for sys.stdin, with a buffer that can be peeked."""
+
+    def __init__(self, data):
+        super(_Stdin, self).__init__(io.BufferedReader(io.BytesIO(data)))
+
+    @property
+    def name(self):
+        return '<stdin>'
+
+    def isatty(self):
+        return False
+
+
+class TestStreams(unittest.TestCase):
+    """
+    Tests for the shared input streams.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.core.streams'
+        self.module = __import__(name, fromlist=[''])
+
+        self.tempdir = tempfile.mkdtemp()
+        with open(os.path.join(data_dir, 'dummy.pdb'), 'rb') as fh:
+            self.data = fh.read()
+
+        self._stdin = sys.stdin
+
+    def tearDown(self):
+        sys.stdin = self._stdin
+        shutil.rmtree(self.tempdir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tempdir, name)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    def _compressed(self):
+        """Yields (compression, data) for each supported compression."""
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb') as gz:
+            gz.write(self.data)
+        yield 'gzip', buf.getvalue()
+        yield 'bzip2', bz2.compress(self.data)
+        if lzma is not None:
+            yield 'xz', lzma.compress(self.data)
+
+    def test_detect_compression(self):
+        """detect_compression() looks at the first bytes"""
+
+        for compression, data in self._compressed():
+            self.assertEqual(self.module.detect_compression(data[:6]),
+                             compression)
+        self.assertIsNone(self.module.detect_compression(self.data[:6]))
+        self.assertIsNone(self.module.detect_compression(b''))
+
+    def test_open_plain(self):
+        """open_input() opens uncompressed files as open()"""
+
+        path = self._write('dummy.pdb', self.data)
+        with self.module.open_input(path) as fh:
+            self.assertEqual(fh.name, path)
+            self.assertEqual(fh.read(), self.data.decode())
+            self.assertIsNone(getattr(fh, 'compression', None))
+
+    def test_open_compressed(self):
+        """open_input() decompresses files, whatever their name"""
+
+        for compression, data in self._compressed():
+            path = self._write('dummy_' + compression, data)
+            fh = self.module.open_input(path)
+
+            self.assertEqual(fh.name, path)
+            self.assertEqual(fh.compression, compression)
+            self.assertEqual(list(fh), self.data.decode().splitlines(True))
+            self.assertRaises(io.UnsupportedOperation, fh.fileno)
+
+            fh.close()
+            self.assertTrue(fh.closed)
+
+    def test_stdin_compressed(self):
+        """open_input() decompresses stdin, on the first read"""
+
+        for compression, data in self._compressed():
+            sys.stdin = _Stdin(data)
+            fh = self.module.open_input()
+
+            self.assertEqual(fh.name, '<stdin>')
+            self.assertFalse(fh.isatty())
+            self.assertEqual(sys.stdin.buffer.tell(), 0)  # nothing read yet
+
+            self.assertEqual(list(fh), self.data.decode().splitlines(True))
+            fh.close()
+
+    def test_stdin_plain(self):
+        """open_input() reads uncompressed stdin as is"""
+
+        sys.stdin = _Stdin(self.data)
+        fh = self.module.open_input()
+        self.assertEqual(fh.readline(), self.data.decode().splitlines(True)[0])
+
+    def test_stdin_standin(self):
+        """open_input() returns stand-ins for stdin without a buffer"""
+
+        sys.stdin = io.StringIO(u'ATOM\n')
+        self.assertIs(self.module.open_input(), sys.stdin)
+
+    def test_open_binary(self):
+        """open_input(binary=True) reads bytes, decompressed or not"""
+
+        path = self._write('dummy.pdb', self.data)
+        with self.module.open_input(path, binary=True) as fh:
+            self.assertEqual(fh.name, path)
+            self.assertEqual(list(fh), self.data.splitlines(True))
+
+        for compression, data in self._compressed():
+            path = self._write('dummy_' + compression, data)
+            with self.module.open_input(path, binary=True) as fh:
+                self.assertEqual(fh.compression, compression)
+                self.assertEqual(list(fh), self.data.splitlines(True))
+
+            sys.stdin = _Stdin(data)
+            fh = self.module.open_input(binary=True)
+            self.assertEqual(list(fh), self.data.splitlines(True))
+
+    def test_open_binary_crlf(self):
+        """open_input(binary=True) reads text if lines end in \\r\\n"""
+
+        data = self.data.replace(b'\n', b'\r\n')
+        path = self._write('dummy.pdb', data)
+        with self.module.open_input(path, binary=True) as fh:
+            self.assertEqual(list(fh), self.data.decode().splitlines(True))
+
+        sys.stdin = _Stdin(bz2.compress(data))
+        fh = self.module.open_input(binary=True)
+        self.assertEqual(list(fh), self.data.decode().splitlines(True))
+
+    def test_peek_lines(self):
+        """peek_lines() tells bytes lines from text lines"""
+
+        lines, binary = self.module.peek_lines([b'ATOM\n', b'END\n'])
+        self.assertEqual(list(lines), [b'ATOM\n', b'END\n'])
+        self.assertEqual(binary, bytes is not str)
+
+        lines, binary = self.module.peek_lines(iter([u'ATOM\n']))
+        self.assertEqual(list(lines), [u'ATOM\n'])
+        self.assertFalse(binary)
+
+        lines, binary = self.module.peek_lines([])
+        self.assertEqual(list(lines), [])
+
+        self.assertEqual(self.module.as_bytes(('ATOM', set(['A']))),
+                         (b'ATOM', set([b'A'])))
+
+    def test_output_file(self):
+        """OutputSink writes files atomically, compressed or not"""
+
+        lines = self.data.decode().splitlines(True)
+        for compression in (None, 'gzip', 'bzip2', 'xz'):
+            if compression == 'xz' and lzma is None:
+                continue
+            path = os.path.join(self.tempdir, 'out_{}'.format(compression))
+
+            sink = self.module.OutputSink(path, compression)
+            sink.writelines(lines)
+            self.assertFalse(os.path.exists(path))  # not complete yet
+            sink.close()
+
+            self.assertFalse(os.path.exists(self.module.temp_path(path)))
+            with self.module.open_input(path) as fh:
+                self.assertEqual(list(fh), lines)
+
+    def test_output_file_error(self):
+        """OutputSink leaves no file behind after an error"""
+
+        path = os.path.join(self.tempdir, 'out.pdb')
+        try:
+            with self.module.open_output(path) as output:
+                output.write(b'ATOM\n')
+                raise RuntimeError('stop')
+        except RuntimeError:
+            pass
+        self.assertEqual(os.listdir(self.tempdir), [])
+
+    def test_output_stdout(self):
+        """write_lines() writes str and bytes to stdout and its stand-ins"""
+
+        path = os.path.join(self.tempdir, 'stdout')
+        _stdout = sys.stdout
+        try:
+            with open(path, 'w') as sys.stdout:
+                sys.stdout.write('HEADER\n')
+                self.module.write_lines([b'ATOM\n', b'END\n'])
+                self.module.write_lines(iter(['TER\n']))
+
+            sys.stdout = io.StringIO()
+            self.module.write_lines([b'ATOM\n', b'END\n'])
+            self.assertEqual(sys.stdout.getvalue(), u'ATOM\nEND\n')
+        finally:
+            sys.stdout = _stdout
+
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'HEADER\nATOM\nEND\nTER\n')
+
+    def test_output_broken_pipe(self):
+        """write_lines() stops quietly when the reader goes away"""
+
+        read_fd, write_fd = os.pipe()
+        os.close(read_fd)
+        _stdout = sys.stdout
+        try:
+            sys.stdout = os.fdopen(write_fd, 'w')
+            self.module.write_lines(self.data for _ in range(100))
+            sys.stdout.write('ATOM\n')
+            sys.stdout.close()  # would fail if not sent to os.devnull
+        finally:
+            sys.stdout = _stdout
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Unit Tests for `pdbtools.dispatch`.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+try:
+    import zipapp
+except ImportError:  # Python 2
+    zipapp = None
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.dispatch'
+        self.module = __import__(name, fromlist=[''])
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def test_list_tools(self):
+        """list_tools() and find_tool() know all tools"""
+
+        tools = self.module.list_tools()
+        self.assertIn('selchain', tools)
+        self.assertIn('wc', tools)
+        self.assertNotIn('dispatch', tools)
+
+        for name in ('selchain', 'pdb_selchain', 'pdb_selchain.py'):
+            self.assertEqual(self.module.find_tool(name), 'selchain')
+        for name in ('dispatch', 'pdb_nothing', '../pdb_wc', ''):
+            self.assertIsNone(self.module.find_tool(name))
+
+    def test_run_tool(self):
+        """$ pdbtools wc data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'wc', fpath]
+        self.exec_module()
+        dispatched = self.stdout
+
+        sys.argv = ['', fpath]
+        self.module = __import__('pdbtools.pdb_wc', fromlist=[''])
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(dispatched, self.stdout)
+
+    def test_no_tool(self):
+        """$ pdbtools"""
+
+        sys.argv = ['']
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertIn('Tools:', self.stderr)
+        self.assertTrue(self.stderr[-1].endswith('validate wc'))
+
+    def test_unknown_tool(self):
+        """$ pdbtools nothing data/dummy.pdb"""
+
+        sys.argv = ['', 'nothing', os.path.join(data_dir, 'dummy.pdb')]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0], "ERROR!! Unknown tool: 'nothing'")
+
+    @unittest.skipIf(zipapp is None, 'zipapp requires Python 3.5+')
+    def test_zipapp(self):
+        """$ pdbtools -zipapp pdbtools.pyz"""
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        target = os.path.join(tmpdir, 'pdbtools.pyz')
+
+        sys.argv = ['', '-zipapp', target]
+        self.exec_module()
+        self.assertEqual(self.retcode, 0)
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        env = dict(os.environ)
+        env.pop('PYTHONPATH', None)  # use only the zip file
+        output = subprocess.check_output(
+            [sys.executable, target, 'selchain', '-A', fpath],
+            cwd=tmpdir, env=env)
+
+        lines = output.decode().splitlines()
+        self.assertEqual(len(lines), 76)
+        self.assertTrue(all(l[21] == 'A' for l in lines
+                            if l.startswith(('ATOM', 'HETATM'))))
+
+    def test_zipapp_missing_value(self):
+        """$ pdbtools -zipapp"""
+
+        sys.argv = ['', '-zipapp']
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! Option requires a value: '-zipapp'")
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -89,6 +89,31 @@ class TestTool(unittest.TestCase):
         unique_bfac = list(set(map(float, bfactors)))
         self.assertEqual(unique_bfac, [20.00])
 
+    def test_binary(self):
+        """pdb_b on a binary structure matches the PDB output"""
+        from pdbtools.core.binary import from_pdb
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            expected = list(self.module.alter_bfactor(fh, 20.0))
+
+        with open(fpath) as fh:
+            structure = from_pdb(fh)
+
+        result = self.module.alter_bfactor_binary(structure, 20.0)
+        self.assertEqual(list(result.iter_lines()), expected)
+
+    def test_bytes(self):
+        """alter_bfactor() gives the same output on bytes and text lines"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath, 'rb') as fh:
+            lines = fh.readlines()
+
+        result = list(self.module.alter_bfactor(lines, 12.5))
+        expected = self.module.alter_bfactor([l.decode() for l in lines], 12.5)
+        self.assertEqual([l.decode() for l in result], list(expected))
+
     def test_file_not_found(self):
         """$ pdb_b not_existing.pdb"""
 
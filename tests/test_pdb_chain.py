@@ -88,6 +88,20 @@ class TestTool(unittest.TestCase):
         unique_chain_ids = list(set(chain_ids))
         self.assertEqual(unique_chain_ids, ['X'])
 
+    def test_binary(self):
+        """pdb_chain on a binary structure matches the PDB output"""
+        from pdbtools.core.binary import from_pdb
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            expected = list(self.module.alter_chain(fh, 'Z'))
+
+        with open(fpath) as fh:
+            structure = from_pdb(fh)
+
+        result = self.module.alter_chain_binary(structure, 'Z')
+        self.assertEqual(list(result.iter_lines()), expected)
+
     def test_file_not_found(self):
         """$ pdb_chain -A not_existing.pdb"""
 
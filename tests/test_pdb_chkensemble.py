@@ -140,6 +140,29 @@ class TestTool(unittest.TestCase):
         self.assertEqual(self.stderr[0],
                          "ERROR!! MODEL record found before ENDMDL at line '6'")
 
+    def test_fail_fast(self):
+        """pdb_chkensemble -fail-fast stops at the first model that differs"""
+
+        with open(os.path.join(data_dir, 'ensemble_OK.pdb')) as fh:
+            lines = fh.readlines()
+
+        # Three models: 2 and 3 lack the H atom of model 1
+        model = lines[2:6]
+        bad_model = [l for l in model if l[12:16] != ' H  ']
+        ensemble = model
+        for number in (2, 3):
+            ensemble += ['MODEL     {:>4d}\n'.format(number)] + bad_model[1:]
+
+        for fail_fast, n_diffs in ((False, 2), (True, 1)):
+            with OutputCapture() as output:
+                retcode = self.module.check_ensemble(ensemble, fail_fast)
+
+            self.assertEqual(retcode, 1)
+            self.assertEqual(len(output.stdout), 0)
+            headers = [l for l in output.stderr if l.startswith('Models')]
+            self.assertEqual(len(headers), n_diffs)
+            self.assertEqual(headers[0], 'Models 1 and 2 differ:')
+
     def test_file_not_found(self):
         """$ pdb_chkensemble not_existing.pdb"""
 
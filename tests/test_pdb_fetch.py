@@ -0,0 +1,502 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_fetch`.
+
+Structures are served from a local directory (mirror) or a local HTTP server,
+never from the RCSB PDB.
+"""
+
+import binascii
+import gzip
+from io import BytesIO
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+try:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler  # python 3.x
+except ImportError:
+    from BaseHTTPServer import HTTPServer  # python 2.7
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TrackedStream(BytesIO):
+    """In-memory stream that records how much was read from it"""
+
+    consumed = 0
+
+    def read(self, size=-1):
+        chunk = BytesIO.read(self, size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_fetch'
+        self.module = __import__(name, fromlist=[''])
+
+        # Local mirror with a single structure
+        self.tempdir = tempfile.mkdtemp()
+        self.mirror = os.path.join(self.tempdir, 'mirror')
+        self.cache = os.path.join(self.tempdir, 'cache')
+        os.makedirs(self.mirror)
+
+        with open(os.path.join(data_dir, 'dummy.pdb'), 'rb') as handle:
+            self.pdbdata = handle.read()
+        self.add_to_mirror('1abc.pdb.gz', self.pdbdata)
+
+        self._environ = dict(os.environ)
+        os.environ['PDBTOOLS_FETCH_URL'] = self.mirror
+        os.environ['PDBTOOLS_CACHE'] = self.cache
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self._environ)
+        shutil.rmtree(self.tempdir)
+
+    def gzip_data(self, data):
+        """Returns gzip-compressed data"""
+        buf = BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb') as handle:
+            handle.write(data)
+        return buf.getvalue()
+
+    def add_to_mirror(self, name, data):
+        """Writes a gzipped file to the mirror directory"""
+        with gzip.open(os.path.join(self.mirror, name), 'wb') as handle:
+            handle.write(data)
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def test_fetch_mirror(self):
+        """$ pdb_fetch 1abc"""
+
+        sys.argv = ['', '1abc']
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+        self.assertEqual(self.stdout, self.pdbdata.decode('utf-8').splitlines())
+
+    def test_fetch_offline(self):
+        """$ pdb_fetch -offline 1abc"""
+
+        # Populate the cache, then remove the source
+        sys.argv = ['', '1abc']
+        self.exec_module()
+        self.assertEqual(self.retcode, 0)
+        os.remove(os.path.join(self.mirror, '1abc.pdb.gz'))
+
+        sys.argv = ['', '-offline', '1abc']
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+        self.assertEqual(self.stdout, self.pdbdata.decode('utf-8').splitlines())
+
+    def test_fetch_offline_missing(self):
+        """$ pdb_fetch -offline 2abc"""
+
+        sys.argv = ['', '-offline', '2abc']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "[!] Error fetching structure: (None) Not in cache (offline mode)")
+
+    def test_fetch_not_found(self):
+        """$ pdb_fetch 2abc"""
+
+        sys.argv = ['', '2abc']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "[!] Error fetching structure: (404) Not Found")
+
+    def test_cache_revalidation(self):
+        """Stale entries are revalidated and updated"""
+
+        from pdbtools.core.fetch import StructureCache, MirrorBackend
+
+        backend = MirrorBackend(self.mirror)
+        cache = StructureCache(self.cache, max_age=0)  # always revalidate
+
+        first = cache.get('1abc.pdb.gz', backend)
+        self.assertEqual(cache.get('1abc.pdb.gz', backend), first)
+
+        # Change the file upstream
+        self.add_to_mirror('1abc.pdb.gz', self.pdbdata[:81])
+        os.utime(os.path.join(self.mirror, '1abc.pdb.gz'), (0, 0))
+
+        second = cache.get('1abc.pdb.gz', backend)
+        self.assertNotEqual(first, second)
+        self.assertFalse(os.path.exists(first))  # no longer referenced
+
+    def test_cache_eviction(self):
+        """Least recently used entries are evicted above the size limit"""
+
+        from pdbtools.core.fetch import StructureCache, MirrorBackend
+
+        self.add_to_mirror('2abc.pdb.gz', self.pdbdata[:810])
+        self.add_to_mirror('3abc.pdb.gz', self.pdbdata[:1620])
+        sizes = [os.path.getsize(os.path.join(self.mirror, n))
+                 for n in ('1abc.pdb.gz', '2abc.pdb.gz', '3abc.pdb.gz')]
+
+        backend = MirrorBackend(self.mirror)
+        cache = StructureCache(self.cache, max_size=sizes[1] + sizes[2])
+
+        path_1 = cache.get('1abc.pdb.gz', backend)
+        path_2 = cache.get('2abc.pdb.gz', backend)
+        path_3 = cache.get('3abc.pdb.gz', backend)
+
+        self.assertFalse(os.path.exists(path_1))
+        self.assertTrue(os.path.exists(path_2))
+        self.assertTrue(os.path.exists(path_3))
+
+        # Index is persisted
+        cache = StructureCache(self.cache)
+        self.assertEqual(cache.get('2abc.pdb.gz', backend, offline=True), path_2)
+
+    def test_cache_shared(self):
+        """Caches sharing a directory keep each other's entries"""
+
+        from pdbtools.core.fetch import StructureCache, MirrorBackend
+
+        self.add_to_mirror('2abc.pdb.gz', self.pdbdata[:810])
+        self.add_to_mirror('3abc.pdb.gz', self.pdbdata[:1620])
+        sizes = [os.path.getsize(os.path.join(self.mirror, n))
+                 for n in ('1abc.pdb.gz', '2abc.pdb.gz', '3abc.pdb.gz')]
+
+        backend = MirrorBackend(self.mirror)
+        max_size = sizes[0] + sizes[2]
+        cache_a = StructureCache(self.cache, max_size=max_size)
+        cache_b = StructureCache(self.cache, max_size=max_size)
+
+        path_1 = cache_a.get('1abc.pdb.gz', backend)
+        path_2 = cache_b.get('2abc.pdb.gz', backend)
+        os.utime(path_1, (0, 0))
+        os.utime(path_2, (1, 1))
+
+        # A hit marks the object as used, without rewriting the index
+        index = os.path.join(self.cache, 'index.json')
+        stat = os.stat(index)
+        self.assertEqual(cache_a.get('2abc.pdb.gz', backend), path_2)
+        self.assertEqual(os.stat(index), stat)
+
+        # 1abc is now the least recently used entry, and goes first
+        path_3 = cache_a.get('3abc.pdb.gz', backend)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.cache, 'objects'))),
+                         sorted(os.path.basename(p) for p in (path_2, path_3)))
+
+        cache = StructureCache(self.cache)
+        self.assertEqual(cache.get('2abc.pdb.gz', backend, offline=True), path_2)
+        self.assertEqual(cache.get('3abc.pdb.gz', backend, offline=True), path_3)
+
+    def test_cache_evicted_meanwhile(self):
+        """Objects removed by another process before being opened are fetched again"""
+
+        from pdbtools.core.fetch import FetchError, StructureCache, MirrorBackend
+
+        backend = MirrorBackend(self.mirror)
+        cache = StructureCache(self.cache)
+        path = cache.get('1abc.pdb.gz', backend)
+
+        touch = cache._touch
+
+        def _touch_and_evict(name, checked=False):
+            path = touch(name, checked)
+            os.remove(path)  # e.g. by another process
+            return path
+
+        cache._touch = _touch_and_evict
+
+        with self.assertRaises(FetchError):
+            cache.open('1abc.pdb.gz', backend, offline=True)
+
+        self.assertEqual(cache.get('1abc.pdb.gz', backend), path)  # a miss
+        stream = cache.open('1abc.pdb.gz', backend)
+        try:
+            data = stream.read()
+            stream.read()  # EOF, saved again
+        finally:
+            stream.close()
+        with open(os.path.join(self.mirror, '1abc.pdb.gz'), 'rb') as handle:
+            self.assertEqual(data, handle.read())
+        self.assertTrue(os.path.isfile(path))
+
+    def test_fetch_http(self):
+        """$ pdb_fetch 1abc (local HTTP server)"""
+
+        mirror = self.mirror
+
+        class Handler(SimpleHTTPRequestHandler):
+            def translate_path(self, path):
+                return os.path.join(mirror, os.path.basename(path))
+
+            def log_message(self, *args):
+                pass
+
+        server = self.start_server(Handler)
+        try:
+            sys.argv = ['', '1abc']
+            self.exec_module()
+        finally:
+            self.stop_server(server)
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+        self.assertEqual(self.stdout, self.pdbdata.decode('utf-8').splitlines())
+
+    def start_server(self, handler):
+        """Starts a local HTTP server serving files from the mirror"""
+
+        server = HTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        url = 'http://127.0.0.1:{}/download/'.format(server.server_address[1])
+        os.environ['PDBTOOLS_FETCH_URL'] = url
+        return server
+
+    def stop_server(self, server):
+        server.shutdown()
+        server.server_close()
+
+    def test_bulk_mirror(self):
+        """$ pdb_fetch -list ids.txt -outdir out -jobs 2"""
+
+        self.add_to_mirror('2abc.pdb.gz', self.pdbdata[:810])
+        idfile = os.path.join(self.tempdir, 'ids.txt')
+        with open(idfile, 'w') as handle:
+            handle.write('1abc, 2abc  # two structures\n3abc\n')
+        outdir = os.path.join(self.tempdir, 'out')
+
+        sys.argv = ['', '-list', idfile, '-outdir', outdir, '-jobs', '2']
+
+        # Execute the script
+        self.exec_module()
+
+        # One failure (3abc)
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stderr), 0)
+
+        report = sorted(l.split('\t') for l in self.stdout)
+        self.assertEqual([r[:2] for r in report],
+                         [['1abc', 'OK'], ['2abc', 'OK'], ['3abc', 'ERROR']])
+        self.assertEqual(report[2][2], '(404) Not Found')
+
+        with open(os.path.join(outdir, '1abc.pdb'), 'rb') as handle:
+            self.assertEqual(handle.read(), self.pdbdata)
+        with open(os.path.join(outdir, '2abc.pdb'), 'rb') as handle:
+            self.assertEqual(handle.read(), self.pdbdata[:810])
+
+        # No temporary files left behind
+        self.assertEqual(sorted(os.listdir(outdir)), ['1abc.pdb', '2abc.pdb'])
+
+    def test_bulk_file_mode(self):
+        """Downloaded files are created with the umask applied"""
+
+        umask = os.umask(0o027)
+        try:
+            path = self.module.fetch_to_file('1abc', self.tempdir)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    def test_bulk_http_keepalive_retry(self):
+        """Bulk downloads reuse connections and retry server errors"""
+
+        mirror = self.mirror
+        stats = {'connections': 0, 'failures': 1}
+
+        class Handler(SimpleHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def setup(self):
+                stats['connections'] += 1
+                SimpleHTTPRequestHandler.setup(self)
+
+            def do_GET(self):
+                if stats['failures']:
+                    stats['failures'] -= 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                SimpleHTTPRequestHandler.do_GET(self)
+
+            def translate_path(self, path):
+                return os.path.join(mirror, os.path.basename(path))
+
+            def log_message(self, *args):
+                pass
+
+        for idx in range(2, 6):
+            self.add_to_mirror('{}abc.pdb.gz'.format(idx), self.pdbdata)
+
+        del os.environ['PDBTOOLS_CACHE']
+        server = self.start_server(Handler)
+        try:
+            outdir = os.path.join(self.tempdir, 'out')
+            os.makedirs(outdir)
+            codes = ['{}abc'.format(idx) for idx in range(1, 6)]
+            results = list(self.module.fetch_many(codes, outdir, jobs=1))
+        finally:
+            self.stop_server(server)
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertEqual(stats['connections'], 1)
+
+    def test_streaming(self):
+        """Lines are yielded before the download is complete"""
+
+        from pdbtools.core.fetch import Response, StructureCache
+
+        # Poorly compressible, so the download spans several chunks
+        noise = [binascii.hexlify(os.urandom(32)) for _ in range(10000)]
+        data = self.gzip_data(self.pdbdata + b'\n'.join(noise))
+        stream = TrackedStream(data)
+
+        class Backend(object):
+            def open(self, name, etag=None, last_modified=None):
+                return Response(stream)
+
+        cache = StructureCache(self.cache)
+        lines = self.module.fetch_structure('1abc', backend=Backend(),
+                                            cache=cache)
+        first = next(lines)
+        self.assertEqual(first, self.pdbdata.decode('utf-8').splitlines(True)[0])
+        self.assertTrue(stream.consumed < len(data))
+
+        # Stopping early does not leave a partial file in the cache
+        lines.close()
+        self.assertEqual(os.listdir(os.path.join(self.cache, 'objects')), [])
+
+    def test_truncated(self):
+        """Truncated downloads are reported"""
+
+        from pdbtools.core.fetch import FetchError, Response
+
+        data = self.gzip_data(self.pdbdata)[:-100]
+
+        class Backend(object):
+            def open(self, name, etag=None, last_modified=None):
+                return Response(TrackedStream(data))
+
+        lines = []
+        with self.assertRaises(FetchError):
+            for line in self.module.fetch_structure('1abc', backend=Backend()):
+                lines.append(line)
+        self.assertTrue(0 < len(lines) < len(self.pdbdata.splitlines()))
+
+        # The tool fails, even if some lines were written already
+        with open(os.path.join(self.mirror, '2abc.pdb.gz'), 'wb') as handle:
+            handle.write(data)
+        sys.argv = ['', '2abc']
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(self.stdout, [line.rstrip('\n') for line in lines][:len(self.stdout)])
+        self.assertEqual(self.stderr[0][:30], '[!] Error fetching structure: ')
+
+    def test_invalid_option(self):
+        """$ pdb_fetch -A 1abc"""
+
+        sys.argv = ['', '-A', '1abc']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0], "ERROR!! Invalid option: '-A'")
+
+    def test_invalid_code(self):
+        """$ pdb_fetch 1abcd"""
+
+        sys.argv = ['', '1abcd']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0], "ERROR!! Invalid PDB code: '1abcd'")
+
+    def test_helptext(self):
+        """$ pdb_fetch"""
+
+        sys.argv = ['']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)  # ensure the program exited gracefully.
+        self.assertEqual(len(self.stdout), 0)  # no output
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_frombin`.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_frombin'
+        self.module = __import__(name, fromlist=[''])
+
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def make_binary(self, fname):
+        """Converts a file in data/ to binary, returns its path"""
+        from pdbtools.core.binary import from_pdb
+
+        with open(os.path.join(data_dir, fname)) as fh:
+            structure = from_pdb(fh)
+
+        fpath = os.path.join(self.tempdir, fname + '.bin')
+        with open(fpath, 'wb') as binfile:
+            structure.dump(binfile)
+        return fpath
+
+    def test_conversion(self):
+        """$ pdb_frombin dummy.bin"""
+
+        sys.argv = ['', self.make_binary('dummy.pdb')]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+
+        with open(os.path.join(data_dir, 'dummy.pdb')) as fh:
+            expected = fh.read().splitlines()
+        self.assertEqual(self.stdout, expected)
+
+    def test_not_binary(self):
+        """$ pdb_frombin data/dummy.pdb"""
+
+        sys.argv = ['', os.path.join(data_dir, 'dummy.pdb')]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:32],
+                         "ERROR!! Could not read binary fi")
+
+    def test_file_not_found(self):
+        """$ pdb_frombin not_existing.bin"""
+
+        afile = os.path.join(data_dir, 'not_existing.bin')
+        sys.argv = ['', afile]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:22],
+                         "ERROR!! File not found")
+
+    def test_helptext(self):
+        """$ pdb_frombin"""
+
+        sys.argv = ['']
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
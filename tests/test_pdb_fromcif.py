@@ -73,6 +73,80 @@ class TestTool(unittest.TestCase):
         records = [l[:6] for l in self.stdout]
         self.assertEqual(records, expected)
 
+    def test_streaming(self):
+        """convert_to_pdb() writes models before reading the whole file"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.cif')
+        with open(fpath) as fh:
+            lines = fh.readlines()
+
+        consumed = []
+
+        def reader():
+            for line in lines:
+                consumed.append(line)
+                yield line
+
+        output = self.module.convert_to_pdb(reader())
+        first = next(output)
+
+        # The first MODEL is written once the second model starts
+        self.assertEqual(first[:6], 'MODEL ')
+        self.assertLess(len(consumed), len(lines))
+
+    def test_single_model_quoted(self):
+        """Single models have no MODEL records and quoted names are read"""
+
+        lines = [
+            'data_test\n',
+            'loop_\n',
+            '_atom_site.group_PDB\n',
+            '_atom_site.id\n',
+            '_atom_site.type_symbol\n',
+            '_atom_site.label_atom_id\n',
+            '_atom_site.label_alt_id\n',
+            '_atom_site.label_comp_id\n',
+            '_atom_site.label_asym_id\n',
+            '_atom_site.label_seq_id\n',
+            '_atom_site.pdbx_PDB_ins_code\n',
+            '_atom_site.Cartn_x\n',
+            '_atom_site.Cartn_y\n',
+            '_atom_site.Cartn_z\n',
+            '_atom_site.occupancy\n',
+            '_atom_site.B_iso_or_equiv\n',
+            '_atom_site.pdbx_formal_charge\n',
+            '_atom_site.pdbx_PDB_model_num\n',
+            'ATOM 1 C "C1\'" . G A 1 ? 1.000 2.000 3.000 1.00 0.00 ? 1\n',
+            'ATOM 2 N N . G A 1 ? 1.000 2.000 3.000 1.00 0.00 ? 1\n',
+            '#\n',
+        ]
+
+        output = list(self.module.convert_to_pdb(lines))
+
+        self.assertEqual(len(output), 3)
+        self.assertEqual(output[0][12:16], " C1'")
+        self.assertEqual(output[1][12:16], ' N  ')
+        self.assertEqual(output[2][:3], 'END')
+
+    def test_data_blocks(self):
+        """Text fields are skipped and data blocks become models"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.cif')
+        with open(fpath) as fh:
+            lines = [l for l in fh if l.startswith(('ATOM', 'loop_', '_'))]
+        lines = [l for l in lines if not l.startswith('_entry')]
+        atoms = [l for l in lines if l.startswith('ATOM')][:2]
+        header = [l for l in lines if not l.startswith('ATOM')]
+
+        block = ['_struct.title\n', ';ATOM 1 N N\n', ';\n'] + header + atoms
+        cif_lines = ['data_one\n'] + block + ['data_two\n'] + block
+
+        output = list(self.module.convert_to_pdb(cif_lines))
+        records = [l[:6] for l in output]
+        expected = ['MODEL ', 'ATOM  ', 'ATOM  ', 'ENDMDL',
+                    'MODEL ', 'ATOM  ', 'ATOM  ', 'ENDMDL', 'END   ']
+        self.assertEqual(records, expected)
+
     def test_file_not_found(self):
         """$ pdb_fromcif not_existing.pdb"""
 
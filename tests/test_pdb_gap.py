@@ -20,13 +20,21 @@ Unit Tests for `pdb_gap`.
 """
 
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
 from utils import OutputCapture
 
 
+def _atom(name, resn, chain, resi, x):
+    """Returns an ATOM record at (x, 0, 0)."""
+    fmt = 'ATOM      1 {:<4s} {:>3s} {}{:>4d}    {:8.3f}{:8.3f}{:8.3f}  1.00  0.00\n'
+    return fmt.format(name, resn, chain, resi, x, 0.0, 0.0)
+
+
 class TestTool(unittest.TestCase):
     """
     Generic class for testing tools.
@@ -74,6 +82,94 @@ class TestTool(unittest.TestCase):
                           "C:GLU2 <   95.75A > C:MET-1",
                           "Found 4 gap(s) in the structure"])
 
+    def _write(self, lines):
+        """Writes lines to a temporary file and returns its path."""
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'input.pdb')
+        with open(path, 'w') as fh:
+            fh.write(''.join(lines))
+        return path
+
+    def test_peptide(self):
+        """$ pdb_gap -peptide data/dummy.pdb"""
+
+        sys.argv = ['', '-peptide', os.path.join(data_dir, 'dummy.pdb')]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout,
+                         ["B:ARG4 < Seq. Gap > B:GLU6",
+                          "C:ARG5 < Seq. Gap > C:GLU2",
+                          "C:GLU2 <   96.38A > C:MET-1",
+                          "Found 3 gap(s) in the structure"])
+
+    def test_nucleic(self):
+        """$ pdb_gap -nucleic dna.pdb"""
+
+        lines = []
+        for resi, offset in ((1, 0.0), (2, 6.0), (3, 15.0)):
+            lines.append(_atom(' P', 'DA', 'A', resi, offset))
+            lines.append(_atom(" O3'", 'DA', 'A', resi, offset + 4.5))
+        lines.append(_atom(" O3'", 'DA', 'A', 5, 21.1))  # no P
+
+        sys.argv = ['', '-nucleic', self._write(lines)]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout,
+                         ["A: DA2 <    4.50A > A: DA3",
+                          "A: DA3 < Seq. Gap > A: DA5",
+                          "Found 2 gap(s) in the structure"])
+
+    def test_ensemble_jobs(self):
+        """$ pdb_gap -jobs 2 ensemble.pdb"""
+
+        lines = []
+        for model in range(1, 5):
+            lines.append('MODEL     {:>4d}\n'.format(model))
+            for resi in range(1, 4):
+                x = resi * 3.8
+                if model == 2 and resi == 3:  # too far
+                    x += 5.0
+                if model == 3 and resi == 3:  # numbering
+                    resi = 4
+                lines.append(_atom(' CA', 'ALA', 'A', resi, x))
+            lines.append('ENDMDL\n')
+
+        sys.argv = ['', '-jobs', '2', self._write(lines)]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout,
+                         ["A:ALA2 <    8.80A > A:ALA3",
+                          "A:ALA2 < Seq. Gap > A:ALA4",
+                          "Found 2 gap(s) in the structure"])
+
+    def test_exclusive_options(self):
+        """$ pdb_gap -peptide -nucleic data/dummy.pdb"""
+
+        sys.argv = ['', '-peptide', '-nucleic',
+                    os.path.join(data_dir, 'dummy.pdb')]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! Options -peptide and -nucleic are "
+                         "mutually exclusive")
+
     def test_file_not_found(self):
         """$ pdb_gap not_existing.pdb"""
 
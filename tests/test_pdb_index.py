@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_index`.
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_index'
+        self.module = __import__(name, fromlist=[''])
+
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def test_index(self):
+        """$ pdb_index data/dummy.pdb"""
+
+        fpath = os.path.join(self.tempdir, 'dummy.pdb')
+        shutil.copy(os.path.join(data_dir, 'dummy.pdb'), fpath)
+        sys.argv = ['', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout,
+                         [fpath + '.pdbidx: 0 models, 7 chains, 20 residues'])
+        self.assertTrue(os.path.isfile(fpath + '.pdbidx'))
+
+    def test_compressed(self):
+        """$ pdb_index dummy.pdb.gz"""
+
+        fpath = os.path.join(self.tempdir, 'dummy.pdb.gz')
+        with open(os.path.join(data_dir, 'dummy.pdb'), 'rb') as fh:
+            with gzip.open(fpath, 'wb') as gz:
+                gz.write(fh.read())
+        sys.argv = ['', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:40],
+                         "ERROR!! Compressed files cannot be index")
+        self.assertFalse(os.path.exists(fpath + '.pdbidx'))
+
+    def test_file_not_found(self):
+        """$ pdb_index not_existing.pdb"""
+
+        afile = os.path.join(data_dir, 'not_existing.pdb')
+        sys.argv = ['', afile]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:22],
+                         "ERROR!! File not found")
+
+    def test_helptext(self):
+        """$ pdb_index"""
+
+        sys.argv = ['']
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
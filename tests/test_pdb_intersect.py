@@ -20,7 +20,9 @@ Unit Tests for `pdb_intersect`.
 """
 
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
@@ -101,6 +103,72 @@ class TestTool(unittest.TestCase):
 
         self.assertEqual(atoms_list, atom_names)
 
+    def test_many_files(self):
+        """$ pdb_intersect -jobs 2 data/dummy.pdb a.pdb b.pdb c.pdb"""
+
+        with open(os.path.join(data_dir, 'dummy.pdb')) as fh:
+            lines = fh.readlines()
+        atoms = [l for l in lines if l.startswith(('ATOM', 'HETATM'))]
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        # Each file lacks a different set of atoms, in reverse order
+        subsets = [atoms[10:], atoms[:-10], atoms[::2] + atoms[1::2][:20]]
+        paths = []
+        for idx, subset in enumerate(subsets):
+            path = os.path.join(tmpdir, '{}.pdb'.format(idx))
+            with open(path, 'w') as fh:
+                fh.write(''.join(reversed(subset)))
+            paths.append(path)
+
+        sys.argv = ['', '-jobs', '2', os.path.join(data_dir, 'dummy.pdb')]
+        sys.argv += paths
+
+        # Execute the script
+        self.exec_module()
+
+        expected = [l for l in atoms if l in subsets[0] and
+                    l in subsets[1] and l in subsets[2]]
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout, [l.rstrip('\n') for l in expected])
+
+    def test_nothing_in_common(self):
+        """$ pdb_intersect data/dummy.pdb a.pdb b.pdb"""
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        empty = os.path.join(tmpdir, 'empty.pdb')
+        with open(empty, 'w') as fh:
+            fh.write('REMARK   1 EMPTY\nEND\n')
+
+        sys.argv = ['', os.path.join(data_dir, 'dummy.pdb'), empty,
+                    os.path.join(data_dir, 'dummy.pdb')]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(len(self.stderr), 0)
+
+    def test_invalid_jobs(self):
+        """$ pdb_intersect -jobs 0 data/dummy.pdb data/dummy.pdb"""
+
+        sys.argv = ['', '-jobs', '0', os.path.join(data_dir, 'dummy.pdb'),
+                    os.path.join(data_dir, 'dummy.pdb')]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:40],
+                         "ERROR!! Number of jobs must be a positiv")
+
     def test_file_not_found(self):
         """$ pdb_intersect not_existing.pdb"""
 
@@ -19,8 +19,12 @@
 Unit Tests for `pdb_merge`.
 """
 
+import bz2
+import gzip
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
@@ -68,6 +72,34 @@ class TestTool(unittest.TestCase):
         self.assertEqual(len(self.stdout), 408)  # no lines deleted
         self.assertEqual(len(self.stderr), 0)  # no errors
 
+    def test_compressed(self):
+        """$ pdb_merge dummy.pdb.gz dummy.pdb.bz2"""
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        with open(os.path.join(data_dir, 'dummy.pdb'), 'rb') as fh:
+            data = fh.read()
+
+        gz_path = os.path.join(tmpdir, 'dummy.pdb.gz')
+        with gzip.open(gz_path, 'wb') as gz:
+            gz.write(data)
+        bz2_path = os.path.join(tmpdir, 'dummy.pdb.bz2')
+        with open(bz2_path, 'wb') as fh:
+            fh.write(bz2.compress(data))
+
+        sys.argv = ['', os.path.join(data_dir, 'dummy.pdb'),
+                    os.path.join(data_dir, 'dummy.pdb')]
+        self.exec_module()
+        expected = self.stdout
+
+        sys.argv = ['', gz_path, bz2_path]
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout, expected)
+
     def test_file_not_found(self):
         """$ pdb_merge not_existing.pdb"""
 
@@ -89,6 +89,20 @@ class TestTool(unittest.TestCase):
         unique_occ = list(set(map(float, occ_list)))
         self.assertEqual(unique_occ, [0.5])
 
+    def test_binary(self):
+        """pdb_occ on a binary structure matches the PDB output"""
+        from pdbtools.core.binary import from_pdb
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            expected = list(self.module.alter_occupancy(fh, 0.5))
+
+        with open(fpath) as fh:
+            structure = from_pdb(fh)
+
+        result = self.module.alter_occupancy_binary(structure, 0.5)
+        self.assertEqual(list(result.iter_lines()), expected)
+
     def test_file_not_found(self):
         """$ pdb_occ not_existing.pdb"""
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_pipe`.
+"""
+
+try:
+    from StringIO import StringIO  # python 2.7
+except ImportError:
+    from io import StringIO  # python 3.x
+
+import os
+import sys
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_pipe'
+        self.module = __import__(name, fromlist=[''])
+
+    def exec_module(self, stdin=None):
+        """
+        Execs module.
+        """
+
+        if stdin is not None:
+            sys.stdin = StringIO(stdin)
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        sys.stdin = sys.__stdin__  # restore
+
+        return
+
+    def test_single_stage(self):
+        """$ pdb_pipe 'selchain:-A' data/dummy.pdb"""
+
+        sys.argv = ['', 'selchain:-A', os.path.join(data_dir, 'dummy.pdb')]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stdout), 76)  # same as pdb_selchain -A
+        self.assertEqual(len(self.stderr), 0)  # no errors
+
+    def test_multiple_stages(self):
+        """$ pdb_pipe 'selchain:-A | delhetatm | reres:-1 | tidy' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        spec = 'selchain:-A | delhetatm | reres:-1 | tidy'
+        sys.argv = ['', spec, fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+
+        # Compare with chaining the generators by hand
+        from pdbtools.pdb_selchain import select_chain
+        from pdbtools.pdb_delhetatm import remove_hetatm
+        from pdbtools.pdb_reres import renumber_residues
+        from pdbtools.pdb_tidy import tidy_pdbfile
+
+        with open(fpath) as fh:
+            chain = select_chain(fh, set(['A']))
+            chain = remove_hetatm(chain)
+            chain = renumber_residues(chain, 1)
+            chain = tidy_pdbfile(chain)
+            expected = ''.join(chain).splitlines()
+
+        self.assertEqual(self.stdout, expected)
+
+    def test_multiple_stages_stdin(self):
+        """$ cat data/dummy.pdb | pdb_pipe 'pdb_selatom:-CA | pdb_reatom -1'"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'pdb_selatom:-CA | pdb_reatom -1']
+
+        # Execute the script with file as stdin
+        with open(fpath) as fp:
+            self.exec_module(fp.read())
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+
+        atoms = [l for l in self.stdout if l.startswith(('ATOM', 'HETATM'))]
+        self.assertEqual(len(atoms), 11)  # 11 CA atoms in dummy.pdb
+        serials = [int(l[6:11]) for l in atoms]
+        self.assertEqual(serials[0], 1)  # renumbered after selection
+        self.assertEqual(serials, sorted(serials))
+
+    def test_tofasta(self):
+        """$ pdb_pipe 'selchain:-A,B | delhetatm | tofasta' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'selchain:-A,B | delhetatm | tofasta', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+        self.assertEqual(self.stdout, ['>PDB|AB', 'REANRE'])  # one record
+
+    def test_tofasta_multi(self):
+        """$ pdb_pipe 'selchain:-A,B | delhetatm | tofasta -multi' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'selchain:-A,B | delhetatm | tofasta -multi', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stderr), 0)  # no errors
+        self.assertEqual(self.stdout, ['>PDB|B', 'REA', '>PDB|A', 'NRE'])
+
+    def test_unknown_tool(self):
+        """$ pdb_pipe 'selchain:-A | pdb_fetch' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'selchain:-A | fetch', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:30],
+                         "ERROR!! Invalid pipeline: tool")
+
+    def test_empty_stage(self):
+        """$ pdb_pipe 'selchain:-A || tidy' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'selchain:-A || tidy', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:31],
+                         "ERROR!! Invalid pipeline: empty")
+
+    def test_invalid_stage_option(self):
+        """$ pdb_pipe 'selchain:-AB' data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', 'selchain:-AB', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:47],
+                         "ERROR!! Chain identifier name is invalid: 'AB'")
+
+    def test_file_not_found(self):
+        """$ pdb_pipe 'tidy' not_existing.pdb"""
+
+        afile = os.path.join(data_dir, 'not_existing.pdb')
+        sys.argv = ['', 'tidy', afile]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:22],
+                         "ERROR!! File not found")
+
+    def test_file_missing(self):
+        """$ pdb_pipe 'tidy'"""
+
+        sys.argv = ['', 'tidy']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)  # ensure the program exited gracefully.
+        self.assertEqual(len(self.stdout), 0)  # no output
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! No data to process!")
+
+    def test_helptext(self):
+        """$ pdb_pipe"""
+
+        sys.argv = ['']
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)  # ensure the program exited gracefully.
+        self.assertEqual(len(self.stdout), 0)  # no output
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -20,7 +20,9 @@ Unit Tests for `pdb_selchain`.
 """
 
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
@@ -126,6 +128,50 @@ class TestTool(unittest.TestCase):
         self.assertEqual(len(self.stdout), 129)  # c.A + c.B
         self.assertEqual(len(self.stderr), 0)
 
+    def test_binary(self):
+        """pdb_selchain on a binary structure matches the PDB output"""
+        from pdbtools.core.binary import from_pdb
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fh:
+            expected = list(self.module.select_chain(fh, set(['A', 'C'])))
+
+        with open(fpath) as fh:
+            structure = from_pdb(fh)
+
+        result = self.module.select_chain_binary(structure, set(['A', 'C']))
+        self.assertEqual(list(result.iter_lines()), expected)
+
+    def test_indexed(self):
+        """pdb_selchain on an indexed file reads only the selected records"""
+        from pdbtools.core.index import write_index
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            fpath = os.path.join(tempdir, 'dummy.pdb')
+            shutil.copy(os.path.join(data_dir, 'dummy.pdb'), fpath)
+            index = write_index(fpath)
+
+            with open(fpath) as fh:
+                expected = list(self.module.select_chain(fh, set(['A', 'C'])))
+
+            result = self.module.select_chain_indexed(fpath, set(['A', 'C']), index)
+            self.assertEqual(list(result), expected)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_bytes(self):
+        """select_chain() gives the same output on bytes and text lines"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath, 'rb') as fh:
+            lines = fh.readlines()
+
+        chains = set(['A', 'C'])
+        result = list(self.module.select_chain(lines, chains))
+        expected = self.module.select_chain([l.decode() for l in lines], chains)
+        self.assertEqual([l.decode() for l in result], list(expected))
+
     def test_file_not_found(self):
         """$ pdb_selchain not_existing.pdb"""
 
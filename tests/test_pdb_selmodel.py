@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_selmodel`.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_selmodel'
+        self.module = __import__(name, fromlist=[''])
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def test_one_model(self):
+        """$ pdb_selmodel -2 data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-2', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 2)
+        self.assertEqual(len(self.stderr), 0)
+
+        with open(fpath) as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(self.stdout, lines[7:9])
+
+    def test_several_models(self):
+        """$ pdb_selmodel -1,2 data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-1,2', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 8)
+        self.assertEqual(len(self.stderr), 0)
+
+        records = [l[:6] for l in self.stdout]
+        self.assertEqual(records, ['MODEL ', 'ATOM  ', 'ATOM  ', 'ENDMDL'] * 2)
+
+    def test_stops_early(self):
+        """select_model() stops reading after the last selected model"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        with open(fpath) as fh:
+            lines = fh.readlines()
+
+        remaining = iter(lines)
+        selected = list(self.module.select_model(remaining, set([1])))
+
+        self.assertEqual(selected, lines[3:5])
+        self.assertEqual(list(remaining), lines[6:])  # from MODEL 2 on
+
+    def test_indexed(self):
+        """$ pdb_index ensemble.pdb; pdb_selmodel -2 ensemble.pdb"""
+        from pdbtools.core.index import write_index
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            fpath = os.path.join(tempdir, 'ensemble.pdb')
+            shutil.copy(os.path.join(data_dir, 'ensemble_OK.pdb'), fpath)
+            index = write_index(fpath)
+
+            expected = list(self.module.select_model_indexed(fpath, {2}, index))
+            with open(fpath) as fh:
+                self.assertEqual(list(self.module.select_model(fh, {2})),
+                                 expected)
+
+            sys.argv = ['', '-2', fpath]
+            self.exec_module()
+
+            self.assertEqual(self.retcode, 0)
+            self.assertEqual(self.stdout, [l.rstrip('\n') for l in expected])
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_missing_model(self):
+        """$ pdb_selmodel -3 data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-3', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(self.stderr[0],
+                         "ERROR!! Model(s) not found in file: 3")
+
+    def test_invalid_option(self):
+        """$ pdb_selmodel -A data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-A', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:47],
+                         "ERROR!! Model number must be a positive integer")
+
+    def test_file_not_found(self):
+        """$ pdb_selmodel -1 not_existing.pdb"""
+
+        afile = os.path.join(data_dir, 'not_existing.pdb')
+        sys.argv = ['', '-1', afile]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:22],
+                         "ERROR!! File not found")
+
+    def test_helptext(self):
+        """$ pdb_selmodel"""
+
+        sys.argv = ['']
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
@@ -19,8 +19,15 @@
 Unit Tests for `pdb_selres`.
 """
 
+try:
+    from StringIO import StringIO  # python 2.7
+except ImportError:
+    from io import StringIO  # python 3.x
+
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
@@ -37,11 +44,14 @@ class TestTool(unittest.TestCase):
         name = 'pdbtools.pdb_selres'
         self.module = __import__(name, fromlist=[''])
 
-    def exec_module(self):
+    def exec_module(self, stdin=None):
         """
         Execs module.
         """
 
+        if stdin is not None:
+            sys.stdin = StringIO(stdin)
+
         with OutputCapture() as output:
             try:
                 self.module.main()
@@ -51,6 +61,8 @@ class TestTool(unittest.TestCase):
         self.stdout = output.stdout
         self.stderr = output.stderr
 
+        sys.stdin = sys.__stdin__  # restore
+
         return
 
     def test_range_1(self):
@@ -104,11 +116,52 @@ class TestTool(unittest.TestCase):
         # Execute the script
         self.exec_module()
 
+        # Validate results
+        # Every 5th residue as read, regardless of repeated numbers
+        # across chains: B4, A3, A301, C302.
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 60)
+        self.assertEqual(len(self.stderr), 0)
+
+    def test_range_stdin(self):
+        """$ cat data/dummy.pdb | pdb_selres -1:5"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', '-1:5']
+
+        # Execute the script with file as stdin
+        with open(fpath) as fp:
+            self.exec_module(fp.read())
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 160)
+        self.assertEqual(len(self.stderr), 0)
+
+    def test_multiple_ranges_step(self):
+        """$ pdb_selres -1:3:2,301:305:2 data/dummy.pdb"""
+
+        # Simulate input
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', '-1:3:2,301:305:2', fpath]
+
+        # Execute the script
+        self.exec_module()
+
         # Validate results
         self.assertEqual(self.retcode, 0)
-        self.assertEqual(len(self.stdout), 63)
         self.assertEqual(len(self.stderr), 0)
 
+        # Each range keeps its own count: A1, A3, D2 and
+        # A301, A303, C301, C303, C305.
+        records = ('ATOM', 'HETATM')
+        residues = []
+        for line in self.stdout:
+            if line.startswith(records) and line[21:26] not in residues:
+                residues.append(line[21:26])
+        self.assertEqual(residues, ['A   1', 'A   3', 'D   2', 'A 301',
+                                    'A 303', 'C 301', 'C 303', 'C 305'])
+
     def test_range_5(self):
         """$ pdb_selres -6:6 data/dummy.pdb"""
 
@@ -185,6 +238,24 @@ class TestTool(unittest.TestCase):
         self.assertEqual(self.stderr[0][:21],
                          "ERROR!! Residue range")
 
+    def test_indexed(self):
+        """pdb_selres on an indexed file reads only the selected records"""
+        from pdbtools.core.index import write_index
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            fpath = os.path.join(tempdir, 'dummy.pdb')
+            shutil.copy(os.path.join(data_dir, 'dummy.pdb'), fpath)
+            index = write_index(fpath)
+
+            with open(fpath) as fh:
+                expected = list(self.module.select_residues(fh, [(1, 10, 2), (-1, -1, 1)]))
+
+            result = self.module.select_residues_indexed(fpath, [(1, 10, 2), (-1, -1, 1)], index)
+            self.assertEqual(list(result), expected)
+        finally:
+            shutil.rmtree(tempdir)
+
     def test_file_not_found(self):
         """$ pdb_selres not_existing.pdb"""
 
@@ -203,6 +203,38 @@ class TestTool(unittest.TestCase):
 
         self.assertEqual(altlocs, expected)
 
+    def test_multi_model(self):
+        """$ pdb_sort -R data/ensemble_more_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_more_OK.pdb')
+        sys.argv = ['', '-R', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)  # ensure the program exited OK.
+        self.assertEqual(len(self.stdout), 12)  # END removed
+        self.assertEqual(len(self.stderr), 0)  # no errors
+
+        # Models are kept and sorted independently
+        records = [l[:6].strip() for l in self.stdout]
+        expected = ['HEADER', 'TITLE', 'MODEL', 'ATOM', 'ATOM', 'ATOM',
+                    'ATOM', 'ENDMDL', 'MODEL', 'ATOM', 'ATOM', 'ENDMDL']
+        self.assertEqual(records, expected)
+
+    def test_spill_to_disk(self):
+        """Sorting in chunks on disk gives the same result"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        for keys in ('C', 'R', 'CR'):
+            with open(fpath) as fh:
+                in_memory = list(self.module.sort_file(fh, keys))
+            with open(fpath) as fh:
+                on_disk = list(self.module.sort_file(fh, keys, memory_limit=2000))
+
+            self.assertEqual(in_memory, on_disk)
+
     def test_file_not_found(self):
         """$ pdb_sort not_existing.pdb"""
 
@@ -19,6 +19,7 @@
 Unit Tests for `pdb_splitseg`.
 """
 
+import gzip
 import os
 import shutil
 import sys
@@ -97,6 +98,49 @@ class TestTool(unittest.TestCase):
 
                 self.assertEqual(fname_seg, list(set(pdb_segids))[0])
 
+    def test_options(self):
+        """$ pdb_splitseg -outdir out -gzip -prefix x data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', '-outdir', 'out', '-gzip', '-prefix', 'x', fpath]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(len(self.stderr), 0)
+
+        outdir = os.path.join(self.tempdir, 'out')
+        ofiles = sorted(os.listdir(outdir))
+        self.assertTrue(ofiles)
+        self.assertTrue(all(f.startswith('x_') for f in ofiles))
+        self.assertTrue(all(f.endswith('.pdb.gz') for f in ofiles))
+
+        records = (('ATOM', 'HETATM', 'TER', 'ANISOU'))
+        for fname in ofiles:
+            with gzip.open(os.path.join(outdir, fname), 'rt') as handle:
+                ids = set(l[72:76].strip() for l in handle if l.startswith(records))
+            self.assertEqual(ids, set([fname[2:-7]]))
+
+    def test_bounded_pool(self):
+        """split_segment() with one open file at a time writes the same files"""
+
+        with open(os.path.join(data_dir, 'dummy.pdb')) as fh:
+            lines = fh.readlines()
+
+        # Interleave segments so that files have to be closed and reopened
+        lines = lines + lines
+        default = self.module.split_segment(iter(lines), outdir='a')
+        bounded = self.module.split_segment(iter(lines), outdir='b', max_open=1)
+
+        # Streams without names use the default prefix
+        self.assertTrue(all(os.path.basename(f).startswith('output_')
+                            for f in default))
+        self.assertEqual(len(default), len(bounded))
+        for path_a, path_b in zip(default, bounded):
+            with open(path_a) as fa, open(path_b) as fb:
+                self.assertEqual(fa.read(), fb.read())
+
     def test_file_not_found(self):
         """$ pdb_splitseg not_existing.pdb"""
 
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 João Pedro Rodrigues
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for `pdb_tobin`.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from config import data_dir
+from utils import OutputCapture
+
+
+class TestTool(unittest.TestCase):
+    """
+    Generic class for testing tools.
+    """
+
+    def setUp(self):
+        # Dynamically import the module
+        name = 'pdbtools.pdb_tobin'
+        self.module = __import__(name, fromlist=[''])
+
+    def exec_module(self):
+        """
+        Execs module.
+        """
+
+        with OutputCapture() as output:
+            try:
+                self.module.main()
+            except SystemExit as e:
+                self.retcode = e.code
+
+        self.stdout = output.stdout
+        self.stderr = output.stderr
+
+        return
+
+    def test_conversion(self):
+        """pdb_tobin data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        for float32 in (False, True):
+            with open(fpath) as fh:
+                structure = self.module.convert_to_binary(fh, float32)
+
+            data = io.BytesIO()
+            structure.dump(data)
+            data = data.getvalue()
+
+            self.assertEqual(data[:8], b'\x89PDBBIN\n')
+            self.assertEqual(len(structure), 185)
+            typecode = 'f' if float32 else 'd'
+            self.assertEqual(structure.columns['x'].typecode, typecode)
+
+    def test_malformed_record(self):
+        """$ pdb_tobin malformed.pdb"""
+
+        with open(os.path.join(data_dir, 'dummy.pdb')) as fh:
+            lines = fh.readlines()
+        lines.insert(3, 'ATOM  A0000  N   ALA A   1      11.104   6.134  '
+                        '-6.504  1.00  0.00           N\n')
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            fpath = os.path.join(tempdir, 'malformed.pdb')
+            with open(fpath, 'w') as fh:
+                fh.writelines(lines)
+
+            sys.argv = ['', fpath]
+            self.exec_module()
+        finally:
+            shutil.rmtree(tempdir)
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:76],
+                         "ERROR!! Could not convert PDB file: invalid serial "
+                         "field in record on line 4")
+
+    def test_file_not_found(self):
+        """$ pdb_tobin not_existing.pdb"""
+
+        afile = os.path.join(data_dir, 'not_existing.pdb')
+        sys.argv = ['', afile]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0][:22],
+                         "ERROR!! File not found")
+
+    def test_helptext(self):
+        """$ pdb_tobin"""
+
+        sys.argv = ['']
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr, self.module.__doc__.split("\n")[:-1])
+
+    def test_invalid_option(self):
+        """$ pdb_tobin -A data/dummy.pdb"""
+
+        sys.argv = ['', '-A', os.path.join(data_dir, 'dummy.pdb')]
+
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stdout), 0)
+        self.assertEqual(self.stderr[0], "ERROR!! Unknown option: '-A'")
+
+
+if __name__ == '__main__':
+    from config import test_dir
+
+    mpath = os.path.abspath(os.path.join(test_dir, '..'))
+    sys.path.insert(0, mpath)  # so we load dev files before  any installation
+
+    unittest.main()
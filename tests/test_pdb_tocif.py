@@ -107,6 +107,77 @@ class TestTool(unittest.TestCase):
         n_fields = list(set(map(lambda x: len(x.split()), atom_lines)))
         self.assertEqual(n_fields, [21])
 
+    def test_entities(self):
+        """$ pdb_tocif data/dummy.pdb (label_entity_id, label_seq_id)"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+
+        # (record, res. name, chain, entity, seq. id) of each residue
+        records = (('ATOM', 'HETATM'))
+        fields = [l.split() for l in self.stdout if l.startswith(records)]
+        residues = []
+        for f in fields:
+            residue = (f[0], f[5], f[6], f[7], f[8])
+            if residue not in residues:
+                residues.append(residue)
+
+        self.assertEqual(residues,
+                         [('ATOM', 'ARG', 'B', '1', '1'),
+                          ('ATOM', 'GLU', 'B', '1', '2'),
+                          ('ATOM', 'ALA', 'B', '1', '3'),
+                          ('ATOM', 'ASN', 'A', '2', '1'),
+                          ('ATOM', 'ARG', 'A', '2', '2'),
+                          ('ATOM', 'GLU', 'A', '2', '3'),
+                          ('ATOM', 'ARG', 'C', '3', '1'),
+                          ('ATOM', 'GLU', 'C', '3', '2'),
+                          ('ATOM', 'MET', 'C', '3', '3'),
+                          ('ATOM', 'DT', 'D', '4', '1'),
+                          ('HETATM', 'CA', 'A', '5', '.'),
+                          ('HETATM', 'HOH', 'A', '6', '.'),
+                          ('HETATM', 'HOH', 'B', '6', '.'),
+                          ('HETATM', 'HOH', 'C', '6', '.')])
+
+    def test_identical_chains(self):
+        """pdb_tocif gives chains with the same sequence the same entity"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        with open(fpath) as fhandle:
+            chain = [l for l in fhandle if l[21:22] == 'B' and
+                     l.startswith(('ATOM', 'TER'))]
+        dimer = chain + [l[:21] + 'E' + l[22:] for l in chain]
+
+        fields = [l.split() for l in
+                  ''.join(self.module.convert_to_mmcif(dimer)).splitlines()
+                  if l.startswith('ATOM')]
+
+        entities = [(f[6], f[7]) for f in fields]
+        self.assertEqual(sorted(set(entities)), [('B', '1'), ('E', '1')])
+        self.assertEqual(len(entities), 2 * len(chain) - 2)  # no TER rows
+
+    def test_model_numbers(self):
+        """$ pdb_tocif data/ensemble_error_4.pdb (no ENDMDL)"""
+
+        fpath = os.path.join(data_dir, 'ensemble_error_4.pdb')
+        sys.argv = ['', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+
+        records = (('ATOM', 'HETATM'))
+        fields = [l.split() for l in self.stdout if l.startswith(records)]
+        self.assertEqual([f[-1] for f in fields], ['1', '1', '2', '2'])
+        self.assertEqual([f[8] for f in fields], ['1', '1', '1', '1'])
+
     def test_file_not_found(self):
         """$ pdb_tocif not_existing.pdb"""
 
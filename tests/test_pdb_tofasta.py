@@ -20,13 +20,25 @@ Unit Tests for `pdb_tofasta`.
 """
 
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from config import data_dir
 from utils import OutputCapture
 
 
+SEQRES = [
+    'HEADER    TEST\n',
+    'SEQRES   1 A   14  MET ALA GLY LYS TRP CYS ASP GLU PHE HIS ILE LEU ASN\n',
+    'SEQRES   2 A   14  PRO\n',
+    'SEQRES   1 B    3    A   U MSE\n',
+    'HET    MSE  B   3       8\n',
+    'ATOM      1  N   GLY A   1      0.000   0.000   0.000  1.00  0.00           N\n',
+]
+
+
 class TestTool(unittest.TestCase):
     """
     Generic class for testing tools.
@@ -91,6 +103,67 @@ class TestTool(unittest.TestCase):
                                        '>PDB|B', 'X',
                                        '>PDB|C', 'XXXXX'])
 
+    def test_seqres(self):
+        """$ pdb_tofasta -multi -seqres seqres.pdb"""
+
+        lines = iter(SEQRES)
+        fasta = list(self.module.pdb_to_fasta(lines, 'multi', seqres=True))
+
+        self.assertEqual(fasta, ['>PDB|A\n', 'MAGKWCDEFHILNP\n',
+                                 '>PDB|B\n', 'AUX\n'])
+
+        # Stopped reading after the SEQRES records
+        self.assertEqual(next(lines), SEQRES[-1])
+
+    def test_batch(self):
+        """$ pdb_tofasta -multi -jobs 2 data/dummy.pdb dir/"""
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        os.mkdir(os.path.join(tmpdir, 'sub'))
+        with open(os.path.join(tmpdir, 'sub', '1abc.pdb'), 'w') as fh:
+            fh.write(''.join(SEQRES))
+        with open(os.path.join(tmpdir, 'notes.txt'), 'w') as fh:
+            fh.write('not a structure\n')
+
+        sys.argv = ['', '-multi', '-jobs', '2',
+                    os.path.join(data_dir, 'dummy.pdb'), tmpdir]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout, ['>dummy|B', 'REA',
+                                       '>dummy|A', 'NRE',
+                                       '>dummy|C', 'REM',
+                                       '>dummy|D', 'X',
+                                       '>dummy|A', 'XXX',
+                                       '>dummy|B', 'X',
+                                       '>dummy|C', 'XXXXX',
+                                       '>1abc|A', 'G'])
+
+    def test_batch_seqres(self):
+        """$ pdb_tofasta -seqres dir/"""
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        for name in ('2xyz.ent', '1abc.pdb'):
+            with open(os.path.join(tmpdir, name), 'w') as fh:
+                fh.write(''.join(SEQRES))
+
+        sys.argv = ['', '-seqres', tmpdir]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout, ['>1abc|AB', 'MAGKWCDEFHILNPAUX',
+                                       '>2xyz|AB', 'MAGKWCDEFHILNPAUX'])
+
     def test_file_not_found(self):
         """$ pdb_tofasta not_existing.pdb"""
 
@@ -19,6 +19,7 @@
 Unit Tests for `pdb_validate`.
 """
 
+import json
 import os
 import sys
 import unittest
@@ -91,6 +92,64 @@ class TestTool(unittest.TestCase):
         self.assertEqual(self.stdout,
                          ["It *seems* everything is OK."])
 
+    def test_jobs(self):
+        """$ pdb_validate -jobs 3 data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+
+        sys.argv = ['', fpath]
+        self.exec_module()
+        expected = self.stdout
+
+        chunk_size = self.module.CHUNK_SIZE
+        self.module.CHUNK_SIZE = 7  # many chunks, not aligned to errors
+        try:
+            sys.argv = ['', '-jobs', '3', fpath]
+            self.exec_module()
+        finally:
+            self.module.CHUNK_SIZE = chunk_size
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(self.stdout, expected)
+
+    def test_json(self):
+        """$ pdb_validate -json data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', '-json', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 1)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(len(self.stdout), 130)  # one error per line
+
+        errors = [json.loads(l) for l in self.stdout]
+        self.assertEqual(len([e for e in errors if e['error'] == 'short']), 70)
+        self.assertEqual(errors[0],
+                         {'line': 7, 'error': 'short', 'length': 48})
+
+        field_errors = [e for e in errors if e['error'] == 'field']
+        self.assertEqual(len(field_errors), 60)
+        self.assertEqual(field_errors[0]['line'], 123)
+        self.assertEqual(field_errors[0]['field'], 'At. Charg')
+        self.assertEqual(field_errors[0]['columns'], [79, 80])
+
+    def test_json_valid(self):
+        """$ pdb_validate -json data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-json', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+        self.assertEqual(len(self.stdout), 0)
+
     def test_file_not_found(self):
         """$ pdb_validate not_existing.pdb"""
 
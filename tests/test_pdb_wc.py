@@ -19,6 +19,7 @@
 Unit Tests for `pdb_wc`.
 """
 
+import json
 import os
 import sys
 import unittest
@@ -110,6 +111,60 @@ class TestTool(unittest.TestCase):
         self.assertEqual(self.stdout,
                          ['No. chains:\t4\t(   4.0/model)', '\t->\tA,B,C,D'])
 
+    def test_json(self):
+        """$ pdb_wc -json data/dummy.pdb"""
+
+        fpath = os.path.join(data_dir, 'dummy.pdb')
+        sys.argv = ['', '-json', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        # Validate results
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stdout), 1)
+        self.assertEqual(len(self.stderr), 0)
+
+        summary = json.loads(self.stdout[0])
+        self.assertEqual(summary['models'], 1)
+        self.assertEqual(summary['chains'], 4)
+        self.assertEqual(summary['residues'], 10)
+        self.assertEqual(summary['atoms'], 176)
+        self.assertEqual(summary['hetatm'], 9)
+        self.assertEqual(summary['altloc'], True)
+        self.assertEqual(summary['icodes'], False)
+        self.assertEqual(summary['chain_ids'], ['A', 'B', 'C', 'D'])
+
+        self.assertEqual(summary['per_model'],
+                         [{'model': None, 'chains': 4, 'residues': 10,
+                           'atoms': 176, 'hetatm': 9}])
+        self.assertEqual([(c['chain'], c['residues'], c['atoms'], c['hetatm'])
+                          for c in summary['per_chain']],
+                         [('B', 3, 51, 1), ('A', 3, 56, 3),
+                          ('C', 3, 49, 5), ('D', 1, 20, 0)])
+
+    def test_json_ensemble(self):
+        """$ pdb_wc -json data/ensemble_OK.pdb"""
+
+        fpath = os.path.join(data_dir, 'ensemble_OK.pdb')
+        sys.argv = ['', '-json', fpath]
+
+        # Execute the script
+        self.exec_module()
+
+        self.assertEqual(self.retcode, 0)
+        self.assertEqual(len(self.stderr), 0)
+
+        summary = json.loads(self.stdout[0])
+        self.assertEqual(summary['models'], 2)
+        self.assertEqual(summary['model_ids'], ['1', '2'])
+        self.assertEqual([m['model'] for m in summary['per_model']],
+                         ['1', '2'])
+        self.assertEqual([m['atoms'] for m in summary['per_model']], [2, 2])
+        self.assertEqual([(c['model'], c['chain'])
+                          for c in summary['per_chain']],
+                         [('1', 'A'), ('2', 'A')])
+
     def test_file_not_found(self):
         """$ pdb_wc not_existing.pdb"""
 